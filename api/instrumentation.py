@@ -0,0 +1,103 @@
+import hmac
+import random
+import sys
+import threading
+import time
+import anyio
+from config.metrics import (
+    METRICS_ENABLED, http_requests, http_request_duration, http_requests_in_flight
+)
+from config.profiling import (
+    PROFILE_SAMPLE_RATE, PROFILE_DEBUG_TOKEN, RequestProfile, current_profile, sampler, save_profile
+)
+
+
+class MetricsMiddleware:
+    # Request count, latency and in-flight gauge per route. Routes are
+    # labelled by their path template (/api/admin/alumni/{id}), never the
+    # raw path, to keep the number of series bounded.
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            route = self._route(scope)
+            http_request_duration.observe(scope["method"], route, value=elapsed)
+            http_requests.inc(scope["method"], route, str(status))
+
+    def _route(self, scope):
+        # The router stores the matched endpoint in the scope
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            for route in scope["app"].routes:
+                target = getattr(route, "endpoint", None) or getattr(route, "app", None)
+                if target is not None:
+                    self._route_paths[target] = route.path
+            path = self._route_paths.setdefault(endpoint, "unmatched")
+        return path
+
+
+class ProfilingMiddleware:
+    # Samples the stacks of a share of requests (PROFILE_SAMPLE_RATE) and of
+    # requests whose X-Debug-Profile header carries PROFILE_DEBUG_TOKEN. The
+    # profile id is returned in X-Profile-Id and the profile is stored for
+    # GET /api/admin/profiles/{id}. Other requests only pay for the checks in
+    # _wanted.
+    def __init__(self, app):
+        self.app = app
+
+    def _wanted(self, scope):
+        if PROFILE_DEBUG_TOKEN:
+            for name, value in scope["headers"]:
+                if name == b"x-debug-profile":
+                    return hmac.compare_digest(value, PROFILE_DEBUG_TOKEN.encode())
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], threading.get_ident(), sys._getframe())
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        token = current_profile.set(profile)
+        sampler.start(profile)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop(profile)
+            profile.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+            current_profile.reset(token)
+            try:
+                await anyio.to_thread.run_sync(save_profile, profile)
+            except Exception as e:
+                print(f"Saving profile {profile.id} failed: {e}")
@@ -1,15 +1,33 @@
-import uuid
-from fastapi import FastAPI, Depends, HTTPException, Body, UploadFile, File, Query, Path, Header
+from fastapi import FastAPI, Depends, HTTPException, Body, UploadFile, File, Query, Path, Header, BackgroundTasks, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Optional, Dict, Any, List
-from config.main import get_db_connection, oauth2_scheme, decode_jwt_token
-from services.main import AuthService, AlumniService, AdminService
+from config.main import oauth2_scheme, decode_jwt_token, token_cache, close_db_pool, get_pool_stats
+from services.main import AsyncAuthService, AsyncAlumniService, AsyncAdminService
+from services.search import AsyncSearchService
+from services.imports import AsyncImportService
+from services.exports import AsyncExportService
+from services.facets import facet_cache
+from services.images import (
+    save_profile_image, release_profile_image, UploadError, PROFILE_IMAGE_MAX_BYTES,
+    ensure_derivative, generate_derivatives, shutdown_image_workers, image_index, image_response
+)
+from services.storage import blob_store, collect_garbage
+from config.cache import profile_cache
+from api.responses import FastJSONResponse
+from api.compression import CompressionMiddleware
+from api.instrumentation import MetricsMiddleware, ProfilingMiddleware
+from config.profiling import list_profiles, profile_path
+from config.metrics import registry, METRICS_TOKEN
+from config.querylog import slow_query_log, SLOW_QUERY_LOG, SLOW_QUERY_MS
+from config.migrations import migrate_on_startup
+import hmac
 import os
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi import UploadFile, File
 
-app = FastAPI(title="College Alumni System")
+app = FastAPI(title="College Alumni System", default_response_class=FastJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -20,6 +38,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Negotiated brotli/gzip for JSON and text bodies over COMPRESSION_MIN_SIZE
+app.add_middleware(CompressionMiddleware)
+
+# Reject oversized image uploads from Content-Length before the multipart
+# body is read; streaming enforcement in save_profile_image covers the rest
+@app.middleware("http")
+async def limit_upload_size(request, call_next):
+    if request.method == "POST" and request.url.path == "/api/alumni/profile/image":
+        length = request.headers.get("content-length")
+        # Allow some room for the multipart framing around the file
+        if length and length.isdigit() and int(length) > PROFILE_IMAGE_MAX_BYTES + 64 * 1024:
+            return JSONResponse(status_code=413, content={"detail": "Image exceeds the upload size limit"})
+    return await call_next(request)
+
+# Middlewares added later wrap the earlier ones, so request latency includes
+# the upload size check (and its 413s), compression and CORS handling
+app.add_middleware(MetricsMiddleware)
+
+# Sampled or debug-header requests get a stack profile (see config/profiling.py).
+# Outermost, so storing a profile after the response is not counted as latency.
+app.add_middleware(ProfilingMiddleware)
+
+# Pending schema migrations, when DB_MIGRATE_ON_STARTUP is set
+@app.on_event("startup")
+def run_migrations():
+    migrate_on_startup()
+
+# Load the shared token deny list before the first request is served
+@app.on_event("startup")
+def sync_token_revocations():
+    token_cache.sync()
+
+@app.on_event("shutdown")
+def shutdown_db_pool():
+    close_db_pool()
+    shutdown_image_workers()
+
 # Authentication dependency
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     payload = decode_jwt_token(token)
@@ -42,18 +97,24 @@ async def admin_only(current_user: dict = Depends(get_current_user)):
 # ------------------------------ AUTH ROUTES ------------------------------
 @app.post("/api/auth/register")
 async def register(user_data: dict = Body(...)):
-    result = AuthService.register_user(user_data)
+    result = await AsyncAuthService.register_user(user_data)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @app.post("/api/auth/login")
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    result = AuthService.login_user(form_data.username, form_data.password)
+    result = await AsyncAuthService.login_user(form_data.username, form_data.password)
     if "error" in result:
         raise HTTPException(status_code=401, detail=result["error"])
     return result
 
+@app.post("/api/auth/logout")
+async def logout(token: str = Depends(oauth2_scheme), current_user: dict = Depends(get_current_user)):
+    if not await run_in_threadpool(token_cache.revoke_token, token, current_user.get("exp")):
+        raise HTTPException(status_code=503, detail="Logout could not be recorded; try again")
+    return {"status": "success"}
+
 # ------------------------------ ALUMNI ROUTES ------------------------------
 @app.get("/api/alumni/profile")
 async def get_profile(current_user: dict = Depends(alumni_only)):
@@ -61,10 +122,10 @@ async def get_profile(current_user: dict = Depends(alumni_only)):
     if not alumni_id:
         raise HTTPException(status_code=404, detail="Alumni profile not found")
     
-    result = AlumniService.get_alumni_profile(alumni_id)
+    result = await AsyncAlumniService.get_alumni_profile_json(alumni_id)
     if "error" in result:
         raise HTTPException(status_code=404, detail=result["error"])
-    return result
+    return Response(content=result["profile_json"], media_type="application/json")
 
 @app.post("/api/alumni/profile")
 async def create_profile_entry(
@@ -75,7 +136,7 @@ async def create_profile_entry(
     if not alumni_id:
         raise HTTPException(status_code=404, detail="Alumni profile not found")
     
-    result = AlumniService.create_profile_entry(alumni_id, entry_data)
+    result = await AsyncAlumniService.create_profile_entry(alumni_id, entry_data)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -89,7 +150,7 @@ async def update_profile(
     if not alumni_id:
         raise HTTPException(status_code=404, detail="Alumni profile not found")
     
-    result = AlumniService.update_alumni_profile(alumni_id, profile_data)
+    result = await AsyncAlumniService.update_alumni_profile(alumni_id, profile_data)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -98,6 +159,7 @@ async def update_profile(
 
 @app.post("/api/alumni/profile/image")
 async def upload_profile_image(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: dict = Depends(alumni_only)
 ):
@@ -105,41 +167,33 @@ async def upload_profile_image(
     if not alumni_id:
         raise HTTPException(status_code=404, detail="Alumni profile not found")
     
-    # Create uploads directory if it doesn't exist
-    upload_dir = os.path.join("uploads", "profile_images")
-    os.makedirs(upload_dir, exist_ok=True)
+    try:
+        image_key = await save_profile_image(file)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     
-    # Generate unique filename
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(upload_dir, unique_filename)
+    # Update database with the new blob key. On failure the blob is left for
+    # garbage collection, since an identical upload may share it.
+    result = await AsyncAlumniService.update_profile_image(alumni_id, image_key)
+    if "error" in result:
+        raise HTTPException(status_code=500, detail=result["error"])
     
-    # Save file
-    with open(file_path, "wb") as buffer:
-        buffer.write(await file.read())
+    # Delete the previous image once no profile references it
+    if result.get("previous_image") and result["previous_image"] != image_key:
+        await run_in_threadpool(release_profile_image, result["previous_image"], result["previous_references"])
     
-    # Update database with new file path
-    conn = get_db_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
+    image_index.invalidate(alumni_id)
     
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE alumni SET profile_image = %s WHERE alumni_id = %s",
-            (file_path, alumni_id)
-        )
-        conn.commit()
-        return {"filename": unique_filename, "status": "success"}
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+    # Render thumbnails and web-sized variants after the response is sent
+    background_tasks.add_task(generate_derivatives, image_key)
+    
+    return {"filename": image_key, "status": "success"}
 
 @app.get("/api/alumni/profile/image/{alumni_id}")
 async def get_profile_image(
+    request: Request,
     alumni_id: int = Path(...),
+    size: str = Query("original", regex="^(original|thumb|small|medium)$"),
     current_user: dict = Depends(get_current_user)  # You can use get_current_user or alumni_only based on your requirements
 ):
     # Check if the requesting user has permission to view this image
@@ -149,19 +203,31 @@ async def get_profile_image(
     if not (is_owner or is_admin):
         raise HTTPException(status_code=403, detail="Not authorized to view this image")
     
-    result = AlumniService.get_profile_image(alumni_id)
-    
-    if "error" in result:
-        raise HTTPException(status_code=404, detail=result["error"])
-    
-    # Assuming the image path is stored in profile_image field
-    image_path = result["image_path"]
-    
-    # Check if file exists
-    if not os.path.isfile(image_path):
-        raise HTTPException(status_code=404, detail="Image file not found")
+    # Repeat requests are answered from the in-memory image index
+    entry = image_index.get(alumni_id, size)
+    if entry is None:
+        result = await AsyncAlumniService.get_profile_image(alumni_id)
+        
+        if "error" in result:
+            raise HTTPException(status_code=404, detail=result["error"])
+        
+        # profile_image holds a blob key (or a file path for legacy uploads)
+        image_ref = result["image_path"]
+        
+        # Resized variants are rendered on first use if missing; fall back to
+        # the original if that is not possible (and don't remember the fallback)
+        resolved_ref = image_ref
+        if size != "original":
+            resolved_ref = await ensure_derivative(image_ref, size) or image_ref
+        
+        entry = await run_in_threadpool(
+            image_index.load, alumni_id, size, resolved_ref, size == "original" or resolved_ref != image_ref
+        )
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Image file not found")
     
-    return FileResponse(image_path)
+    # ETag/Last-Modified validation (304), byte ranges (206) and Cache-Control
+    return image_response(request.headers, entry)
 
 @app.delete("/api/alumni/profile/{type}/{id}")
 async def delete_profile_item(
@@ -173,22 +239,35 @@ async def delete_profile_item(
     if not alumni_id:
         raise HTTPException(status_code=404, detail="Alumni profile not found")
     
-    result = AlumniService.delete_profile_item(alumni_id, type, id)
+    result = await AsyncAlumniService.delete_profile_item(alumni_id, type, id)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 # ------------------------------ ADMIN ROUTES ------------------------------
+# Sparse fieldset for alumni list endpoints: ?fields=full_name,graduation_year
+def alumni_fields(fields: Optional[str] = None):
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
 @app.get("/api/admin/alumni")
 async def get_all_alumni(
     page: int = Query(1, gt=0),
     per_page: int = Query(10, gt=0, le=100),
+    cursor: Optional[str] = None,
+    pagination: str = Query("offset", regex="^(offset|cursor)$"),
+    # Defaults to exact in offset mode and none in cursor mode
+    total: Optional[str] = Query(None, regex="^(exact|cached|estimate|none)$"),
+    fields: Optional[List[str]] = Depends(alumni_fields),
+    format: str = Query("objects", regex="^(objects|rows)$"),
     current_user: dict = Depends(admin_only)
 ):
-    result = AdminService.get_all_alumni(page, per_page)
+    result = await AsyncAdminService.get_all_alumni(page, per_page, cursor, pagination, total, fields, format)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
-    return result
+    # Returned as a response so the rows skip jsonable_encoder
+    return FastJSONResponse(result)
 
 # @app.get("/api/admin/alumni/{id}")
 # async def get_alumni_by_id(
@@ -206,7 +285,7 @@ async def update_alumni(
     profile_data: dict = Body(...),
     current_user: dict = Depends(admin_only)
 ):
-    result = AdminService.update_alumni_by_admin(id, profile_data)
+    result = await AsyncAdminService.update_alumni_by_admin(id, profile_data)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -217,7 +296,7 @@ async def add_job_for_alumni(
     job_data: dict = Body(...),
     current_user: dict = Depends(admin_only)
 ):
-    result = AdminService.add_job_for_alumni(alumni_id, job_data)
+    result = await AsyncAdminService.add_job_for_alumni(alumni_id, job_data)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -228,7 +307,7 @@ async def delete_job_for_alumni(
     job_id: int = Path(...),
     current_user: dict = Depends(admin_only)
 ):
-    result = AdminService.delete_job_for_alumni(alumni_id, job_id)
+    result = await AsyncAdminService.delete_job_for_alumni(alumni_id, job_id)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -239,7 +318,7 @@ async def add_education_for_alumni(
     education_data: dict = Body(...),
     current_user: dict = Depends(admin_only)
 ):
-    result = AdminService.add_education_for_alumni(alumni_id, education_data)
+    result = await AsyncAdminService.add_education_for_alumni(alumni_id, education_data)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -250,14 +329,14 @@ async def delete_education_for_alumni(
     education_id: int = Path(...),
     current_user: dict = Depends(admin_only)
 ):
-    result = AdminService.delete_education_for_alumni(alumni_id, education_id)
+    result = await AsyncAdminService.delete_education_for_alumni(alumni_id, education_id)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 # First define the specific route
-@app.get("/api/admin/alumni/filter")
-async def filter_alumni(
+# Filter criteria shared by the filter and export endpoints
+def alumni_filters(
     department: Optional[str] = None,
     end_year: Optional[int] = None,
     start_year: Optional[int] = None,
@@ -267,8 +346,7 @@ async def filter_alumni(
     location: Optional[str] = None,
     company_name: Optional[str] = None,
     position: Optional[str] = None,
-    availability_for_mentorship: Optional[bool] = None,
-    current_user: dict = Depends(admin_only)
+    availability_for_mentorship: Optional[bool] = None
 ):
     filters = {}
     if department:
@@ -291,8 +369,74 @@ async def filter_alumni(
         filters["position"] = position
     if availability_for_mentorship is not None:
         filters["availability_for_mentorship"] = availability_for_mentorship
+    return filters
+
+@app.get("/api/admin/alumni/filter")
+async def filter_alumni(
+    filters: dict = Depends(alumni_filters),
+    page: int = Query(1, gt=0),
+    per_page: int = Query(50, gt=0, le=500),
+    fields: Optional[List[str]] = Depends(alumni_fields),
+    format: str = Query("objects", regex="^(objects|rows)$"),
+    current_user: dict = Depends(admin_only)
+):
+    result = await AsyncAdminService.filter_alumni(filters, page, per_page, fields, format)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return FastJSONResponse(result)
+
+@app.get("/api/admin/alumni/export")
+async def export_alumni(
+    filters: dict = Depends(alumni_filters),
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    current_user: dict = Depends(admin_only)
+):
+    result = await AsyncExportService.export_alumni(filters, format)
+    if "error" in result:
+        raise HTTPException(status_code=result.get("status_code", 400), detail=result["error"])
     
-    result = AdminService.filter_alumni(filters)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        result["stream"],
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="alumni.{format}"'}
+    )
+
+@app.post("/api/admin/alumni/batch")
+async def get_alumni_batch(
+    ids: List[int] = Body(..., embed=True),
+    fields: Optional[List[str]] = Body(None, embed=True),
+    current_user: dict = Depends(admin_only)
+):
+    result = await AsyncAdminService.get_alumni_batch(ids, fields)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return FastJSONResponse(result)
+
+@app.get("/api/admin/alumni/search")
+async def search_alumni(
+    q: str = Query(..., min_length=1, max_length=200),
+    page: int = Query(1, gt=0),
+    per_page: int = Query(20, gt=0, le=100),
+    current_user: dict = Depends(admin_only)
+):
+    result = await AsyncSearchService.search_alumni(q, page, per_page)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@app.post("/api/admin/alumni/import")
+async def import_alumni(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, regex="^(csv|ndjson)$"),
+    current_user: dict = Depends(admin_only)
+):
+    # Format defaults from the file extension
+    if format is None:
+        extension = os.path.splitext(file.filename or "")[1].lower()
+        format = "ndjson" if extension in (".ndjson", ".jsonl", ".json") else "csv"
+    
+    result = await AsyncImportService.import_alumni(file.file, format)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -303,26 +447,94 @@ async def get_alumni_by_id(
     id: int = Path(...),
     current_user: dict = Depends(admin_only)
 ):
-    result = AdminService.get_alumni_by_id(id)
+    result = await AsyncAdminService.get_alumni_by_id_json(id)
     if "error" in result:
         raise HTTPException(status_code=404, detail=result["error"])
-    return result
+    return Response(content=result["profile_json"], media_type="application/json")
 
 @app.get("/api/admin/filter-categories")
 async def get_filter_categories(current_user: dict = Depends(admin_only)):
-    result = AdminService.get_filter_categories()
+    # Answer straight from memory when the facet cache is fresh
+    body = facet_cache.cached_json()
+    if body is None:
+        result = await AsyncAdminService.get_filter_categories_json()
+        if "error" in result:
+            raise HTTPException(status_code=400, detail=result["error"])
+        body = result["categories_json"]
+    return Response(content=body, media_type="application/json")
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/admin/slow-queries")
+async def slow_queries(
+    limit: int = Query(20, gt=0, le=500),
+    order: str = Query("total_ms", regex="^(total_ms|max_ms|mean_ms|calls)$"),
+    current_user: dict = Depends(admin_only)
+):
+    return {
+        "enabled": SLOW_QUERY_LOG,
+        "threshold_ms": SLOW_QUERY_MS,
+        "queries": slow_query_log.top(limit, order)
+    }
+
+@app.delete("/api/admin/slow-queries")
+async def reset_slow_queries(current_user: dict = Depends(admin_only)):
+    slow_query_log.reset()
+    return {"message": "Slow query log cleared"}
+
+@app.get("/api/admin/profiles")
+async def profiles(
+    limit: int = Query(50, gt=0, le=500),
+    current_user: dict = Depends(admin_only)
+):
+    return {"profiles": await run_in_threadpool(list_profiles, limit=limit)}
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str = Path(...),
+    current_user: dict = Depends(admin_only)
+):
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
+
+@app.get("/api/admin/pool-stats")
+async def pool_stats(current_user: dict = Depends(admin_only)):
+    return get_pool_stats()
+
+@app.get("/api/admin/cache-stats")
+async def cache_stats(current_user: dict = Depends(admin_only)):
+    return {
+        "profile_cache": profile_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "image_index": image_index.stats(),
+        "facet_cache": facet_cache.stats()
+    }
+
+@app.post("/api/admin/storage/gc")
+async def storage_gc(
+    dry_run: bool = Query(True),
+    current_user: dict = Depends(admin_only)
+):
+    # Deletes image blobs no profile references (older than IMAGE_BLOB_GRACE)
+    result = await AsyncAlumniService.list_image_references()
     if "error" in result:
-        raise HTTPException(status_code=400, detail=result["error"])
-    return result
+        raise HTTPException(status_code=500, detail=result["error"])
+    return await run_in_threadpool(collect_garbage, blob_store, result["references"], dry_run=dry_run)
 
 @app.delete("/api/admin/alumni/{id}")
 async def delete_alumni(
     id: int = Path(...),
     current_user: dict = Depends(admin_only)
 ):
-    result = AdminService.delete_alumni(id)
+    result = await AsyncAdminService.delete_alumni(id)
     if "error" in result:
-        raise HTTPException(status_code=400, detail=result["error"])
+        raise HTTPException(status_code=result.get("status_code", 400), detail=result["error"])
     return result
 
 # For running the app
@@ -0,0 +1,61 @@
+import datetime
+import decimal
+import json
+import os
+import uuid
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library encoder is used instead
+    orjson = None
+
+# JSON encoder for API responses: "orjson" (needs the orjson package),
+# "stdlib", or "auto" for orjson when it is installed
+JSON_ENCODER = os.getenv("JSON_ENCODER", "auto")
+
+
+def _default(value):
+    # Column types neither encoder handles natively. Decimal (cgpa) becomes
+    # a number, as jsonable_encoder did.
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps_orjson(content):
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _dumps_stdlib(content):
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def create_encoder():
+    if JSON_ENCODER == "stdlib":
+        return _dumps_stdlib
+    if JSON_ENCODER == "orjson":
+        if orjson is None:
+            raise RuntimeError("JSON_ENCODER=orjson requires the orjson package")
+        return _dumps_orjson
+    if JSON_ENCODER != "auto":
+        raise ValueError(f"Unknown JSON_ENCODER: {JSON_ENCODER}")
+    return _dumps_orjson if orjson is not None else _dumps_stdlib
+
+
+dumps = create_encoder()
+
+
+class FastJSONResponse(JSONResponse):
+    # JSONResponse that encodes service results (RealDictRows, tuples,
+    # dates, datetimes, Decimals) directly. Routes returning one skip
+    # FastAPI's jsonable_encoder pass; as the app's default response class
+    # it also speeds up rendering of everything else.
+    def render(self, content):
+        return dumps(content)
@@ -0,0 +1,67 @@
+import argparse
+import json
+import random
+
+from common import DEFAULT_BASE_URL, Client, connect, login, summarize, timed
+from seed import cleanup, seed
+
+# Time to load a page of N profile cards: N calls to GET /api/admin/alumni/{id}
+# against one POST /api/admin/alumni/batch, with and without a sparse field
+# set. Response sizes are reported too.
+#
+#   python benchmarks/batch_read.py --username dharshankumar --password 12345678
+
+CARD_FIELDS = ["full_name", "current_location", "graduation_year", "profile_image", "jobs"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch profile read benchmark")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--username", required=True, help="admin username")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--alumni", type=int, default=2000, help="alumni to seed")
+    parser.add_argument("--cards", type=int, default=100, help="profiles per page")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded rows")
+    args = parser.parse_args()
+
+    conn = connect()
+    prefix, ids = seed(conn, args.alumni, education_per_alumni=2, jobs_per_alumni=3)
+    try:
+        token = login(args.base_url, args.username, args.password)
+        client = Client(args.base_url, token)
+        rng = random.Random(0)
+        pages = [rng.sample(ids, args.cards) for _ in range(args.pages)]
+
+        def one_by_one(page):
+            size = 0
+            for alumni_id in page:
+                _, _, data = client.request("GET", f"/api/admin/alumni/{alumni_id}")
+                size += len(data)
+            return size
+
+        def batch(page, fields=None):
+            body = {"ids": page, "fields": fields} if fields else {"ids": page}
+            status, _, data = client.request("POST", "/api/admin/alumni/batch", body=body)
+            if status != 200:
+                raise RuntimeError(f"Batch read failed: {status} {data[:200]!r}")
+            return len(data)
+
+        results = {}
+        for name, run in (("one_by_one", one_by_one), ("batch", batch),
+                          ("batch_sparse", lambda page: batch(page, CARD_FIELDS))):
+            run(pages[0])  # warm up
+            samples = [timed(run, page) for page in pages]
+            results[name] = {"bytes_per_page": samples[-1][1], **summarize([elapsed for elapsed, _ in samples])}
+            print(f"{name:<13} p50={results[name]['p50_ms']:9.2f}ms  bytes={results[name]['bytes_per_page']}")
+        client.close()
+
+        print(json.dumps({"benchmark": "batch_read", "cards_per_page": args.cards, "results": results}, indent=2))
+    finally:
+        if not args.keep:
+            cleanup(conn, prefix)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import csv
+import io
+import json
+import random
+import time
+import uuid
+
+from common import DEFAULT_BASE_URL, Client, connect, login, multipart, summarize, timed
+from seed import CITIES, COMPANIES, DEGREES, DEPARTMENTS, FIRST_NAMES, LAST_NAMES, POSITIONS, cleanup
+
+# Imports a synthetic graduating class through POST /api/admin/alumni/import
+# and compares it with registering a sample of the same size one by one
+# through /api/auth/register. Imported rows are removed again afterwards.
+#
+#   python benchmarks/bulk_import.py --username dharshankumar --password 12345678 --count 100000
+
+
+def generate(count, prefix, fmt):
+    rng = random.Random(prefix)
+    records = []
+    for i in range(count):
+        start = rng.randint(2010, 2020)
+        records.append({
+            "username": f"{prefix}_{i}",
+            "email": f"{prefix}_{i}@example.com",
+            "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "graduation_year": start + 4,
+            "current_location": rng.choice(CITIES),
+            "education": [{"degree": rng.choice(DEGREES), "department": rng.choice(DEPARTMENTS),
+                           "start_year": start, "end_year": start + 4}],
+            "jobs": [{"company_name": rng.choice(COMPANIES), "position": rng.choice(POSITIONS),
+                      "start_date": f"{start + 4}-07-01", "is_current": True}],
+        })
+
+    if fmt == "ndjson":
+        return "".join(json.dumps(record) + "\n" for record in records).encode()
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["username", "email", "full_name", "graduation_year", "current_location",
+                     "education.degree", "education.department", "education.start_year", "education.end_year",
+                     "job.company_name", "job.position", "job.start_date", "job.is_current"])
+    for r in records:
+        e, j = r["education"][0], r["jobs"][0]
+        writer.writerow([r["username"], r["email"], r["full_name"], r["graduation_year"], r["current_location"],
+                         e["degree"], e["department"], e["start_year"], e["end_year"],
+                         j["company_name"], j["position"], j["start_date"], "true"])
+    return buffer.getvalue().encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk alumni import benchmark")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--username", required=True, help="admin username")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--register-sample", type=int, default=200,
+                        help="alumni registered one by one for comparison (0 to skip)")
+    parser.add_argument("--keep", action="store_true", help="keep the imported rows")
+    args = parser.parse_args()
+
+    token = login(args.base_url, args.username, args.password)
+    client = Client(args.base_url, token, timeout=600)
+    prefix = f"bench_{uuid.uuid4().hex[:8]}"
+
+    payload = generate(args.count, prefix, args.format)
+    body, content_type = multipart("file", f"alumni.{args.format}", payload, "application/octet-stream")
+    start = time.perf_counter()
+    status, _, data = client.request("POST", f"/api/admin/alumni/import?format={args.format}", body=body,
+                                     headers={"Content-Type": content_type})
+    elapsed = time.perf_counter() - start
+    if status != 200:
+        raise RuntimeError(f"Import failed: {status} {data[:500]!r}")
+    report = json.loads(data)
+    print(f"import: {report['imported']} alumni in {elapsed:.2f}s "
+          f"({report['imported'] / elapsed:,.0f} rows/s), {report['failed']} failed")
+
+    register = None
+    if args.register_sample:
+        anonymous = Client(args.base_url)
+        latencies = []
+        for i in range(args.register_sample):
+            user = {"username": f"{prefix}_r{i}", "email": f"{prefix}_r{i}@example.com",
+                    "password": "benchmark-password", "full_name": "Register Sample",
+                    "education": {"degree": "Bachelor of Science", "department": "Physics",
+                                  "start_year": 2016, "end_year": 2020}}
+            elapsed_ms, (status, _, _) = timed(anonymous.request, "POST", "/api/auth/register", body=user)
+            latencies.append(elapsed_ms)
+        anonymous.close()
+        register = summarize(latencies)
+        per_row_s = register["mean_ms"] / 1000
+        register["projected_seconds_for_count"] = round(per_row_s * args.count, 1)
+        print(f"register: mean {register['mean_ms']:.2f}ms per alumni, "
+              f"~{register['projected_seconds_for_count']:,.0f}s for {args.count} sequentially")
+
+    client.close()
+    if not args.keep:
+        conn = connect()
+        try:
+            print(f"Removed {cleanup(conn, prefix)} users")
+        finally:
+            conn.close()
+
+    print(json.dumps({
+        "benchmark": "bulk_import",
+        "format": args.format,
+        "rows": args.count,
+        "payload_bytes": len(payload),
+        "import_seconds": round(elapsed, 3),
+        "rows_per_sec": round(report["imported"] / elapsed, 1) if elapsed else None,
+        "report": {key: value for key, value in report.items() if key != "errors"},
+        "register_one_by_one": register,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import http.client
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared helpers for the scripts in benchmarks/. The HTTP helpers only use the
+# standard library so they can run from any machine that can reach the API.
+
+DEFAULT_BASE_URL = os.getenv("BENCH_BASE_URL", "http://127.0.0.1:8000")
+
+# Make the application packages importable for benchmarks that call services
+# directly instead of going through HTTP
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def connect():
+    # Direct (unpooled) connection with the same settings as the app
+    import psycopg2
+    from psycopg2.extras import RealDictCursor
+    from config.main import DB_CONFIG
+    return psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(samples_ms):
+    return {
+        "count": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 3) if samples_ms else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p90_ms": round(percentile(samples_ms, 90), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "max_ms": round(max(samples_ms), 3) if samples_ms else 0.0,
+    }
+
+
+class Client:
+    # Keep-alive HTTP client; one instance per benchmark thread
+    def __init__(self, base_url=DEFAULT_BASE_URL, token=None, timeout=60):
+        parsed = urllib.parse.urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.token = token
+        self.timeout = timeout
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self._conn
+
+    def request(self, method, path, body=None, headers=None, form=None):
+        headers = dict(headers or {})
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        payload = None
+        if form is not None:
+            payload = urllib.parse.urlencode(form)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif body is not None:
+            payload = body if isinstance(body, (bytes, str)) else json.dumps(body)
+            headers.setdefault("Content-Type", "application/json")
+        try:
+            conn = self._connection()
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            self.close()
+            raise
+        return response.status, response.getheaders(), data
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def multipart(field, filename, content, content_type):
+    # Single-file multipart/form-data body and its Content-Type header
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def login(base_url, username, password):
+    client = Client(base_url)
+    status, _, data = client.request("POST", "/api/auth/login", form={"username": username, "password": password})
+    client.close()
+    if status != 200:
+        raise RuntimeError(f"Login failed for {username}: {status} {data[:200]!r}")
+    return json.loads(data)["access_token"]
+
+
+def run_closed_loop(make_request, concurrency, duration, base_url=DEFAULT_BASE_URL, token=None):
+    # Each worker sends requests back to back for `duration` seconds and
+    # records per-request latency. make_request(client, worker_index) returns
+    # the HTTP status.
+    deadline = time.perf_counter() + duration
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(index):
+        client = Client(base_url, token)
+        local = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status = make_request(client, index)
+            except Exception:
+                status = None
+            local.append((time.perf_counter() - start) * 1000)
+            if status is None or status >= 400:
+                local_errors += 1
+        client.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies)
+    result["concurrency"] = concurrency
+    result["errors"] = errors[0]
+    result["requests_per_sec"] = round(len(latencies) / elapsed, 2) if elapsed else 0.0
+    return result
@@ -0,0 +1,41 @@
+import argparse
+import json
+
+from common import DEFAULT_BASE_URL, login, run_closed_loop
+
+# Measures requests/sec on GET /api/alumni/profile as the number of concurrent
+# clients grows. Run it against a single uvicorn worker before and after a
+# change to see whether the worker keeps several requests in flight:
+#
+#   uvicorn api.main:app --workers 1
+#   python benchmarks/concurrency.py --username dharshan --password 12345678
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency scaling benchmark")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--path", default="/api/alumni/profile")
+    parser.add_argument("--levels", default="1,2,4,8,16,32")
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    token = login(args.base_url, args.username, args.password)
+
+    def request(client, index):
+        status, _, _ = client.request("GET", args.path)
+        return status
+
+    results = []
+    for level in [int(value) for value in args.levels.split(",")]:
+        result = run_closed_loop(request, level, args.duration, args.base_url, token)
+        results.append(result)
+        print(f"concurrency={level:3d}  rps={result['requests_per_sec']:9.2f}  "
+              f"p50={result['p50_ms']:8.2f}ms  p99={result['p99_ms']:8.2f}ms  errors={result['errors']}")
+
+    print(json.dumps({"benchmark": "concurrency", "path": args.path, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import argparse
+import json
+import sys
+
+from common import connect
+from psycopg2.extensions import cursor as TupleCursor
+
+from services.facets import ALUMNI_FACET_QUERY, FACET_QUERY
+from services.exports import CSV_EXPORT_QUERY
+from services.main import (
+    ALUMNI_BATCH_CHILDREN, ALUMNI_FIELDS, PROFILE_CHILD_TABLES, PROFILE_JSON_QUERY, UPDATE_ALUMNI_PROFILE_QUERY,
+    _alumni_list_columns, _alumni_list_select, build_alumni_filter, filter_alumni_query
+)
+from services.search import SEARCH_QUERY, SEARCH_SIMILARITY_THRESHOLD
+
+# Index advisor: runs the statements the services issue under
+# EXPLAIN (ANALYZE, BUFFERS) with parameters taken from the database, and flags
+# every sequential scan over a table with at least --min-rows rows. Statements
+# that read a whole table by design (exact counts, the facet rebuild) are
+# reported but not flagged. Each statement runs in a transaction that is
+# rolled back, so the writes among them change nothing. Exits with status 1
+# when anything is flagged. Use a realistically sized dataset; on a handful of
+# rows the planner rightly prefers sequential scans.
+#
+#   python benchmarks/generate.py --size 100k
+#   python benchmarks/explain_queries.py
+
+
+def sample_values(cursor):
+    # Parameters from a mid-table alumni that has both jobs and education
+    cursor.execute("""
+        SELECT j.alumni_id, j.job_id, j.company_name, j.position
+        FROM jobs j
+        ORDER BY j.job_id
+        OFFSET (SELECT COUNT(*) / 2 FROM jobs) LIMIT 1
+    """)
+    row = cursor.fetchone()
+    if row is None:
+        raise SystemExit("No jobs in the database; load a dataset first (benchmarks/generate.py)")
+    alumni_id, job_id, company_name, position = row
+    cursor.execute("""
+        SELECT a.user_id, u.username, a.full_name, a.current_location,
+               e.education_id, e.department, e.end_year, e.start_year, e.degree
+        FROM alumni a
+        JOIN users u ON a.user_id = u.user_id
+        JOIN education e ON e.alumni_id = a.alumni_id
+        WHERE a.alumni_id = %s
+        ORDER BY e.education_id LIMIT 1
+    """, (alumni_id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise SystemExit(f"Alumni {alumni_id} has no education rows; load a dataset from benchmarks/generate.py")
+    (user_id, username, full_name, location,
+     education_id, department, end_year, start_year, degree) = row
+    cursor.execute("SELECT profile_image FROM alumni WHERE profile_image IS NOT NULL LIMIT 1")
+    image = cursor.fetchone()
+    cursor.execute("SELECT alumni_id FROM alumni ORDER BY alumni_id LIMIT 50")
+    return {
+        "alumni_id": alumni_id, "user_id": user_id, "username": username, "job_id": job_id,
+        "education_id": education_id, "full_name": full_name.split()[0], "location": location or "",
+        "company_name": company_name, "position": position, "department": department,
+        "end_year": end_year, "start_year": start_year, "degree": degree,
+        "profile_image": image[0] if image else "none.jpg",
+        "batch_ids": [row[0] for row in cursor.fetchall()],
+    }
+
+
+def service_queries(v):
+    # (name, query, params, setup statements, whole-table read expected)
+    columns = _alumni_list_columns(None)
+    list_query = "SELECT " + _alumni_list_select(columns, ("full_name", "alumni_id")) + """
+        FROM alumni a
+        JOIN users u ON a.user_id = u.user_id
+    """
+    queries = [
+        ("auth.login", "SELECT user_id, username, password, is_alumni FROM users WHERE username = %s",
+         (v["username"],), (), False),
+        ("auth.login_alumni", "SELECT alumni_id FROM alumni WHERE user_id = %s", (v["user_id"],), (), False),
+        ("auth.login_admin", "SELECT admin_id FROM admin WHERE user_id = %s", (v["user_id"],), (), False),
+        ("alumni.profile", PROFILE_JSON_QUERY, (v["alumni_id"],), (), False),
+        ("alumni.update_basic", UPDATE_ALUMNI_PROFILE_QUERY,
+         {"alumni_id": v["alumni_id"], "basic": json.dumps({"bio": "explain"})}, (), False),
+        ("alumni.delete_education",
+         "DELETE FROM education WHERE education_id = %s AND alumni_id = %s",
+         (v["education_id"], v["alumni_id"]), (), False),
+        ("alumni.delete_job", "DELETE FROM jobs WHERE job_id = %s AND alumni_id = %s",
+         (v["job_id"], v["alumni_id"]), (), False),
+        ("images.current", "SELECT profile_image FROM alumni WHERE alumni_id = %s", (v["alumni_id"],), (), False),
+        ("images.refcount", "SELECT COUNT(*) AS refcount FROM alumni WHERE profile_image = %s",
+         (v["profile_image"],), (), False),
+        ("admin.list_count_exact", "SELECT COUNT(*) as total FROM alumni", None, (), True),
+        ("admin.list_page", list_query + " ORDER BY a.full_name, a.alumni_id LIMIT %s OFFSET %s", (51, 0), (), False),
+        ("admin.list_keyset",
+         list_query + " WHERE (a.full_name, a.alumni_id) > (%s, %s) ORDER BY a.full_name, a.alumni_id LIMIT %s",
+         (v["full_name"], v["alumni_id"], 51), (), False),
+        ("admin.batch", "SELECT " + ", ".join(f"{ALUMNI_FIELDS[c]} AS {c}" for c in ALUMNI_FIELDS)
+         + " FROM alumni a JOIN users u ON a.user_id = u.user_id WHERE a.alumni_id = ANY(%s)",
+         (v["batch_ids"],), (), False),
+        ("admin.delete_alumni", "DELETE FROM users WHERE user_id = %s", (v["user_id"],), (), False),
+        ("facets.rebuild", FACET_QUERY, None, (), True),
+        ("facets.alumni", ALUMNI_FACET_QUERY, {"alumni_id": v["alumni_id"]}, (), False),
+        ("search", SEARCH_QUERY, {"term": v["company_name"].lower(), "limit": 20, "offset": 0},
+         [("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+           (str(SEARCH_SIMILARITY_THRESHOLD),))], False),
+    ]
+    for child, query in ALUMNI_BATCH_CHILDREN.items():
+        queries.append((f"admin.batch_{child}", query, (v["batch_ids"],), (), False))
+    for table, spec in PROFILE_CHILD_TABLES.items():
+        key_value = v["job_id"] if table == "jobs" else v["education_id"]
+        queries.append((f"alumni.update_{table}", spec["query"],
+                        {"alumni_id": v["alumni_id"], "delete": [key_value], "update": "[]", "insert": "[]"},
+                        (), False))
+
+    # Every filter on its own plus the combinations the UI sends most
+    filter_sets = [{key: v[key]} for key in ("full_name", "location", "department", "end_year",
+                                              "start_year", "degree", "company_name", "position")]
+    filter_sets += [
+        {"availability_for_mentorship": True},
+        {"cgpa": 3.5},
+        {"department": v["department"], "end_year": v["end_year"]},
+        {"company_name": v["company_name"], "position": v["position"]},
+        {"department": v["department"], "company_name": v["company_name"]},
+    ]
+    for filters in filter_sets:
+        query, params = filter_alumni_query(columns, filters, 51, 0)
+        queries.append((f"admin.filter[{','.join(filters)}]", query, params, (), False))
+    where, params = build_alumni_filter({"department": v["department"]})
+    queries.append(("exports.csv[department]", CSV_EXPORT_QUERY.format(where=where), params, (), False))
+    return queries
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def explain(conn, query, params, setup, table_rows, min_rows):
+    cursor = conn.cursor(cursor_factory=TupleCursor)
+    try:
+        for statement, statement_params in setup:
+            cursor.execute(statement, statement_params)
+        cursor.execute(b"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + cursor.mogrify(query, params))
+        plan = cursor.fetchone()[0][0]
+    finally:
+        conn.rollback()
+
+    nodes, seq_scans = [], []
+    for node in plan_nodes(plan["Plan"]):
+        relation = node.get("Relation Name")
+        label = node["Node Type"]
+        if relation:
+            label += f" on {relation}"
+        if node.get("Index Name"):
+            label += f" using {node['Index Name']}"
+        nodes.append(label)
+        if node["Node Type"] == "Seq Scan" and table_rows.get(relation, 0) >= min_rows:
+            seq_scans.append({
+                "table": relation,
+                "table_rows": table_rows[relation],
+                "rows": node.get("Actual Rows", 0) * node.get("Actual Loops", 1),
+                "rows_removed": node.get("Rows Removed by Filter", 0) * node.get("Actual Loops", 1),
+                "filter": node.get("Filter"),
+            })
+    result = {"execution_ms": round(plan["Execution Time"], 3), "nodes": nodes, "seq_scans": seq_scans}
+    if plan.get("Triggers"):
+        # Cascades and search refreshes run in triggers, outside the plan tree
+        result["triggers_ms"] = {trigger["Trigger Name"]: round(trigger["Time"], 3) for trigger in plan["Triggers"]}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag sequential scans in the service queries")
+    parser.add_argument("--min-rows", type=int, default=1000,
+                        help="only flag scans of tables with at least this many rows")
+    parser.add_argument("--skip-analyze", action="store_true", help="do not refresh planner statistics first")
+    parser.add_argument("--only", help="run only queries whose name contains this")
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        if not args.skip_analyze:
+            conn.autocommit = True
+            conn.cursor().execute("ANALYZE")
+            conn.autocommit = False
+
+        cursor = conn.cursor(cursor_factory=TupleCursor)
+        cursor.execute("""
+            SELECT relname, reltuples::bigint FROM pg_class
+            WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace
+        """)
+        table_rows = dict(cursor.fetchall())
+        values = sample_values(cursor)
+        conn.rollback()
+
+        results = []
+        for name, query, params, setup, full_scan in service_queries(values):
+            if args.only and args.only not in name:
+                continue
+            try:
+                result = explain(conn, query, params, setup, table_rows, args.min_rows)
+            except Exception as e:
+                results.append({"query": name, "error": str(e), "flagged": True})
+                continue
+            result["flagged"] = bool(result["seq_scans"]) and not full_scan
+            if full_scan:
+                result["full_scan_expected"] = True
+            results.append({"query": name, **result})
+    finally:
+        conn.close()
+
+    flagged = [result["query"] for result in results if result["flagged"]]
+    for result in results:
+        mark = "FLAG" if result["flagged"] else "ok"
+        detail = result.get("error") or ", ".join(
+            f"seq scan on {scan['table']} ({scan['rows_removed']:,} rows filtered)" for scan in result["seq_scans"]
+        ) or "indexed"
+        timing = f"{result['execution_ms']:9.2f} ms" if "execution_ms" in result else " " * 12
+        print(f"{mark:<4}  {timing}  {result['query']:<48} {detail}", file=sys.stderr)
+
+    print(json.dumps({
+        "benchmark": "explain_queries",
+        "min_rows": args.min_rows,
+        "tables": table_rows,
+        "flagged": flagged,
+        "queries": results,
+    }, indent=2, default=str))
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import json
+import time
+import urllib.parse
+
+from common import DEFAULT_BASE_URL, Client, login
+
+# Streams /api/admin/alumni/export and reports time to first byte, total time
+# and throughput. Watch the server's RSS while it runs: it should stay flat
+# however many rows are exported (seed a large directory with seed.py first).
+#
+#   python benchmarks/export.py --username dharshankumar --password 12345678 --format ndjson
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming export benchmark")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--username", required=True, help="admin username")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--filter", action="append", default=[], metavar="KEY=VALUE",
+                        help="filter criteria, as for /api/admin/alumni/filter")
+    args = parser.parse_args()
+
+    token = login(args.base_url, args.username, args.password)
+    client = Client(args.base_url, token, timeout=600)
+    query = urllib.parse.urlencode([("format", args.format), *(f.split("=", 1) for f in args.filter)])
+
+    conn = client._connection()
+    start = time.perf_counter()
+    conn.request("GET", f"/api/admin/alumni/export?{query}", headers={"Authorization": f"Bearer {token}"})
+    response = conn.getresponse()
+    if response.status != 200:
+        raise RuntimeError(f"Export failed: {response.status} {response.read()[:200]!r}")
+
+    first_byte = None
+    total_bytes = 0
+    lines = 0
+    while True:
+        chunk = response.read1(256 * 1024)
+        if not chunk:
+            break
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        total_bytes += len(chunk)
+        lines += chunk.count(b"\n")
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    # CSV fields with embedded newlines make the CSV count approximate
+    rows = lines - 1 if args.format == "csv" else lines
+    print(json.dumps({
+        "benchmark": "export",
+        "format": args.format,
+        "rows": rows,
+        "bytes": total_bytes,
+        "time_to_first_byte_ms": round((first_byte or elapsed) * 1000, 3),
+        "total_seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed else None,
+        "mb_per_sec": round(total_bytes / elapsed / 1e6, 2) if elapsed else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
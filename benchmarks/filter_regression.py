@@ -0,0 +1,140 @@
+import argparse
+import itertools
+import json
+import sys
+
+from common import connect, summarize, timed
+
+from services.main import AdminService
+
+# Regression check for AdminService.filter_alumni: runs the original
+# DISTINCT-over-LEFT-JOIN query and the EXISTS-based builder for every
+# combination of filters (up to --max-filters at a time) built from values in
+# the database, and fails if any result set differs. Also reports latency of
+# both. Run against a seeded database (see benchmarks/seed.py).
+
+
+def legacy_filter_alumni(conn, filters):
+    # The implementation prior to the semi-join rewrite, verbatim
+    cursor = conn.cursor()
+    query = """
+        SELECT DISTINCT a.*, u.email, u.username
+        FROM alumni a
+        JOIN users u ON a.user_id = u.user_id
+    """
+    education_filters = ["department", "end_year", "start_year", "cgpa", "degree"]
+    job_filters = ["company_name", "position"]
+    if any(f in filters for f in education_filters):
+        query += " LEFT JOIN education e ON e.alumni_id = a.alumni_id"
+    if any(f in filters for f in job_filters):
+        query += " LEFT JOIN jobs j ON j.alumni_id = a.alumni_id"
+    query += " WHERE 1=1"
+    params = []
+    if "full_name" in filters and filters["full_name"]:
+        query += " AND a.full_name ILIKE %s"
+        params.append(f"%{filters['full_name']}%")
+    if "location" in filters and filters["location"]:
+        query += " AND a.current_location ILIKE %s"
+        params.append(f"%{filters['location']}%")
+    if "availability_for_mentorship" in filters:
+        query += " AND a.availability_for_mentorship = %s"
+        params.append(filters["availability_for_mentorship"])
+    for key, clause in (("department", "e.department = %s"), ("end_year", "e.end_year = %s"),
+                        ("start_year", "e.start_year = %s"), ("cgpa", "e.cgpa >= %s"),
+                        ("degree", "e.degree = %s")):
+        if key in filters:
+            query += f" AND {clause}"
+            params.append(filters[key])
+    if "company_name" in filters:
+        query += " AND j.company_name ILIKE %s"
+        params.append(f"%{filters['company_name']}%")
+    if "position" in filters:
+        query += " AND j.position ILIKE %s"
+        params.append(f"%{filters['position']}%")
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    conn.rollback()
+    return rows
+
+
+def new_filter_alumni(filters, per_page=500):
+    rows = []
+    page = 1
+    while True:
+        result = AdminService.filter_alumni(filters, page, per_page)
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        rows.extend(result["data"])
+        if not result["has_more"]:
+            return rows
+        page += 1
+
+
+def candidate_values(conn):
+    cursor = conn.cursor()
+
+    def first(sql):
+        cursor.execute(sql)
+        row = cursor.fetchone()
+        return list(row.values())[0] if row else None
+
+    values = {
+        "department": first("SELECT department FROM education GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1"),
+        "degree": first("SELECT degree FROM education GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1"),
+        "end_year": first("SELECT end_year FROM education GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1"),
+        "start_year": first("SELECT start_year FROM education GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1"),
+        "cgpa": 3.5,
+        "company_name": first("SELECT company_name FROM jobs GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1"),
+        "position": first("SELECT position FROM jobs GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1"),
+        "full_name": "a",
+        "location": first("SELECT current_location FROM alumni WHERE current_location IS NOT NULL LIMIT 1"),
+        "availability_for_mentorship": True,
+    }
+    conn.rollback()
+    return {key: value for key, value in values.items() if value is not None}
+
+
+def normalize(rows):
+    return sorted((json.dumps(dict(row), sort_keys=True, default=str) for row in rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="filter_alumni regression check")
+    parser.add_argument("--max-filters", type=int, default=3)
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        values = candidate_values(conn)
+        failures = []
+        legacy_ms = []
+        new_ms = []
+        combinations = 0
+
+        for size in range(0, args.max_filters + 1):
+            for keys in itertools.combinations(sorted(values), size):
+                filters = {key: values[key] for key in keys}
+                elapsed, old_rows = timed(legacy_filter_alumni, conn, filters)
+                legacy_ms.append(elapsed)
+                elapsed, new_rows = timed(new_filter_alumni, filters)
+                new_ms.append(elapsed)
+                combinations += 1
+                if normalize(old_rows) != normalize(new_rows):
+                    failures.append({"filters": filters, "legacy": len(old_rows), "new": len(new_rows)})
+
+        print(json.dumps({
+            "benchmark": "filter_regression",
+            "combinations": combinations,
+            "failures": failures,
+            "legacy": summarize(legacy_ms),
+            "semi_join": summarize(new_ms),
+        }, indent=2, default=str))
+    finally:
+        conn.close()
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import csv
+import datetime
+import io
+import json
+import random
+import time
+import uuid
+
+from common import connect
+from psycopg2.extensions import cursor as TupleCursor
+from seed import cleanup
+
+from config.passwords import hash_password
+
+# Synthetic datasets at realistic scale, bulk loaded with COPY. Every account
+# gets the same known password so load tests can log in as any of them, and
+# every username starts with the run prefix so the dataset can be removed
+# again with --cleanup. A JSON manifest describes the dataset for loadtest.py.
+#
+#   python benchmarks/generate.py --size 100k --manifest dataset.json
+#   python benchmarks/generate.py --cleanup gen_1a2b3c4d
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# (value, weight) tables; a few common values dominate, as in a real directory
+DEPARTMENTS = [("Computer Science", 30), ("Information Technology", 18), ("Electrical Engineering", 15),
+               ("Mechanical Engineering", 14), ("Civil Engineering", 10), ("Mathematics", 7), ("Physics", 6)]
+UNDERGRAD_DEGREES = [("Bachelor of Technology", 55), ("Bachelor of Engineering", 25), ("Bachelor of Science", 20)]
+POSTGRAD_DEGREES = [("Master of Technology", 40), ("Master of Science", 45), ("MBA", 15)]
+INSTITUTIONS = [("Our College", 70), ("IIT Madras", 8), ("Anna University", 8), ("Stanford University", 4),
+                ("MIT", 3), ("Carnegie Mellon University", 4), ("University of Toronto", 3)]
+COMPANIES = [("TCS", 16), ("Infosys", 14), ("Wipro", 11), ("Cognizant", 9), ("Zoho", 7), ("Freshworks", 5),
+             ("Amazon", 8), ("Microsoft", 7), ("Google", 6), ("Accenture", 8), ("IBM", 4), ("Apple", 2),
+             ("Flipkart", 3), ("Swiggy", 2), ("Self-employed", 2)]
+POSITIONS = [("Software Engineer", 30), ("Senior Software Engineer", 18), ("Associate Engineer", 12),
+             ("Data Scientist", 7), ("Data Analyst", 6), ("Product Manager", 5), ("Engineering Manager", 5),
+             ("UX Designer", 3), ("DevOps Engineer", 6), ("QA Engineer", 5), ("Architect", 3)]
+CITIES = [("Chennai", 28), ("Bangalore", 24), ("Hyderabad", 12), ("Pune", 8), ("Mumbai", 7), ("Coimbatore", 6),
+          ("Delhi", 5), ("Seattle", 3), ("San Francisco", 2), ("London", 2), ("Singapore", 2), ("Dubai", 1)]
+FIRST_NAMES = ["Arun", "Priya", "Karthik", "Divya", "Rahul", "Sneha", "Vijay", "Lakshmi", "Suresh", "Anitha",
+               "Rajesh", "Deepa", "Ganesh", "Kavya", "Manoj", "Meena", "Naveen", "Pooja", "Ramesh", "Swathi",
+               "John", "Jane", "Mike", "Sarah"]
+LAST_NAMES = ["Kumar", "Raman", "Iyer", "Sharma", "Nair", "Reddy", "Krishnan", "Subramanian", "Pillai",
+              "Menon", "Rao", "Gupta", "Patel", "Srinivasan", "Doe", "Smith"]
+
+
+class Weighted:
+    def __init__(self, table):
+        self.values = [value for value, _ in table]
+        self.cum_weights = []
+        total = 0
+        for _, weight in table:
+            total += weight
+            self.cum_weights.append(total)
+
+    def pick(self, rng):
+        return rng.choices(self.values, cum_weights=self.cum_weights)[0]
+
+
+DEPARTMENT = Weighted(DEPARTMENTS)
+UNDERGRAD = Weighted(UNDERGRAD_DEGREES)
+POSTGRAD = Weighted(POSTGRAD_DEGREES)
+INSTITUTION = Weighted(INSTITUTIONS)
+COMPANY = Weighted(COMPANIES)
+POSITION = Weighted(POSITIONS)
+CITY = Weighted(CITIES)
+# Later cohorts are larger
+THIS_YEAR = datetime.date.today().year
+GRADUATION_YEAR = Weighted([(year, year - 1985) for year in range(1990, THIS_YEAR)])
+
+
+def generate_alumni(rng, alumni_id, this_year=THIS_YEAR):
+    # One alumni's row plus education and job rows, as lists for COPY
+    graduation_year = GRADUATION_YEAR.pick(rng)
+    department = DEPARTMENT.pick(rng)
+    cgpa = round(min(4.0, max(2.0, rng.gauss(3.2, 0.45))), 2)
+    education = [[alumni_id, UNDERGRAD.pick(rng), department, "Our College",
+                  graduation_year - 4, graduation_year, None, cgpa]]
+    if rng.random() < 0.3:
+        start = graduation_year + rng.randint(0, 4)
+        if start + 2 <= this_year:
+            education.append([alumni_id, POSTGRAD.pick(rng), department, INSTITUTION.pick(rng),
+                              start, start + 2, None, round(min(4.0, max(2.0, rng.gauss(3.4, 0.35))), 2)])
+
+    # About one job change every three years since graduation, at most eight
+    jobs = []
+    year = education[-1][5]
+    job_count = min(8, int(rng.expovariate(1 / max(1.0, (this_year - year) / 3))) + 1)
+    if rng.random() < 0.08:
+        job_count = 0  # not working or never updated their profile
+    for index in range(job_count):
+        if year > this_year:
+            break
+        start = f"{year}-{rng.randint(1, 12):02d}-01"
+        length = rng.randint(1, 5)
+        last = index == job_count - 1 or year + length > this_year
+        current = last and rng.random() < 0.85
+        end = None if current else f"{min(this_year, year + length)}-{rng.randint(1, 12):02d}-28"
+        if end is not None and end < start:
+            end = start
+        jobs.append([alumni_id, COMPANY.pick(rng), POSITION.pick(rng), CITY.pick(rng), start, end, current, None])
+        year += length
+        if last:
+            break
+
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    bio = f"{jobs[-1][2]} at {jobs[-1][1]}, {department} class of {graduation_year}." if jobs else None
+    return [name, bio if rng.random() < 0.7 else None, CITY.pick(rng), graduation_year,
+            rng.random() < 0.25], education, jobs
+
+
+def _csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if value is None else value for value in row])
+    buffer.seek(0)
+    return buffer
+
+
+def _reserve_ids(cursor, table, column, count):
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+        (table, column, count)
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def generate(conn, count, prefix, password_hash, batch_size=20_000, seed=0):
+    # Loads `count` alumni in batches; each batch is one transaction with the
+    # per-row search triggers deferred and one set-wise search refresh
+    rng = random.Random(f"{prefix}:{seed}")
+    cursor = conn.cursor(cursor_factory=TupleCursor)
+    totals = {"alumni": 0, "education": 0, "jobs": 0}
+
+    for offset in range(0, count, batch_size):
+        size = min(batch_size, count - offset)
+        user_ids = _reserve_ids(cursor, "users", "user_id", size)
+        alumni_ids = _reserve_ids(cursor, "alumni", "alumni_id", size)
+
+        users, alumni, education, jobs = [], [], [], []
+        for i, (user_id, alumni_id) in enumerate(zip(user_ids, alumni_ids)):
+            username = f"{prefix}_{offset + i}"
+            users.append([user_id, username, password_hash, f"{username}@example.com", True])
+            row, alumni_education, alumni_jobs = generate_alumni(rng, alumni_id)
+            alumni.append([alumni_id, user_id, *row])
+            education.extend(alumni_education)
+            jobs.extend(alumni_jobs)
+
+        cursor.execute("SELECT set_config('alumni_search.deferred', 'on', true)")
+        cursor.copy_expert("COPY users (user_id, username, password, email, is_alumni) "
+                           "FROM STDIN WITH (FORMAT csv)", _csv(users))
+        cursor.copy_expert("COPY alumni (alumni_id, user_id, full_name, bio, current_location, graduation_year, "
+                           "availability_for_mentorship) FROM STDIN WITH (FORMAT csv)", _csv(alumni))
+        cursor.copy_expert("COPY education (alumni_id, degree, department, institution, start_year, end_year, "
+                           "achievements, cgpa) FROM STDIN WITH (FORMAT csv)", _csv(education))
+        cursor.copy_expert("COPY jobs (alumni_id, company_name, position, location, start_date, end_date, "
+                           "is_current, description) FROM STDIN WITH (FORMAT csv)", _csv(jobs))
+        cursor.execute("SELECT refresh_alumni_search_many(%s)", (alumni_ids,))
+        conn.commit()
+
+        totals["alumni"] += len(alumni)
+        totals["education"] += len(education)
+        totals["jobs"] += len(jobs)
+        print(f"{totals['alumni']:>9,} / {count:,} alumni")
+
+    conn.autocommit = True
+    cursor.execute("ANALYZE users, alumni, education, jobs, alumni_search")
+    conn.autocommit = False
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic alumni dataset")
+    parser.add_argument("--size", choices=sorted(SIZES), default="10k")
+    parser.add_argument("--count", type=int, help="alumni to generate (overrides --size)")
+    parser.add_argument("--prefix", help="username prefix (default: random)")
+    parser.add_argument("--password", default="loadtest-password", help="password of every generated account")
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0, help="random seed; the same seed and prefix give the same data")
+    parser.add_argument("--manifest", default="dataset.json", help="where to write the dataset manifest")
+    parser.add_argument("--cleanup", metavar="PREFIX", help="delete a generated dataset instead")
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        if args.cleanup:
+            print(f"Deleted {cleanup(conn, args.cleanup)} users")
+            return
+
+        count = args.count or SIZES[args.size]
+        prefix = args.prefix or f"gen_{uuid.uuid4().hex[:8]}"
+        start = time.perf_counter()
+        totals = generate(conn, count, prefix, hash_password(args.password), args.batch_size, args.seed)
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+
+    manifest = {
+        "benchmark": "generate",
+        "prefix": prefix,
+        "password": args.password,
+        "seed": args.seed,
+        "rows": totals,
+        "seconds": round(elapsed, 3),
+        "alumni_per_sec": round(totals["alumni"] / elapsed, 1) if elapsed else None,
+    }
+    with open(args.manifest, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
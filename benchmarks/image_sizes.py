@@ -0,0 +1,68 @@
+import argparse
+import io
+import json
+import random
+
+from common import DEFAULT_BASE_URL, Client, login, multipart, summarize, timed
+
+# Uploads a phone-sized photo for an alumni account, then fetches it at every
+# size and reports bytes served and latency per size.
+#
+#   python benchmarks/image_sizes.py --username dharshan --password 12345678
+
+
+def synthetic_photo(width=4000, height=3000):
+    # Noisy gradient so the JPEG does not compress to almost nothing
+    from PIL import Image
+    rng = random.Random(0)
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    noise = Image.effect_noise((width, height), 40).convert("RGB")
+    image = Image.blend(image, noise, 0.3)
+    for _ in range(200):
+        x, y = rng.randrange(width), rng.randrange(height)
+        image.paste((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (x, y, x + 80, y + 80))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=92)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile image size benchmark")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    token = login(args.base_url, args.username, args.password)
+    client = Client(args.base_url, token)
+
+    _, _, data = client.request("GET", "/api/alumni/profile")
+    alumni_id = json.loads(data)["alumni_id"]
+
+    photo = synthetic_photo()
+    body, content_type = multipart("file", "photo.jpg", photo, "image/jpeg")
+    status, _, data = client.request("POST", "/api/alumni/profile/image", body=body,
+                                     headers={"Content-Type": content_type})
+    if status != 200:
+        raise RuntimeError(f"Upload failed: {status} {data[:200]!r}")
+
+    results = {}
+    for size in ("original", "medium", "small", "thumb"):
+        path = f"/api/alumni/profile/image/{alumni_id}?size={size}"
+        # First request may render the derivative
+        first_ms, _ = timed(client.request, "GET", path)
+        latencies = []
+        for _ in range(args.requests):
+            elapsed, (_, _, payload) = timed(client.request, "GET", path)
+            latencies.append(elapsed)
+        results[size] = {"bytes": len(payload), "first_request_ms": round(first_ms, 3), **summarize(latencies)}
+        print(f"{size:<9} {len(payload):>10} bytes  p50={results[size]['p50_ms']:7.2f}ms  "
+              f"p99={results[size]['p99_ms']:7.2f}ms")
+
+    client.close()
+    print(json.dumps({"benchmark": "image_sizes", "upload_bytes": len(photo), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import json
+
+from common import connect, summarize, timed
+from seed import cleanup, seed
+
+from fastapi.encoders import jsonable_encoder
+from api.compression import COMPRESSORS
+from api.responses import _dumps_orjson, _dumps_stdlib, orjson
+from services.main import ALUMNI_BATCH_MAX_IDS, AdminService
+
+# Encode time and bytes on the wire for large admin payloads (get_all_alumni
+# and filter_alumni pages, and a batch read whose education entries carry
+# Decimal cgpa values): FastAPI's default jsonable_encoder + json.dumps path
+# against FastJSONResponse's encoders, then the encoded body with each
+# supported Content-Encoding.
+
+
+def legacy_encode(content):
+    return json.dumps(jsonable_encoder(content)).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON encode and compression benchmark")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded rows")
+    args = parser.parse_args()
+
+    encoders = {"jsonable_encoder+json": legacy_encode, "stdlib": _dumps_stdlib}
+    if orjson is not None:
+        encoders["orjson"] = _dumps_orjson
+
+    conn = connect()
+    prefix, ids = seed(conn, args.rows, education_per_alumni=1, jobs_per_alumni=1)
+    try:
+        payloads = {
+            "get_all_alumni": AdminService.get_all_alumni(1, args.rows, total="none"),
+            "get_all_alumni_rows": AdminService.get_all_alumni(1, args.rows, total="none", row_format="rows"),
+            "filter_alumni": AdminService.filter_alumni({}, 1, args.rows),
+            "get_alumni_batch": AdminService.get_alumni_batch(ids[:ALUMNI_BATCH_MAX_IDS]),
+        }
+        results = {}
+        for name, payload in payloads.items():
+            if "error" in payload:
+                raise RuntimeError(payload["error"])
+            encode = {}
+            for encoder_name, encoder in encoders.items():
+                samples = [timed(encoder, payload) for _ in range(args.runs)]
+                body = samples[-1][1]
+                encode[encoder_name] = summarize([elapsed for elapsed, _ in samples])
+                print(f"{name:<20} {encoder_name:<22} p50={encode[encoder_name]['p50_ms']:8.2f}ms")
+
+            wire = {"identity": {"bytes": len(body)}}
+            for coding, compressor in COMPRESSORS.items():
+                samples = [timed(lambda: compressor().finish(body)) for _ in range(args.runs)]
+                wire[coding] = {"bytes": len(samples[-1][1]), **summarize([elapsed for elapsed, _ in samples])}
+                print(f"{name:<20} {coding:<22} p50={wire[coding]['p50_ms']:8.2f}ms  "
+                      f"bytes={wire[coding]['bytes']} of {len(body)}")
+            results[name] = {"encode": encode, "wire": wire}
+
+        print(json.dumps({"benchmark": "json_encode", "rows": args.rows, "results": results}, indent=2))
+    finally:
+        if not args.keep:
+            cleanup(conn, prefix)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import gc
+import json
+import tracemalloc
+
+from common import connect, summarize, timed
+from seed import cleanup, seed
+
+from fastapi.encoders import jsonable_encoder
+from services.main import AdminService
+
+# Memory and serialization cost of a 10k-row alumni list page, as returned by
+# AdminService.get_all_alumni: per-row dicts ("objects") against one shared
+# column header plus tuples ("rows"), each with all fields and with a sparse
+# fieldset. Serialization goes through jsonable_encoder and json.dumps, the
+# same path FastAPI's default response takes.
+
+SPARSE_FIELDS = ["full_name", "graduation_year", "current_location"]
+
+
+def fetch(rows, fields, row_format):
+    result = AdminService.get_all_alumni(1, rows, total="none", fields=fields, row_format=row_format)
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return result
+
+
+def retained_bytes(rows, fields, row_format):
+    # Bytes still allocated once the result is built, and the peak while
+    # building it
+    gc.collect()
+    tracemalloc.start()
+    result = fetch(rows, fields, row_format)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def serialize(result):
+    return json.dumps(jsonable_encoder(result)).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List row format benchmark")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded rows")
+    args = parser.parse_args()
+
+    conn = connect()
+    prefix, _ = seed(conn, args.rows, education_per_alumni=0, jobs_per_alumni=0)
+    try:
+        results = {}
+        for name, fields, row_format in (("objects", None, "objects"), ("rows", None, "rows"),
+                                         ("objects_sparse", SPARSE_FIELDS, "objects"),
+                                         ("rows_sparse", SPARSE_FIELDS, "rows")):
+            result, current, peak = retained_bytes(args.rows, fields, row_format)
+            fetched = [timed(fetch, args.rows, fields, row_format)[0] for _ in range(args.runs)]
+            encoded = [timed(serialize, result) for _ in range(args.runs)]
+            results[name] = {
+                "retained_bytes": current,
+                "peak_bytes": peak,
+                "response_bytes": len(encoded[-1][1]),
+                "fetch": summarize(fetched),
+                "serialize": summarize([elapsed for elapsed, _ in encoded]),
+            }
+            print(f"{name:<15} retained={current / 1e6:7.2f}MB  "
+                  f"fetch p50={results[name]['fetch']['p50_ms']:8.2f}ms  "
+                  f"serialize p50={results[name]['serialize']['p50_ms']:8.2f}ms  "
+                  f"bytes={results[name]['response_bytes']}")
+
+        print(json.dumps({"benchmark": "list_rows", "rows": args.rows, "results": results}, indent=2))
+    finally:
+        if not args.keep:
+            cleanup(conn, prefix)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
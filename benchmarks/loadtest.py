@@ -0,0 +1,269 @@
+import argparse
+import base64
+import datetime
+import json
+import random
+import subprocess
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from common import DEFAULT_BASE_URL, Client, login, multipart, summarize
+from generate import CITIES, COMPANIES, DEPARTMENTS, POSITIONS
+from image_sizes import synthetic_photo
+
+# Scripted workloads against a running API and a dataset from generate.py.
+# Each workload runs closed-loop for --duration seconds at --concurrency
+# clients after a --warmup period, and the run is written as one JSON report
+# (throughput, error count and latency percentiles per workload and per
+# operation). Pass an earlier report as --baseline to print the change.
+#
+#   python benchmarks/generate.py --size 100k --manifest dataset.json
+#   python benchmarks/loadtest.py --manifest dataset.json --admin-username dharshankumar \
+#       --admin-password 12345678 --output report.json
+
+# Relative weight of each operation in the "mixed" workload
+MIX = {"profile_read": 35, "filter": 20, "image": 20, "categories": 10, "profile_write": 10, "login": 5}
+WORKLOADS = [*MIX, "mixed"]
+IMAGE_SIZES = ["original", "medium", "small", "thumb"]
+
+
+def jwt_claims(token):
+    payload = token.split(".")[1]
+    return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+
+class Fixture:
+    # Accounts, tokens and images shared by all workers
+    def __init__(self, args, manifest):
+        self.base_url = args.base_url
+        self.prefix = manifest["prefix"]
+        self.password = manifest["password"]
+        self.alumni_count = manifest["rows"]["alumni"]
+        self.admin_token = login(args.base_url, args.admin_username, args.admin_password)
+
+        rng = random.Random(0)
+        usernames = [f"{self.prefix}_{i}" for i in rng.sample(range(self.alumni_count),
+                                                              min(args.accounts, self.alumni_count))]
+        self.accounts = []
+        for username in usernames:
+            token = login(args.base_url, username, self.password)
+            self.accounts.append((username, token, jwt_claims(token)["alumni_id"]))
+
+        # Profile images for a few of the accounts, fetched by the admin
+        photo = synthetic_photo(1600, 1200)
+        body, content_type = multipart("file", "photo.jpg", photo, "image/jpeg")
+        self.image_ids = []
+        for _, token, alumni_id in self.accounts[:args.images]:
+            client = Client(args.base_url, token)
+            status, _, data = client.request("POST", "/api/alumni/profile/image", body=body,
+                                             headers={"Content-Type": content_type})
+            client.close()
+            if status != 200:
+                raise RuntimeError(f"Image upload failed: {status} {data[:200]!r}")
+            self.image_ids.append(alumni_id)
+
+
+def _values(table):
+    return [value for value, _ in table]
+
+
+def op_login(client, fixture, rng):
+    client.token = None
+    username = f"{fixture.prefix}_{rng.randrange(fixture.alumni_count)}"
+    status, _, _ = client.request("POST", "/api/auth/login", form={"username": username, "password": fixture.password})
+    return status
+
+
+def op_profile_read(client, fixture, rng):
+    client.token = rng.choice(fixture.accounts)[1]
+    status, _, _ = client.request("GET", "/api/alumni/profile")
+    return status
+
+
+def op_profile_write(client, fixture, rng):
+    client.token = rng.choice(fixture.accounts)[1]
+    body = {"basic": {"bio": f"Load test edit {rng.randrange(1 << 30)}",
+                      "current_location": rng.choice(_values(CITIES))}}
+    status, _, _ = client.request("PUT", "/api/alumni/profile", body=body)
+    return status
+
+
+FILTERS = [
+    lambda rng: {"department": rng.choice(_values(DEPARTMENTS))},
+    lambda rng: {"company_name": rng.choice(_values(COMPANIES))},
+    lambda rng: {"position": rng.choice(_values(POSITIONS))},
+    lambda rng: {"location": rng.choice(_values(CITIES))},
+    lambda rng: {"department": rng.choice(_values(DEPARTMENTS)), "end_year": rng.randint(1995, 2024)},
+    lambda rng: {"company_name": rng.choice(_values(COMPANIES)), "position": rng.choice(_values(POSITIONS))},
+    lambda rng: {"availability_for_mentorship": "true", "location": rng.choice(_values(CITIES))},
+]
+
+
+def op_filter(client, fixture, rng):
+    client.token = fixture.admin_token
+    query = urllib.parse.urlencode(rng.choice(FILTERS)(rng))
+    status, _, _ = client.request("GET", f"/api/admin/alumni/filter?{query}")
+    return status
+
+
+def op_categories(client, fixture, rng):
+    client.token = fixture.admin_token
+    status, _, _ = client.request("GET", "/api/admin/filter-categories")
+    return status
+
+
+def op_image(client, fixture, rng):
+    client.token = fixture.admin_token
+    alumni_id = rng.choice(fixture.image_ids)
+    status, _, _ = client.request("GET", f"/api/alumni/profile/image/{alumni_id}?size={rng.choice(IMAGE_SIZES)}")
+    return status
+
+
+OPERATIONS = {
+    "login": op_login,
+    "profile_read": op_profile_read,
+    "profile_write": op_profile_write,
+    "filter": op_filter,
+    "categories": op_categories,
+    "image": op_image,
+}
+
+
+def run_workload(fixture, weights, concurrency, duration, warmup):
+    # Closed loop: every worker sends its next request as soon as the last
+    # one returns. Requests that start during the warmup are not recorded.
+    names = list(weights)
+    cum_weights = []
+    total = 0
+    for name in names:
+        total += weights[name]
+        cum_weights.append(total)
+
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+
+    def worker(index):
+        rng = random.Random(index)
+        client = Client(fixture.base_url)
+        local = {name: [] for name in names}
+        local_errors = {name: 0 for name in names}
+        while True:
+            start = time.perf_counter()
+            if start >= deadline:
+                break
+            name = rng.choices(names, cum_weights=cum_weights)[0]
+            try:
+                status = OPERATIONS[name](client, fixture, rng)
+            except Exception:
+                status = None
+            if start >= measure_from:
+                local[name].append((time.perf_counter() - start) * 1000)
+                if status is None or status >= 400:
+                    local_errors[name] += 1
+        client.close()
+        with lock:
+            for name in names:
+                latencies[name].extend(local[name])
+                errors[name] += local_errors[name]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+
+    every = [latency for name in names for latency in latencies[name]]
+    result = {
+        "requests": len(every),
+        "requests_per_sec": round(len(every) / duration, 2),
+        "errors": sum(errors.values()),
+        **summarize(every),
+    }
+    if len(names) > 1:
+        result["operations"] = {
+            name: {"requests": len(latencies[name]), "errors": errors[name], **summarize(latencies[name])}
+            for name in names
+        }
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline):
+    # Relative change per workload; positive is more throughput or latency
+    changes = {}
+    for name, result in report["workloads"].items():
+        before = baseline.get("workloads", {}).get(name)
+        if not before:
+            continue
+        changes[name] = {
+            key: round((result[key] - before[key]) / before[key] * 100, 1) if before[key] else None
+            for key in ("requests_per_sec", "p50_ms", "p99_ms")
+        }
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test against a generated dataset")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--manifest", default="dataset.json", help="written by generate.py")
+    parser.add_argument("--admin-username", required=True)
+    parser.add_argument("--admin-password", required=True)
+    parser.add_argument("--workloads", default=",".join(WORKLOADS),
+                        help=f"comma-separated, from: {', '.join(WORKLOADS)}")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds per workload")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before each workload")
+    parser.add_argument("--accounts", type=int, default=100, help="alumni accounts logged in for the workloads")
+    parser.add_argument("--images", type=int, default=20, help="of those, accounts given a profile image")
+    parser.add_argument("--output", help="write the JSON report here as well")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    args = parser.parse_args()
+
+    workloads = [name.strip() for name in args.workloads.split(",") if name.strip()]
+    unknown = [name for name in workloads if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workload(s): {', '.join(unknown)}")
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    if "image" not in workloads and "mixed" not in workloads:
+        args.images = 0
+    fixture = Fixture(args, manifest)
+
+    report = {
+        "benchmark": "loadtest",
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "base_url": args.base_url,
+        "dataset": {key: value for key, value in manifest.items() if key not in ("benchmark", "password")},
+        "config": {"concurrency": args.concurrency, "duration": args.duration, "warmup": args.warmup,
+                   "accounts": len(fixture.accounts), "images": len(fixture.image_ids), "mix": MIX},
+        "workloads": {},
+    }
+    for name in workloads:
+        weights = MIX if name == "mixed" else {name: 1}
+        result = run_workload(fixture, weights, args.concurrency, args.duration, args.warmup)
+        report["workloads"][name] = result
+        print(f"{name:<14} rps={result['requests_per_sec']:9.2f}  p50={result['p50_ms']:8.2f}ms  "
+              f"p99={result['p99_ms']:8.2f}ms  errors={result['errors']}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["change_vs_baseline_pct"] = compare(report, json.load(f))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import json
+import threading
+
+from common import DEFAULT_BASE_URL, run_closed_loop
+
+# Login throughput and latency under concurrency. While logins run, a probe
+# client fetches /openapi.json, which touches neither the database nor the
+# KDF, to show whether password hashing stalls the rest of the worker.
+#
+#   python benchmarks/login.py --username dharshan --password 12345678
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput benchmark")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--levels", default="1,4,16,64")
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    form = {"username": args.username, "password": args.password}
+
+    def login(client, index):
+        status, _, _ = client.request("POST", "/api/auth/login", form=form)
+        return status
+
+    def probe(client, index):
+        status, _, _ = client.request("GET", "/openapi.json")
+        return status
+
+    results = []
+    for level in [int(value) for value in args.levels.split(",")]:
+        probe_result = {}
+        probe_thread = threading.Thread(
+            target=lambda: probe_result.update(run_closed_loop(probe, 1, args.duration, args.base_url))
+        )
+        probe_thread.start()
+        result = run_closed_loop(login, level, args.duration, args.base_url)
+        probe_thread.join()
+        result["probe_during_logins"] = probe_result
+        results.append(result)
+        print(f"concurrency={level:3d}  logins/s={result['requests_per_sec']:8.2f}  "
+              f"p50={result['p50_ms']:8.2f}ms  p99={result['p99_ms']:8.2f}ms  errors={result['errors']}  "
+              f"probe p99={probe_result.get('p99_ms', 0):8.2f}ms")
+
+    print(json.dumps({"benchmark": "login", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import json
+import time
+
+import anyio
+from common import connect
+
+from fastapi import FastAPI
+from psycopg2.extras import RealDictCursor
+from api.instrumentation import MetricsMiddleware
+from config.metrics import run_operation, timed_cursor_class
+
+# Cost of the instrumentation layer per unit of work, measured in-process so
+# network noise does not hide it: a query through a timed cursor against a
+# plain one, a service call through run_operation against a direct call, and
+# a request through MetricsMiddleware against the bare app.
+
+
+def per_call_us(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def query_overhead(conn, iterations):
+    def run(cursor_class):
+        cursor = conn.cursor(cursor_factory=cursor_class)
+
+        def query():
+            cursor.execute("SELECT 1 AS one")
+            cursor.fetchall()
+        return per_call_us(query, iterations)
+
+    run(RealDictCursor)  # warm up
+    plain = min(run(RealDictCursor) for _ in range(3))
+    timed = min(run(timed_cursor_class(RealDictCursor)) for _ in range(3))
+    return {"plain_us": round(plain, 2), "timed_us": round(timed, 2), "overhead_us": round(timed - plain, 2)}
+
+
+def operation_overhead(iterations):
+    def method():
+        return None
+
+    direct = per_call_us(method, iterations)
+    wrapped = per_call_us(lambda: run_operation("benchmark", method), iterations)
+    return {"direct_us": round(direct, 2), "wrapped_us": round(wrapped, 2), "overhead_us": round(wrapped - direct, 2)}
+
+
+def request_overhead(iterations):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"item_id": item_id}
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/items/1", "raw_path": b"/items/1", "query_string": b"",
+        "headers": [], "http_version": "1.1", "scheme": "http", "server": ("bench", 80),
+        "client": ("bench", 1), "root_path": "",
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def run(asgi):
+        for _ in range(100):  # warm up
+            await asgi(dict(scope), receive, send)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await asgi(dict(scope), receive, send)
+        return (time.perf_counter() - start) / iterations * 1e6
+
+    async def main():
+        # Interleaved rounds, best of each, so drift does not favour either
+        instrumented_app = MetricsMiddleware(app)
+        bare, instrumented = [], []
+        for _ in range(5):
+            bare.append(await run(app))
+            instrumented.append(await run(instrumented_app))
+        return min(bare), min(instrumented)
+
+    bare, instrumented = anyio.run(main)
+    return {"bare_us": round(bare, 2), "instrumented_us": round(instrumented, 2),
+            "overhead_us": round(instrumented - bare, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instrumentation overhead benchmark")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=5000)
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        query = query_overhead(conn, args.queries)
+    finally:
+        conn.close()
+
+    print(json.dumps({
+        "benchmark": "metrics_overhead",
+        "query": query,
+        "service_call": operation_overhead(args.iterations),
+        "request": request_overhead(args.iterations),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import json
+import random
+
+from common import connect, summarize, timed
+from seed import cleanup, seed
+
+from config.main import get_db_connection
+from services.main import AlumniService
+
+# Compares the old three-query profile assembly with the single JSON query
+# behind AlumniService.get_alumni_profile_json on a seeded dataset.
+
+
+def legacy_profile(alumni_id):
+    # The pre-change implementation: three round-trips plus dict copies
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT a.*, u.email, u.username
+            FROM alumni a
+            JOIN users u ON a.user_id = u.user_id
+            WHERE a.alumni_id = %s
+        """, (alumni_id,))
+        profile = cursor.fetchone()
+        cursor.execute("SELECT * FROM education WHERE alumni_id = %s", (alumni_id,))
+        education = cursor.fetchall()
+        cursor.execute("SELECT * FROM jobs WHERE alumni_id = %s", (alumni_id,))
+        jobs = cursor.fetchall()
+        complete_profile = dict(profile)
+        complete_profile["education"] = [dict(edu) for edu in education]
+        complete_profile["jobs"] = [dict(job) for job in jobs]
+        return complete_profile
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile assembly latency benchmark")
+    parser.add_argument("--alumni", type=int, default=10000, help="alumni to seed")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded rows")
+    args = parser.parse_args()
+
+    conn = connect()
+    prefix, ids = seed(conn, args.alumni, education_per_alumni=3, jobs_per_alumni=5)
+    try:
+        rng = random.Random(0)
+        sample = [rng.choice(ids) for _ in range(args.requests)]
+
+        # Warm the pool and the server caches
+        for alumni_id in sample[:100]:
+            legacy_profile(alumni_id)
+            AlumniService.get_alumni_profile_json(alumni_id)
+
+        # The legacy path is measured including the JSON encoding it needs
+        # before it can be sent; the new path already holds JSON text
+        legacy = [timed(lambda i=i: json.dumps(legacy_profile(i), default=str))[0] for i in sample]
+        single = [timed(AlumniService.get_alumni_profile_json, i)[0] for i in sample]
+
+        report = {
+            "benchmark": "profile_assembly",
+            "alumni": args.alumni,
+            "legacy_three_queries": summarize(legacy),
+            "single_json_query": summarize(single),
+        }
+        print(json.dumps(report, indent=2))
+    finally:
+        if not args.keep:
+            cleanup(conn, prefix)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
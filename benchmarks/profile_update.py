@@ -0,0 +1,122 @@
+import argparse
+import json
+
+from common import connect, summarize, timed
+from seed import cleanup, seed
+
+import services.main
+from config.main import get_db_connection
+from services.main import AlumniService
+
+# Round trips and latency of a 20-item profile edit (basic fields plus ten
+# education and ten job entries): the old one-UPDATE-per-entry loop against
+# the set-based AlumniService.update_alumni_profile.
+
+
+class CountingConnection:
+    # Counts statements and commits sent over a pooled connection
+    def __init__(self, conn, counter):
+        self._conn = conn
+        self._counter = counter
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._conn.cursor(*args, **kwargs)
+        execute = cursor.execute
+
+        def counted(*a, **k):
+            self._counter[0] += 1
+            return execute(*a, **k)
+
+        cursor.execute = counted
+        return cursor
+
+    def commit(self):
+        self._counter[0] += 1
+        self._conn.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def legacy_update(conn, alumni_id, profile_data):
+    # The pre-change implementation, one UPDATE per entry
+    cursor = conn.cursor()
+    basic = profile_data["basic"]
+    fields = [f"{key} = %s" for key in basic]
+    cursor.execute(
+        f"UPDATE alumni SET {', '.join(fields)}, updated_at = CURRENT_TIMESTAMP WHERE alumni_id = %s",
+        [*basic.values(), alumni_id]
+    )
+    for table, key in (("education", "education_id"), ("jobs", "job_id")):
+        for entry in profile_data[table]:
+            fields = [f"{column} = %s" for column in entry if column != key]
+            values = [value for column, value in entry.items() if column != key]
+            cursor.execute(
+                f"UPDATE {table} SET {', '.join(fields)}, updated_at = CURRENT_TIMESTAMP WHERE {key} = %s",
+                [*values, entry[key]]
+            )
+    conn.commit()
+
+
+def make_edit(cursor, alumni_id, round_number):
+    cursor.execute("SELECT education_id FROM education WHERE alumni_id = %s ORDER BY education_id", (alumni_id,))
+    education_ids = [row["education_id"] for row in cursor.fetchall()]
+    cursor.execute("SELECT job_id FROM jobs WHERE alumni_id = %s ORDER BY job_id", (alumni_id,))
+    job_ids = [row["job_id"] for row in cursor.fetchall()]
+    return {
+        "basic": {"bio": f"Edited profile, round {round_number}", "current_location": "Chennai"},
+        "education": [{"education_id": i, "achievements": f"Round {round_number}"} for i in education_ids],
+        "jobs": [{"job_id": i, "description": f"Round {round_number}"} for i in job_ids],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile update round-trip benchmark")
+    parser.add_argument("--alumni", type=int, default=200, help="alumni to seed")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded rows")
+    args = parser.parse_args()
+
+    conn = connect()
+    prefix, ids = seed(conn, args.alumni, education_per_alumni=10, jobs_per_alumni=10)
+    try:
+        cursor = conn.cursor()
+        edits = {alumni_id: make_edit(cursor, alumni_id, 1) for alumni_id in ids}
+        conn.commit()
+
+        legacy_counter = [0]
+        legacy = []
+        for alumni_id in ids:
+            pooled = get_db_connection()
+            try:
+                elapsed, _ = timed(legacy_update, CountingConnection(pooled, legacy_counter), alumni_id, edits[alumni_id])
+            finally:
+                pooled.close()
+            legacy.append(elapsed)
+
+        batched_counter = [0]
+        original = services.main.get_db_connection
+        services.main.get_db_connection = lambda: CountingConnection(original(), batched_counter)
+        try:
+            batched = []
+            for alumni_id in ids:
+                elapsed, result = timed(AlumniService.update_alumni_profile, alumni_id, edits[alumni_id])
+                if "error" in result:
+                    raise RuntimeError(result["error"])
+                batched.append(elapsed)
+        finally:
+            services.main.get_db_connection = original
+
+        print(json.dumps({
+            "benchmark": "profile_update",
+            "child_entries_per_edit": 20,
+            "legacy": {"round_trips_per_edit": legacy_counter[0] / len(ids), **summarize(legacy)},
+            "batched": {"round_trips_per_edit": batched_counter[0] / len(ids), **summarize(batched)},
+        }, indent=2))
+    finally:
+        if not args.keep:
+            cleanup(conn, prefix)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import json
+
+from common import connect, summarize, timed
+from seed import cleanup, seed
+
+from services.search import SearchService
+
+# Compares ranked search (alumni_search tsvector + trigram indexes) with the
+# leading-wildcard ILIKE scan filter_alumni used before, at several dataset
+# sizes. Sizes are cumulative: the 1M run reuses the rows seeded for 100k.
+
+TERMS = ["Kumar", "Google", "Software Engineer", "Chennai", "Computer Science",
+         "Karthk", "Gogle", "Bangalor", "data scientist"]
+
+ILIKE_QUERY = """
+    SELECT DISTINCT a.alumni_id
+    FROM alumni a
+    LEFT JOIN jobs j ON j.alumni_id = a.alumni_id
+    WHERE a.full_name ILIKE %(like)s OR a.current_location ILIKE %(like)s
+       OR j.company_name ILIKE %(like)s OR j.position ILIKE %(like)s
+"""
+
+
+def run_ilike(conn, term):
+    cursor = conn.cursor()
+    cursor.execute(ILIKE_QUERY, {"like": f"%{term}%"})
+    return len(cursor.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search latency benchmark")
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded rows")
+    args = parser.parse_args()
+
+    conn = connect()
+    prefixes = []
+    seeded = 0
+    results = []
+    try:
+        for size in [int(value) for value in args.sizes.split(",")]:
+            if size > seeded:
+                prefix, _ = seed(conn, size - seeded)
+                prefixes.append(prefix)
+                seeded = size
+                conn.cursor().execute("ANALYZE alumni; ANALYZE jobs; ANALYZE education; ANALYZE alumni_search")
+                conn.commit()
+
+            for term in TERMS:
+                search_ms = []
+                ilike_ms = []
+                hits = None
+                matches = None
+                for _ in range(args.rounds):
+                    elapsed, result = timed(SearchService.search_alumni, term, 1, 20)
+                    search_ms.append(elapsed)
+                    hits = result.get("total")
+                    elapsed, matches = timed(run_ilike, conn, term)
+                    ilike_ms.append(elapsed)
+                    conn.rollback()
+                results.append({
+                    "alumni": size,
+                    "term": term,
+                    "search_total": hits,
+                    "ilike_matches": matches,
+                    "search": summarize(search_ms),
+                    "ilike_scan": summarize(ilike_ms),
+                })
+                print(f"{size:>8}  {term:<20} search p50={results[-1]['search']['p50_ms']:8.2f}ms "
+                      f"ilike p50={results[-1]['ilike_scan']['p50_ms']:8.2f}ms")
+
+        print(json.dumps({"benchmark": "search", "results": results}, indent=2))
+    finally:
+        if not args.keep:
+            for prefix in prefixes:
+                cleanup(conn, prefix)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
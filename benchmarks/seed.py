@@ -0,0 +1,114 @@
+import argparse
+import random
+import uuid
+
+from psycopg2.extras import execute_values
+
+# Inserts synthetic alumni with education and job history. Every generated
+# username starts with the run prefix so a dataset can be removed again with
+# --cleanup.
+
+DEPARTMENTS = ["Computer Science", "Electrical Engineering", "Mechanical Engineering",
+               "Civil Engineering", "Information Technology", "Mathematics", "Physics"]
+DEGREES = ["Bachelor of Technology", "Bachelor of Science", "Master of Science", "Master of Technology"]
+COMPANIES = ["Google", "Microsoft", "Amazon", "Infosys", "TCS", "Wipro", "Apple", "Zoho", "Freshworks"]
+POSITIONS = ["Software Engineer", "Senior Developer", "Data Scientist", "Product Manager", "UX Designer"]
+CITIES = ["Chennai", "Bangalore", "Hyderabad", "Mumbai", "Pune", "Seattle", "San Francisco"]
+FIRST_NAMES = ["Arun", "Priya", "Karthik", "Divya", "Rahul", "Sneha", "John", "Jane", "Mike", "Sarah"]
+LAST_NAMES = ["Kumar", "Raman", "Iyer", "Sharma", "Doe", "Smith", "Ross", "Nair", "Reddy"]
+
+
+def seed(conn, count, education_per_alumni=2, jobs_per_alumni=3, prefix=None, batch_size=1000):
+    prefix = prefix or f"bench_{uuid.uuid4().hex[:8]}"
+    rng = random.Random(prefix)
+    cursor = conn.cursor()
+    alumni_ids = []
+
+    for offset in range(0, count, batch_size):
+        size = min(batch_size, count - offset)
+        users = [
+            (f"{prefix}_{offset + i}", "!", f"{prefix}_{offset + i}@example.com", True)
+            for i in range(size)
+        ]
+        user_ids = [row["user_id"] for row in execute_values(
+            cursor,
+            "INSERT INTO users (username, password, email, is_alumni) VALUES %s RETURNING user_id",
+            users, page_size=size, fetch=True
+        )]
+
+        alumni = []
+        for user_id in user_ids:
+            alumni.append((
+                user_id,
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "Synthetic alumni profile used for benchmarking " * 3,
+                rng.choice(CITIES),
+                rng.randint(2000, 2024),
+                rng.random() < 0.3,
+            ))
+        batch_ids = [row["alumni_id"] for row in execute_values(
+            cursor,
+            """
+            INSERT INTO alumni (user_id, full_name, bio, current_location, graduation_year, availability_for_mentorship)
+            VALUES %s RETURNING alumni_id
+            """,
+            alumni, page_size=size, fetch=True
+        )]
+
+        education = []
+        jobs = []
+        for alumni_id in batch_ids:
+            for _ in range(education_per_alumni):
+                start = rng.randint(1995, 2020)
+                education.append((alumni_id, rng.choice(DEGREES), rng.choice(DEPARTMENTS),
+                                  start, start + 4, round(rng.uniform(2.0, 4.0), 2)))
+            for _ in range(jobs_per_alumni):
+                year = rng.randint(2000, 2024)
+                jobs.append((alumni_id, rng.choice(COMPANIES), rng.choice(POSITIONS),
+                             rng.choice(CITIES), f"{year}-0{rng.randint(1, 9)}-01"))
+        if education:
+            execute_values(cursor, """
+                INSERT INTO education (alumni_id, degree, department, start_year, end_year, cgpa) VALUES %s
+            """, education, page_size=len(education))
+        if jobs:
+            execute_values(cursor, """
+                INSERT INTO jobs (alumni_id, company_name, position, location, start_date) VALUES %s
+            """, jobs, page_size=len(jobs))
+
+        conn.commit()
+        alumni_ids.extend(batch_ids)
+
+    return prefix, alumni_ids
+
+
+def cleanup(conn, prefix):
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM users WHERE username LIKE %s", (f"{prefix}\\_%",))
+    conn.commit()
+    return cursor.rowcount
+
+
+def main():
+    from common import connect
+
+    parser = argparse.ArgumentParser(description="Seed synthetic alumni")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--education", type=int, default=2)
+    parser.add_argument("--jobs", type=int, default=3)
+    parser.add_argument("--prefix")
+    parser.add_argument("--cleanup", metavar="PREFIX")
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        if args.cleanup:
+            print(f"Deleted {cleanup(conn, args.cleanup)} users")
+            return
+        prefix, ids = seed(conn, args.count, args.education, args.jobs, args.prefix)
+        print(f"Seeded {len(ids)} alumni with prefix {prefix}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # optional; only needed for CACHE_BACKEND=redis
+    redis = None
+
+# Cache configuration
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # memory, redis or none
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "300"))  # seconds
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "10000"))
+PROFILE_CACHE_MAX_BYTES = int(os.getenv("PROFILE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+# In-process LRU cache with per-entry TTL, bounded by entry count and by the
+# total size of the cached strings
+class MemoryBackend:
+    def __init__(self, max_entries=PROFILE_CACHE_MAX_ENTRIES, max_bytes=PROFILE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+# Shared cache in a Redis-compatible store so every uvicorn worker sees the
+# same entries and invalidations. Accepts any client with redis-py's get,
+# set(ex=...) and delete methods, e.g. a local stand-in for testing.
+class RedisBackend:
+    def __init__(self, client, prefix="alumni:"):
+        self.client = client
+        self.prefix = prefix
+        self.errors = 0
+
+    def get(self, key):
+        try:
+            value = self.client.get(self.prefix + key)
+        except Exception:
+            self.errors += 1
+            return None
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+    def set(self, key, value, ttl):
+        try:
+            self.client.set(self.prefix + key, value, ex=max(1, int(ttl)))
+        except Exception:
+            self.errors += 1
+
+    def delete(self, key):
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception:
+            self.errors += 1
+
+    def stats(self):
+        # Evictions happen inside the store (maxmemory policy) and are
+        # reported by its INFO command, not here
+        return {"backend": "redis", "errors": self.errors}
+
+
+class NullBackend:
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def stats(self):
+        return {"backend": "none"}
+
+
+def create_cache_backend(name=CACHE_BACKEND):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "redis":
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        return RedisBackend(redis.Redis.from_url(CACHE_REDIS_URL))
+    if name == "none":
+        return NullBackend()
+    raise ValueError(f"Unknown cache backend: {name}")
+
+
+# Cache of serialized alumni profiles keyed by alumni_id
+class ProfileCache:
+    def __init__(self, backend, ttl=PROFILE_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._invalidated_at = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(alumni_id):
+        return f"profile:{alumni_id}"
+
+    def get(self, alumni_id):
+        value = self.backend.get(self._key(alumni_id))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, alumni_id, value, loaded_at):
+        # loaded_at is the time.monotonic() taken before the database read.
+        # If this worker invalidated the entry since then, the value may
+        # predate the write and is not cached.
+        with self._lock:
+            invalidated_at = self._invalidated_at.get(alumni_id)
+            if invalidated_at is not None and invalidated_at >= loaded_at:
+                return
+        self.backend.set(self._key(alumni_id), value, self.ttl)
+
+    def invalidate(self, alumni_id):
+        now = time.monotonic()
+        with self._lock:
+            self.invalidations += 1
+            self._invalidated_at[alumni_id] = now
+            # Markers only matter for reads still in flight
+            if len(self._invalidated_at) > 1024:
+                cutoff = now - 60
+                self._invalidated_at = {
+                    key: at for key, at in self._invalidated_at.items() if at >= cutoff
+                }
+        self.backend.delete(self._key(alumni_id))
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "ttl": self.ttl,
+            }
+        stats.update(self.backend.stats())
+        return stats
+
+
+profile_cache = ProfileCache(create_cache_backend())
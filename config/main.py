@@ -1,10 +1,16 @@
 import os
-import psycopg2
+import threading
+import time
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 from fastapi.security import OAuth2PasswordBearer
 import jwt
 from datetime import datetime, timedelta
+from config.pool import ConnectionPool
+from config.metrics import registry, db_connection_acquire_duration, db_pool_connections
+from config.querylog import slow_query_log
+from config.cache import profile_cache, RedisBackend
+from config.tokens import TokenCache, DatabaseRevocationStore, RedisRevocationStore
 
 # Load environment variables
 load_dotenv()
@@ -18,6 +24,13 @@ DB_CONFIG = {
     "password": os.getenv("POSTGRES_PASSWORD", "mysecurepassword123")
 }
 
+# Connection pool configuration
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))  # seconds to wait for a free connection
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "3600"))  # seconds before a connection is recycled
+DB_POOL_CHECK_IDLE_AFTER = float(os.getenv("DB_POOL_CHECK_IDLE_AFTER", "30"))  # ping connections idle longer than this
+
 # JWT Configuration
 JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key-here")
 JWT_ALGORITHM = "HS256"
@@ -26,37 +39,92 @@ JWT_EXPIRATION = 24  # hours
 # Auth configuration
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
-# Database connection function
+# Database connection pool
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
+def get_db_pool():
+    global _db_pool
+    if _db_pool is None:
+        with _db_pool_lock:
+            if _db_pool is None:
+                pool = ConnectionPool(
+                    DB_CONFIG,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                    max_lifetime=DB_POOL_MAX_LIFETIME,
+                    check_idle_after=DB_POOL_CHECK_IDLE_AFTER,
+                    cursor_factory=RealDictCursor
+                )
+                try:
+                    pool.open()
+                except Exception as e:
+                    print(f"Database pool pre-fill failed: {e}")
+                _db_pool = pool
+    return _db_pool
+
+def close_db_pool():
+    global _db_pool
+    with _db_pool_lock:
+        if _db_pool is not None:
+            _db_pool.close()
+            _db_pool = None
+
+def get_pool_stats():
+    return get_db_pool().stats()
+
+def _collect_pool_metrics():
+    if _db_pool is not None:
+        stats = _db_pool.stats()
+        db_pool_connections.set("in_use", value=stats["in_use"])
+        db_pool_connections.set("idle", value=stats["idle"])
+
+registry.add_collector(_collect_pool_metrics)
+
+# Database connection function. The returned connection comes from the pool;
+# calling conn.close() hands it back.
 def get_db_connection():
+    start = time.perf_counter()
     try:
-        conn = psycopg2.connect(
-            **DB_CONFIG,
-            cursor_factory=RealDictCursor
-        )
+        conn = get_db_pool().getconn()
+        db_connection_acquire_duration.observe(value=time.perf_counter() - start)
         return conn
     except Exception as e:
         print(f"Database connection failed: {e}")
         return None
 
+# EXPLAIN runs for the slow-query log use their own pooled connection
+slow_query_log.connect = get_db_connection
+
 # JWT token functions
 def create_jwt_token(data: dict):
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(hours=JWT_EXPIRATION)
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + timedelta(hours=JWT_EXPIRATION)
+    to_encode.update({"exp": expire, "iat": now})
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-def decode_jwt_token(token: str):
+def verify_jwt_token(token: str):
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         return payload
     except jwt.PyJWTError:
         return None
 
-# Password hashing (simple for demo - use bcrypt in production)
-import hashlib
+# Verified claims are cached per token until exp. Revocations (logout,
+# deleted accounts) are shared between workers through Redis when that is the
+# cache backend, otherwise through the database; either way requests only
+# consult the in-memory deny list, which a background thread keeps in sync.
+def _revocation_store():
+    if isinstance(profile_cache.backend, RedisBackend):
+        return RedisRevocationStore(profile_cache.backend.client)
+    return DatabaseRevocationStore(get_db_connection)
 
-def hash_password(password: str):
-    return hashlib.sha256(password.encode()).hexdigest()
+token_cache = TokenCache(verify_jwt_token, max_token_age=JWT_EXPIRATION * 3600, store=_revocation_store())
+
+def decode_jwt_token(token: str):
+    return token_cache.decode(token)
 
-def verify_password(plain_password: str, hashed_password: str):
-    return hash_password(plain_password) == hashed_password
+# Password hashing (scrypt on a bounded worker pool, see config/passwords.py)
+from config.passwords import hash_password, hash_passwords, verify_password, check_password
@@ -0,0 +1,246 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+
+from config.profiling import current_profile
+
+# In-process metrics in the Prometheus text format, served by GET /metrics.
+# Values are kept per worker process, and a scrape reads the worker that
+# answers it.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+# Bearer token required by GET /metrics; unset leaves it open to scrapers
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Latency buckets in seconds, 1 ms to 10 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Service method running in the current context (set by AsyncService), used
+# to tag the queries it runs
+current_operation = contextvars.ContextVar("current_operation", default="other")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labelvalues, amount=1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues, value):
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labelvalues, value):
+        # Per-bucket (not cumulative) counts; cumulated when rendered
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labelvalues)
+            if series is None:
+                series = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = self._header()
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {repr(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        # Called before each render, e.g. to copy pool stats into gauges
+        self._collectors.append(collector)
+
+    def render(self):
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being processed"))
+service_call_duration = registry.register(Histogram(
+    "service_call_duration_seconds", "Service method latency, including queries", ("operation",)))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement latency by service method", ("operation", "statement")))
+db_query_rows = registry.register(Counter(
+    "db_query_rows_total", "Rows returned or affected by SQL statements", ("operation", "statement")))
+db_connection_acquire_duration = registry.register(Histogram(
+    "db_connection_acquire_seconds", "Time to get a pooled connection, including waits"))
+db_connect_duration = registry.register(Histogram(
+    "db_connect_seconds", "Time to open a new database connection"))
+db_pool_connections = registry.register(Gauge(
+    "db_pool_connections", "Pooled connections by state", ("state",)))
+
+
+def run_operation(name, func, *args, **kwargs):
+    # Runs a service method with `name` as the operation that its queries
+    # are tagged with; a profiled request also samples this thread meanwhile
+    profile = current_profile.get()
+    if profile is not None:
+        profile.attach_thread()
+    try:
+        if not METRICS_ENABLED:
+            return func(*args, **kwargs)
+        token = current_operation.set(name)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            service_call_duration.observe(name, value=time.perf_counter() - start)
+            current_operation.reset(token)
+    finally:
+        if profile is not None:
+            profile.detach_thread()
+
+
+def _statement(query):
+    # Leading keyword of a statement (SELECT, INSERT, WITH, ...) as a label
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    words = str(query).lstrip(" \t\r\n(").split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+# Callables run after every statement on an instrumented cursor as
+# hook(cursor, query, vars, elapsed); the slow-query log registers here
+query_hooks = []
+
+
+def cursors_instrumented():
+    # Profiled requests need the timed cursor frames to tell DB time apart
+    return METRICS_ENABLED or bool(query_hooks) or current_profile.get() is not None
+
+
+def record_query(cursor, query, vars, elapsed):
+    if METRICS_ENABLED:
+        operation = current_operation.get()
+        statement = _statement(query)
+        db_query_duration.observe(operation, statement, value=elapsed)
+        if cursor.rowcount > 0:
+            db_query_rows.inc(operation, statement, amount=cursor.rowcount)
+    for hook in query_hooks:
+        hook(cursor, query, vars, elapsed)
+
+
+_timed_cursor_classes = {}
+_timed_cursor_lock = threading.Lock()
+
+
+def timed_cursor_class(cursor_class):
+    # Subclass of a psycopg2 cursor class whose execute, executemany and
+    # copy_expert report to record_query. Created once per class.
+    timed = _timed_cursor_classes.get(cursor_class)
+    if timed is not None:
+        return timed
+
+    class TimedCursor(cursor_class):
+        def execute(self, query, vars=None):
+            start = time.perf_counter()
+            try:
+                return super().execute(query, vars)
+            finally:
+                record_query(self, query, vars, time.perf_counter() - start)
+
+        def executemany(self, query, vars_list):
+            start = time.perf_counter()
+            try:
+                return super().executemany(query, vars_list)
+            finally:
+                record_query(self, query, None, time.perf_counter() - start)
+
+        def copy_expert(self, sql, file, size=8192):
+            start = time.perf_counter()
+            try:
+                return super().copy_expert(sql, file, size)
+            finally:
+                record_query(self, sql, None, time.perf_counter() - start)
+
+    TimedCursor.__name__ = TimedCursor.__qualname__ = f"Timed{cursor_class.__name__}"
+    with _timed_cursor_lock:
+        return _timed_cursor_classes.setdefault(cursor_class, TimedCursor)
@@ -0,0 +1,288 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+
+import psycopg2
+
+from config.main import DB_CONFIG
+
+# Versioned schema migrations. Each file in MIGRATIONS_DIR is named
+# NNNN_description.sql and runs once, in version order, in its own
+# transaction; applied versions are recorded in schema_migrations with a
+# checksum of the file. A file whose first line is "-- migrate: no-transaction"
+# runs statement by statement outside a transaction instead (needed for
+# CREATE INDEX CONCURRENTLY). An advisory lock keeps concurrent runners, such
+# as several workers starting at once, from applying the same migration.
+#
+#   python -m config.migrations status
+#   python -m config.migrations migrate [--target N]
+#   python -m config.migrations baseline N
+MIGRATIONS_DIR = os.getenv(
+    "MIGRATIONS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+)
+DB_MIGRATE_ON_STARTUP = os.getenv("DB_MIGRATE_ON_STARTUP", "false").lower() in ("1", "true", "yes", "on")
+
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d{4})_(\w+)\.sql$")
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+MIGRATION_LOCK_ID = 4207310  # pg_advisory_lock key shared by every runner
+
+_DOLLAR_QUOTE = re.compile(r"\$(?:[A-Za-z_][A-Za-z_0-9]*)?\$")
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, encoding="utf-8") as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode()).hexdigest()
+        self.transactional = not self.sql.startswith(NO_TRANSACTION_MARKER)
+
+    def statements(self):
+        return split_statements(self.sql)
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".sql"):
+            continue
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            raise MigrationError(f"Invalid migration file name: {filename} (expected NNNN_description.sql)")
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(f"Duplicate migration version {version}: {filename}")
+        migrations[version] = Migration(version, match.group(2), os.path.join(directory, filename))
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def split_statements(sql):
+    # Splits on semicolons outside quotes, comments and dollar-quoted bodies;
+    # chunks holding only comments or whitespace are dropped
+    statements = []
+    start = 0
+    has_code = False
+    i = 0
+    n = len(sql)
+    while i < n:
+        c = sql[i]
+        if c in "'\"":
+            end = sql.find(c, i + 1)
+            while end != -1 and sql[end + 1:end + 2] == c:
+                end = sql.find(c, end + 2)
+            i = n if end == -1 else end + 1
+            has_code = True
+        elif sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = n if end == -1 else end + 1
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+        elif c == "$" and _DOLLAR_QUOTE.match(sql, i):
+            tag = _DOLLAR_QUOTE.match(sql, i).group(0)
+            end = sql.find(tag, i + len(tag))
+            i = n if end == -1 else end + len(tag)
+            has_code = True
+        elif c == ";":
+            if has_code:
+                statements.append(sql[start:i].strip())
+            start = i + 1
+            has_code = False
+            i += 1
+        else:
+            if not c.isspace():
+                has_code = True
+            i += 1
+    if has_code:
+        statements.append(sql[start:].strip())
+    return statements
+
+
+def connect():
+    # Direct connection; migrations switch autocommit and hold a session lock,
+    # which pooled connections should not be left with
+    return psycopg2.connect(**DB_CONFIG)
+
+
+def _ensure_history(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+          version INTEGER PRIMARY KEY,
+          name VARCHAR(255) NOT NULL,
+          checksum CHAR(64) NOT NULL,
+          applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+          duration_ms DOUBLE PRECISION
+        )
+    """)
+
+
+def _applied(cursor):
+    cursor.execute("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")
+    return {row[0]: row for row in cursor.fetchall()}
+
+
+def _record(cursor, migration, duration_ms):
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s)",
+        (migration.version, migration.name, migration.checksum, duration_ms)
+    )
+
+
+def status(conn, migrations):
+    # One entry per version: applied, pending, modified (file changed after it
+    # was applied) or missing (recorded but no longer on disk)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    _ensure_history(cursor)
+    applied = _applied(cursor)
+    entries = []
+    for migration in migrations:
+        row = applied.pop(migration.version, None)
+        if row is None:
+            state = "pending"
+        elif row[2] != migration.checksum:
+            state = "modified"
+        else:
+            state = "applied"
+        entries.append({"version": migration.version, "name": migration.name, "state": state,
+                        "applied_at": row[3].isoformat() if row else None})
+    for version, row in applied.items():
+        entries.append({"version": version, "name": row[1], "state": "missing", "applied_at": row[3].isoformat()})
+    entries.sort(key=lambda entry: entry["version"])
+    return entries
+
+
+def _apply(conn, migration):
+    statements = migration.statements()
+    start = time.perf_counter()
+    conn.autocommit = not migration.transactional
+    cursor = conn.cursor()
+    try:
+        for number, statement in enumerate(statements, 1):
+            try:
+                cursor.execute(statement)
+            except psycopg2.Error as e:
+                raise MigrationError(
+                    f"{os.path.basename(migration.path)}: statement {number} of {len(statements)} failed: {e}"
+                ) from e
+        _record(cursor, migration, round((time.perf_counter() - start) * 1000, 3))
+        if migration.transactional:
+            conn.commit()
+    except Exception:
+        if migration.transactional:
+            conn.rollback()
+        raise
+    finally:
+        conn.autocommit = True
+
+
+def migrate(conn, migrations, target=None):
+    # Applies pending migrations up to target (default: all) and returns them
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    try:
+        _ensure_history(cursor)
+        applied = _applied(cursor)
+        if not applied:
+            cursor.execute("SELECT to_regclass('users') IS NOT NULL")
+            if cursor.fetchone()[0]:
+                raise MigrationError(
+                    "Database has tables but no migration history; if it was created from schema.sql, "
+                    "run `python -m config.migrations baseline 1` first (later migrations are idempotent)"
+                )
+
+        for migration in migrations:
+            row = applied.get(migration.version)
+            if row is not None and row[2] != migration.checksum:
+                print(f"Migration {migration.version} ({migration.name}) changed after it was applied")
+
+        done = []
+        for migration in migrations:
+            if migration.version in applied or (target is not None and migration.version > target):
+                continue
+            print(f"Applying migration {migration.version} ({migration.name})")
+            _apply(conn, migration)
+            done.append(migration)
+        return done
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+
+
+def baseline(conn, migrations, version):
+    # Records every migration up to version as applied without running it,
+    # for databases whose schema was created some other way
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    try:
+        _ensure_history(cursor)
+        applied = _applied(cursor)
+        recorded = []
+        for migration in migrations:
+            if migration.version <= version and migration.version not in applied:
+                _record(cursor, migration, None)
+                recorded.append(migration)
+        return recorded
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+
+
+def migrate_on_startup():
+    if not DB_MIGRATE_ON_STARTUP:
+        return
+    conn = connect()
+    try:
+        migrate(conn, load_migrations())
+    except Exception as e:
+        print(f"Database migration failed: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m config.migrations", description="Database schema migrations")
+    parser.add_argument("--dir", default=MIGRATIONS_DIR, help="migrations directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="list migrations and whether they are applied")
+    migrate_parser = commands.add_parser("migrate", help="apply pending migrations")
+    migrate_parser.add_argument("--target", type=int, help="stop after this version")
+    baseline_parser = commands.add_parser("baseline", help="mark migrations up to VERSION as applied")
+    baseline_parser.add_argument("version", type=int)
+    args = parser.parse_args(argv)
+
+    conn = None
+    try:
+        migrations = load_migrations(args.dir)
+        conn = connect()
+        if args.command == "status":
+            for entry in status(conn, migrations):
+                print(f"{entry['version']:04d}  {entry['state']:<8}  {entry['name']}"
+                      + (f"  ({entry['applied_at']})" if entry["applied_at"] else ""))
+        elif args.command == "migrate":
+            done = migrate(conn, migrations, args.target)
+            print(f"Applied {len(done)} migration(s)" if done else "Database is up to date")
+        else:
+            recorded = baseline(conn, migrations, args.version)
+            print(f"Marked {len(recorded)} migration(s) as applied")
+    except (MigrationError, psycopg2.Error) as e:
+        print(f"Migration failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if conn is not None:
+            conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
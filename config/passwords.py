@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# scrypt parameters. N is the CPU/memory cost (power of two); memory per hash
+# is about 128 * N * r bytes. Use `python -m config.passwords --target-ms 100`
+# to pick N for a target login latency on the production hardware.
+PASSWORD_SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", str(2 ** 14)))
+PASSWORD_SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+PASSWORD_SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+PASSWORD_SALT_BYTES = 16
+PASSWORD_KEY_BYTES = 32
+
+# Concurrent KDF evaluations. Bounds CPU and memory used by logins; further
+# requests queue for a worker.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+
+_kdf_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="kdf")
+
+
+def _b64encode(raw):
+    return base64.b64encode(raw).decode().rstrip("=")
+
+
+def _b64decode(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p):
+    # hashlib.scrypt releases the GIL while it runs
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p,
+        maxmem=256 * n * r * p, dklen=PASSWORD_KEY_BYTES
+    )
+
+
+def _hash(password, n=None, r=None, p=None):
+    n = n or PASSWORD_SCRYPT_N
+    r = r or PASSWORD_SCRYPT_R
+    p = p or PASSWORD_SCRYPT_P
+    salt = secrets.token_bytes(PASSWORD_SALT_BYTES)
+    key = _scrypt(password, salt, n, r, p)
+    return f"scrypt${n}${r}${p}${_b64encode(salt)}${_b64encode(key)}"
+
+
+def _check(plain_password, hashed_password):
+    # Returns (valid, needs_rehash)
+    if hashed_password.startswith("scrypt$"):
+        try:
+            _, n, r, p, salt, expected = hashed_password.split("$")
+            n, r, p = int(n), int(r), int(p)
+            key = _scrypt(plain_password, _b64decode(salt), n, r, p)
+        except (ValueError, TypeError):
+            return False, False
+        valid = hmac.compare_digest(key, _b64decode(expected))
+        outdated = (n, r, p) != (PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P)
+        return valid, valid and outdated
+
+    # Legacy unsalted digests: SHA-256 from the original hash_password and
+    # MD5 from the seed rows in migrations/0001_initial_schema.sql. Upgraded on next login.
+    if len(hashed_password) == 64:
+        digest = hashlib.sha256(plain_password.encode()).hexdigest()
+    elif len(hashed_password) == 32:
+        digest = hashlib.md5(plain_password.encode()).hexdigest()
+    else:
+        return False, False
+    valid = hmac.compare_digest(digest, hashed_password.lower())
+    return valid, valid
+
+
+# Blocking API, used by the services (which already run on worker threads)
+def hash_password(password: str):
+    return _kdf_executor.submit(_hash, password).result()
+
+def hash_passwords(passwords):
+    # Hashes many passwords at once, spread over the worker pool
+    return list(_kdf_executor.map(_hash, passwords))
+
+def check_password(plain_password: str, hashed_password: str):
+    return _kdf_executor.submit(_check, plain_password, hashed_password).result()
+
+def verify_password(plain_password: str, hashed_password: str):
+    return check_password(plain_password, hashed_password)[0]
+
+
+# Awaitable API for code running on the event loop
+async def hash_password_async(password: str):
+    return await asyncio.wrap_future(_kdf_executor.submit(_hash, password))
+
+async def check_password_async(plain_password: str, hashed_password: str):
+    return await asyncio.wrap_future(_kdf_executor.submit(_check, plain_password, hashed_password))
+
+
+def calibrate(target_ms, r=PASSWORD_SCRYPT_R, p=PASSWORD_SCRYPT_P, min_n=2 ** 12, max_n=2 ** 20):
+    # Largest power-of-two N whose hash time stays within target_ms
+    n = min_n
+    timings = []
+    while n <= max_n:
+        start = time.perf_counter()
+        _hash("calibration-password", n, r, p)
+        elapsed = (time.perf_counter() - start) * 1000
+        timings.append((n, elapsed))
+        if elapsed > target_ms:
+            break
+        n *= 2
+    within = [n for n, elapsed in timings if elapsed <= target_ms]
+    return (within[-1] if within else min_n), timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune scrypt parameters for a target hash latency")
+    parser.add_argument("--target-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    best, timings = calibrate(args.target_ms)
+    for n, elapsed in timings:
+        print(f"N=2**{n.bit_length() - 1:<2}  {elapsed:8.1f} ms  ~{128 * n * PASSWORD_SCRYPT_R // 1024 // 1024} MiB")
+    print(f"PASSWORD_SCRYPT_N={best}")
@@ -0,0 +1,238 @@
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+
+from config.metrics import cursors_instrumented, db_connect_duration, timed_cursor_class
+
+
+class PoolError(Exception):
+    pass
+
+
+class PoolTimeout(PoolError):
+    pass
+
+
+# Connection class handed out by the pool. Services keep calling conn.close()
+# in their finally blocks; for pooled connections that returns the connection
+# to the pool instead of closing the socket.
+class PooledConnection(extensions.connection):
+    def cursor(self, *args, **kwargs):
+        # Every cursor reports its statements to the query metrics and hooks
+        if cursors_instrumented():
+            factory = kwargs.get("cursor_factory") or self.cursor_factory or extensions.cursor
+            kwargs["cursor_factory"] = timed_cursor_class(factory)
+        return super().cursor(*args, **kwargs)
+
+    def close(self):
+        pool = getattr(self, "_pool", None)
+        if pool is not None and getattr(self, "_checked_out", False):
+            pool.putconn(self)
+        else:
+            super().close()
+
+    def discard(self):
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    def __init__(self, db_config, min_size=1, max_size=10, timeout=5.0,
+                 max_lifetime=3600.0, check_idle_after=30.0, cursor_factory=None):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size: min_size=%s max_size=%s" % (min_size, max_size))
+
+        self.db_config = dict(db_config)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_idle_after = check_idle_after
+        self.cursor_factory = cursor_factory
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        # Counters exposed through stats()
+        self._created = 0
+        self._discarded = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._timeouts = 0
+        self._failed_checks = 0
+
+    def _connect(self):
+        kwargs = {"connection_factory": PooledConnection}
+        if self.cursor_factory is not None:
+            kwargs["cursor_factory"] = self.cursor_factory
+        start = time.perf_counter()
+        conn = psycopg2.connect(**self.db_config, **kwargs)
+        db_connect_duration.observe(value=time.perf_counter() - start)
+        now = time.monotonic()
+        conn._pool = self
+        conn._created_at = now
+        conn._last_used = now
+        conn._checked_out = False
+        with self._cond:
+            self._created += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.discard()
+        except Exception:
+            pass
+        with self._cond:
+            self._discarded += 1
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        now = time.monotonic()
+        if self.max_lifetime and now - conn._created_at > self.max_lifetime:
+            return False
+        # Only ping connections that sat idle long enough to have been dropped
+        # by the server or a proxy; recently used ones are trusted.
+        if now - conn._last_used > self.check_idle_after:
+            try:
+                cursor = conn.cursor(cursor_factory=extensions.cursor)
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+                cursor.close()
+                conn.rollback()
+            except Exception:
+                return False
+        return True
+
+    def open(self):
+        # Pre-fill up to min_size; failures are left for getconn() to report
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append(conn)
+                self._cond.notify()
+
+    def getconn(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        "Timed out after %.1fs waiting for a database connection" % self.timeout
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            if waited:
+                elapsed = time.monotonic() - start
+                self._waits += 1
+                self._wait_time += elapsed
+                self._max_wait_time = max(self._max_wait_time, elapsed)
+            self._in_use += 1
+
+        try:
+            if conn is not None and not self._is_healthy(conn):
+                with self._cond:
+                    self._failed_checks += 1
+                self._close_quietly(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        conn._checked_out = True
+        return conn
+
+    def putconn(self, conn):
+        if not getattr(conn, "_checked_out", False):
+            return
+        conn._checked_out = False
+
+        # Reset session state so the next borrower starts from a clean
+        # transaction; read-only service methods never commit or roll back.
+        keep = not conn.closed
+        if keep and conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except Exception:
+                keep = False
+        if keep and self.max_lifetime and time.monotonic() - conn._created_at > self.max_lifetime:
+            keep = False
+
+        with self._cond:
+            self._in_use -= 1
+            if keep and not self._closed:
+                conn._last_used = time.monotonic()
+                self._idle.append(conn)
+            else:
+                self._size -= 1
+            self._cond.notify()
+
+        if not keep or self._closed:
+            self._close_quietly(conn)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waits": self._waits,
+                "wait_time_total_ms": round(self._wait_time * 1000, 3),
+                "wait_time_avg_ms": round(self._wait_time * 1000 / self._waits, 3) if self._waits else 0.0,
+                "wait_time_max_ms": round(self._max_wait_time * 1000, 3),
+                "timeouts": self._timeouts,
+                "connections_created": self._created,
+                "connections_discarded": self._discarded,
+                "failed_health_checks": self._failed_checks,
+            }
@@ -0,0 +1,221 @@
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+# Per-request sampling profiler. A profiled request is sampled every
+# PROFILE_INTERVAL_MS on the event loop thread (only while its own task is
+# running) and on the worker threads its service calls run on. Each sample
+# is assigned a phase from its innermost recognised frame and written out in
+# collapsed-stack format ("frame;frame;frame count"), which flamegraph.pl,
+# speedscope and similar tools read directly.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # share of requests profiled
+PROFILE_DEBUG_TOKEN = os.getenv("PROFILE_DEBUG_TOKEN", "")  # X-Debug-Profile value that forces a profile
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+
+PROFILE_PHASES = ("routing", "auth", "service", "db", "json", "wait")
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# Profile of the request running in the current context, if it is sampled
+current_profile = contextvars.ContextVar("current_profile", default=None)
+
+
+def _phase(code):
+    # Phase a frame belongs to, or None for frames that do not decide it
+    name = code.co_name
+    filename = code.co_filename
+    if filename.endswith(os.path.join("config", "metrics.py")):
+        if name in ("execute", "executemany", "copy_expert"):
+            return "db"
+        if name == "run_operation":
+            return "service"
+    elif name in ("get_current_user", "decode_jwt_token"):
+        return "auth"
+    elif name in ("jsonable_encoder", "serialize_response") or (
+            name == "render" and filename.endswith(os.path.join("api", "responses.py"))):
+        return "json"
+    return None
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RequestProfile:
+    def __init__(self, method, path, loop_thread, anchor):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.loop_thread = loop_thread
+        # Frame of the middleware call; it is on the loop thread's stack only
+        # while this request's task is running
+        self.anchor = anchor
+        self.workers = set()
+        self._lock = threading.Lock()
+        self.stacks = {}
+        self.phases = dict.fromkeys(PROFILE_PHASES, 0)
+        self.started_at = time.time()
+        self.duration_ms = None
+        self.status = None
+
+    def attach_thread(self):
+        self.workers.add(threading.get_ident())
+
+    def detach_thread(self):
+        self.workers.discard(threading.get_ident())
+
+    def sample(self, frames):
+        with self._lock:
+            self._sample(frames)
+
+    def _sample(self, frames):
+        collected = False
+        loop_frame = frames.get(self.loop_thread)
+        if loop_frame is not None and self._on_stack(loop_frame):
+            self._add(loop_frame, self.anchor)
+            collected = True
+        for thread_id in tuple(self.workers):
+            frame = frames.get(thread_id)
+            if frame is not None:
+                self._add(frame, None)
+                collected = True
+        if not collected:
+            # Waiting on something unsampled: a worker slot, the client, I/O
+            self.phases["wait"] += 1
+            self.stacks["wait"] = self.stacks.get("wait", 0) + 1
+
+    def _on_stack(self, frame):
+        while frame is not None:
+            if frame is self.anchor:
+                return True
+            frame = frame.f_back
+        return False
+
+    def _add(self, frame, stop):
+        labels = []
+        phase = None
+        while frame is not None and frame is not stop:
+            code = frame.f_code
+            if phase is None:
+                phase = _phase(code)
+            labels.append(_frame_label(code))
+            frame = frame.f_back
+        phase = phase or "routing"
+        labels.append(phase)
+        stack = ";".join(reversed(labels))
+        self.phases[phase] += 1
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def folded(self):
+        with self._lock:
+            return sorted(self.stacks.items())
+
+    def summary(self):
+        with self._lock:
+            phases = dict(self.phases)
+        samples = sum(phases.values())
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "samples": samples,
+            "phases": {
+                phase: {"samples": count, "share": round(count / samples, 4) if samples else 0.0}
+                for phase, count in phases.items()
+            },
+        }
+
+
+class Sampler:
+    # One background thread samples every active profile; it only runs while
+    # at least one profiled request is in flight
+    def __init__(self, interval_ms=PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._lock = threading.Lock()
+        self._active = set()
+        self._thread = None
+
+    def start(self, profile):
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def stop(self, profile):
+        with self._lock:
+            self._active.discard(profile)
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = tuple(self._active)
+                if not active:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            frames.pop(own, None)
+            for profile in active:
+                profile.sample(frames)
+            del frames
+
+
+sampler = Sampler()
+
+
+def save_profile(profile, directory=PROFILE_DIR, max_files=PROFILE_MAX_FILES):
+    # Writes <id>.folded (collapsed stacks) and <id>.json (summary), then
+    # drops the oldest profiles beyond max_files
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{profile.id}.folded"), "w") as f:
+        for stack, count in profile.folded():
+            f.write(f"{stack} {count}\n")
+    with open(os.path.join(directory, f"{profile.id}.json"), "w") as f:
+        json.dump(profile.summary(), f)
+
+    summaries = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in summaries[:max(0, len(summaries) - max_files)]:
+        for suffix in (".json", ".folded"):
+            try:
+                os.remove(entry.path[:-len(".json")] + suffix)
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(directory=PROFILE_DIR, limit=50):
+    summaries = []
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.name.endswith(".json")]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[:limit]:
+        try:
+            with open(entry.path) as f:
+                summaries.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return summaries
+
+
+def profile_path(profile_id, directory=PROFILE_DIR):
+    # Path of a stored collapsed-stack file, or None
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = os.path.join(directory, f"{profile_id}.folded")
+    return path if os.path.exists(path) else None
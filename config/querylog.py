@@ -0,0 +1,194 @@
+import hashlib
+import os
+import queue
+import random
+import re
+import threading
+import time
+
+from psycopg2 import extensions
+
+from config.metrics import current_operation, query_hooks
+
+# Slow-query log (opt-in). Statements slower than SLOW_QUERY_MS are grouped
+# by normalized shape, so each filter combination of filter_alumni is its own
+# entry. EXPLAIN (ANALYZE, BUFFERS) runs again on a background connection for
+# the first slow call of a shape and then for a sample of calls.
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "false").lower() in ("1", "true", "yes", "on")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0.1"))  # share of later slow calls
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "10000"))
+SLOW_QUERY_MAX_SHAPES = int(os.getenv("SLOW_QUERY_MAX_SHAPES", "500"))
+
+SLOW_QUERY_ORDERS = ("total_ms", "max_ms", "mean_ms", "calls")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"%(?:\([^)]*\))?s")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+# Plan lines that carry the statement's constants (Filter, Index Cond,
+# Recheck Cond, Hash Cond, Sort Key, ...); costs, timings and buffer counts
+# on the other lines are kept
+_PLAN_CONDITION = re.compile(r"^(\s*(?!Rows Removed)(?:[\w-]+ )*(?:Filter|Cond|Key|Output): )(.*)$", re.MULTILINE)
+_QUOTED = re.compile(r'"(?:[^"]|"")*"')
+_PLAN_NUMBER = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?(?![\w.])")
+
+
+def normalize_query(query):
+    # Statement text with literals and placeholders replaced by ?, lists of
+    # them collapsed and whitespace squeezed
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    shape = _STRING_LITERAL.sub("?", str(query))
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _VALUE_LIST.sub("(...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def _redact(value):
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    if isinstance(value, (list, tuple)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_plan(plan):
+    # EXPLAIN ANALYZE runs with the real parameters, so the plan text shows
+    # them in its conditions; string literals anywhere and numbers in
+    # condition lines become ?, like in the shape
+    plan = _STRING_LITERAL.sub("?", plan)
+    return _PLAN_CONDITION.sub(lambda m: m.group(1) + _PLAN_NUMBER.sub("?", m.group(2)), plan)
+
+
+def redact_params(vars):
+    # Parameter types and sizes only; values never leave the request
+    if vars is None:
+        return None
+    if isinstance(vars, dict):
+        return {key: _redact(value) for key, value in vars.items()}
+    return [_redact(value) for value in vars]
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms=SLOW_QUERY_MS, explain_sample=SLOW_QUERY_EXPLAIN_SAMPLE,
+                 max_shapes=SLOW_QUERY_MAX_SHAPES, connect=None):
+        self.threshold_ms = threshold_ms
+        self.explain_sample = explain_sample
+        self.max_shapes = max_shapes
+        # Returns a pooled connection for EXPLAIN runs (set by config.main)
+        self.connect = connect
+        self._lock = threading.Lock()
+        self._shapes = {}
+        self._explains = queue.Queue(maxsize=16)
+        self._worker = None
+        self._local = threading.local()
+
+    def observe(self, cursor, query, vars, elapsed):
+        # Query hook; everything under the threshold returns here
+        if elapsed * 1000 < self.threshold_ms or getattr(self._local, "explaining", False):
+            return
+        try:
+            self.record(cursor, query, vars, elapsed)
+        except Exception as e:
+            print(f"Slow query log failed: {e}")
+
+    def record(self, cursor, query, vars, elapsed):
+        shape = normalize_query(query)
+        fingerprint = hashlib.sha1(shape.encode()).hexdigest()[:12]
+        operation = current_operation.get()
+        elapsed_ms = elapsed * 1000
+        params = redact_params(vars)
+
+        with self._lock:
+            entry = self._shapes.get(fingerprint)
+            if entry is None:
+                if len(self._shapes) >= self.max_shapes:
+                    # Make room by dropping the shape with the least total time
+                    del self._shapes[min(self._shapes, key=lambda key: self._shapes[key]["total_ms"])]
+                entry = self._shapes[fingerprint] = {
+                    "fingerprint": fingerprint, "shape": shape, "calls": 0, "total_ms": 0.0,
+                    "max_ms": 0.0, "last_ms": 0.0, "last_seen": None, "operations": set(),
+                    "params": None, "plan": None, "plan_ms": None, "plan_captured_at": None,
+                }
+            entry["calls"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["last_ms"] = elapsed_ms
+            entry["last_seen"] = time.time()
+            entry["operations"].add(operation)
+            if elapsed_ms >= entry["max_ms"]:
+                entry["max_ms"] = elapsed_ms
+                entry["params"] = params
+            explain = entry["plan"] is None or random.random() < self.explain_sample
+
+        print(f"Slow query ({elapsed_ms:.1f} ms, {operation}, {fingerprint}): {shape[:500]} params={params}")
+
+        # ANALYZE executes the statement again, so only plain SELECTs qualify
+        if explain and self.connect is not None and shape[:6].upper() == "SELECT":
+            try:
+                self._explains.put_nowait((fingerprint, cursor.mogrify(query, vars)))
+            except queue.Full:
+                return
+            self._start_worker()
+
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run_explains, name="slow-query-explain", daemon=True)
+                self._worker.start()
+
+    def _run_explains(self):
+        self._local.explaining = True
+        while True:
+            fingerprint, sql = self._explains.get()
+            conn = self.connect()
+            if not conn:
+                continue
+            try:
+                cursor = conn.cursor(cursor_factory=extensions.cursor)
+                cursor.execute("SET LOCAL statement_timeout = %s", (SLOW_QUERY_EXPLAIN_TIMEOUT_MS,))
+                start = time.perf_counter()
+                cursor.execute(b"EXPLAIN (ANALYZE, BUFFERS) " + sql)
+                plan_ms = (time.perf_counter() - start) * 1000
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+            except Exception as e:
+                # Errors quote the offending value ("invalid input syntax ...: "x"")
+                plan, plan_ms = f"EXPLAIN failed: {_QUOTED.sub('?', str(e))}", None
+            finally:
+                # Nothing from the EXPLAIN run is kept
+                conn.rollback()
+                conn.close()
+            plan = redact_plan(plan)
+            with self._lock:
+                entry = self._shapes.get(fingerprint)
+                if entry is not None:
+                    entry["plan"] = plan
+                    entry["plan_ms"] = round(plan_ms, 3) if plan_ms is not None else None
+                    entry["plan_captured_at"] = time.time()
+
+    def top(self, limit=20, order="total_ms"):
+        with self._lock:
+            entries = [
+                {**entry, "operations": sorted(entry["operations"]),
+                 "mean_ms": entry["total_ms"] / entry["calls"]}
+                for entry in self._shapes.values()
+            ]
+        entries.sort(key=lambda entry: entry[order], reverse=True)
+        for entry in entries:
+            for key in ("total_ms", "max_ms", "last_ms", "mean_ms"):
+                entry[key] = round(entry[key], 3)
+        return entries[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._shapes.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+if SLOW_QUERY_LOG:
+    query_hooks.append(slow_query_log.observe)
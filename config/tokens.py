@@ -0,0 +1,321 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# How often a worker polls the shared revocation version; revocations made by
+# other workers apply within this time
+TOKEN_REVOCATION_CHECK_INTERVAL = float(os.getenv("TOKEN_REVOCATION_CHECK_INTERVAL", "2"))  # seconds
+TOKEN_STORE_ERROR_LOG_INTERVAL = 60  # seconds between repeated store error messages
+
+
+# Revocations shared by every worker and kept across restarts. Each store
+# keeps a global version that every revocation bumps, so workers only reload
+# the (small) deny list when something was revoked. A subject revocation
+# rejects tokens issued (iat) at or before it.
+class RedisRevocationStore:
+    def __init__(self, client, prefix="alumni:revoked:"):
+        self.client = client
+        self.prefix = prefix
+
+    def revoke_token(self, digest, expires_at):
+        pipe = self.client.pipeline()
+        pipe.hset(f"{self.prefix}tokens", digest.hex(), str(expires_at))
+        pipe.incr(f"{self.prefix}version")
+        pipe.execute()
+
+    def revoke_subject(self, subject, revoked_at, ttl):
+        pipe = self.client.pipeline()
+        pipe.hset(f"{self.prefix}subjects", subject, str(revoked_at))
+        pipe.incr(f"{self.prefix}version")
+        pipe.execute()
+
+    def version(self):
+        value = self.client.get(f"{self.prefix}version")
+        return int(value) if value is not None else 0
+
+    def load(self, max_age):
+        # Entries that can no longer match a live token are dropped from the
+        # hashes here, so they stay bounded
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.hgetall(f"{self.prefix}tokens")
+        pipe.hgetall(f"{self.prefix}subjects")
+        raw_tokens, raw_subjects = pipe.execute()
+        tokens, subjects, expired_tokens, expired_subjects = {}, {}, [], []
+        for key, value in raw_tokens.items():
+            key = key.decode() if isinstance(key, bytes) else key
+            if float(value) > now:
+                tokens[bytes.fromhex(key)] = float(value)
+            else:
+                expired_tokens.append(key)
+        for key, value in raw_subjects.items():
+            key = key.decode() if isinstance(key, bytes) else key
+            if float(value) + max_age > now:
+                subjects[key] = float(value)
+            else:
+                expired_subjects.append(key)
+        if expired_tokens:
+            self.client.hdel(f"{self.prefix}tokens", *expired_tokens)
+        if expired_subjects:
+            self.client.hdel(f"{self.prefix}subjects", *expired_subjects)
+        return tokens, subjects
+
+
+# Postgres variant: revoked_tokens, revoked_subjects and the
+# token_revocation_version sequence (migrations/0004_token_revocations.sql).
+# revoked_subjects has no foreign key, so it outlives deleted accounts.
+class DatabaseRevocationStore:
+    def __init__(self, connect):
+        self.connect = connect
+
+    def _run(self, statements):
+        conn = self.connect()
+        if not conn:
+            raise RuntimeError("Database connection failed")
+        try:
+            cursor = conn.cursor()
+            results = []
+            for query, params in statements:
+                cursor.execute(query, params)
+                results.append(cursor.fetchall() if cursor.description else None)
+            conn.commit()
+            return results
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def revoke_token(self, digest, expires_at):
+        self._run([
+            ("DELETE FROM revoked_tokens WHERE expires_at < CURRENT_TIMESTAMP", None),
+            ("""INSERT INTO revoked_tokens (digest, expires_at) VALUES (%s, to_timestamp(%s))
+                ON CONFLICT (digest) DO NOTHING""", (digest, expires_at)),
+            ("SELECT nextval('token_revocation_version')", None),
+        ])
+
+    def revoke_subject(self, subject, revoked_at, ttl):
+        self._run([
+            ("DELETE FROM revoked_subjects WHERE revoked_at < CURRENT_TIMESTAMP - make_interval(secs => %s)",
+             (ttl,)),
+            ("""INSERT INTO revoked_subjects (user_id, revoked_at) VALUES (%s, to_timestamp(%s))
+                ON CONFLICT (user_id) DO UPDATE SET revoked_at = EXCLUDED.revoked_at""",
+             (int(subject), revoked_at)),
+            ("SELECT nextval('token_revocation_version')", None),
+        ])
+
+    def version(self):
+        (rows,) = self._run([(
+            "SELECT CASE WHEN is_called THEN last_value ELSE 0 END AS version FROM token_revocation_version",
+            None
+        )])
+        return rows[0]["version"]
+
+    def load(self, max_age):
+        token_rows, subject_rows = self._run([
+            ("""SELECT digest, EXTRACT(EPOCH FROM expires_at) AS expires_at
+                FROM revoked_tokens WHERE expires_at > CURRENT_TIMESTAMP""", None),
+            ("""SELECT user_id, EXTRACT(EPOCH FROM revoked_at) AS revoked_at
+                FROM revoked_subjects WHERE revoked_at > CURRENT_TIMESTAMP - make_interval(secs => %s)""",
+             (max_age,)),
+        ])
+        tokens = {bytes(row["digest"]): float(row["expires_at"]) for row in token_rows}
+        subjects = {str(row["user_id"]): float(row["revoked_at"]) for row in subject_rows}
+        return tokens, subjects
+
+
+# Bounded LRU of verified JWT claims keyed by a digest of the token, plus a
+# deny list checked on every lookup. Entries are only served until the
+# token's exp. With a store, revocations are also written there, and the
+# deny list is refreshed from it in a background thread whenever the store's
+# version changes (polled at most every check_interval seconds), so lookups
+# never wait on the store.
+class TokenCache:
+    def __init__(self, decode, max_entries=TOKEN_CACHE_SIZE, max_token_age=None, store=None,
+                 check_interval=TOKEN_REVOCATION_CHECK_INTERVAL):
+        self._decode = decode
+        self.max_entries = max_entries
+        # How long a subject revocation has to be remembered: no token
+        # issued before it can outlive this
+        self.max_token_age = max_token_age
+        self.store = store
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._revoked_tokens = {}
+        self._revoked_subjects = {}
+        self._store_version = None
+        self._polled_at = None
+        self._syncing = False
+        self._error_logged_at = None
+        self._errors_suppressed = 0
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.syncs = 0
+        self.store_errors = 0
+
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def _is_revoked(self, digest, claims):
+        if digest in self._revoked_tokens:
+            return True
+        revoked_at = self._revoked_subjects.get(claims.get("sub"))
+        return revoked_at is not None and claims.get("iat", 0) <= revoked_at
+
+    def decode(self, token):
+        # No I/O: the signature check plus in-memory lookups
+        self._poll()
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[1] <= time.time():
+                del self._entries[digest]
+                entry = None
+            if entry is not None:
+                if self._is_revoked(digest, entry[0]):
+                    self.rejected += 1
+                    return None
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return dict(entry[0])
+            self.misses += 1
+
+        claims = self._decode(token)
+        if claims is None:
+            return None
+        with self._lock:
+            if self._is_revoked(digest, claims):
+                self.rejected += 1
+                return None
+            expires_at = claims.get("exp")
+            if expires_at is not None:
+                self._entries[digest] = (claims, expires_at)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return dict(claims)
+
+    def _poll(self):
+        # Starts a background sync when the store is due for a version check
+        if self.store is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._syncing or (self._polled_at is not None and now - self._polled_at < self.check_interval):
+                return
+            self._syncing = True
+            self._polled_at = now
+        threading.Thread(target=self._sync_in_background, name="token-revocation-sync", daemon=True).start()
+
+    def _sync_in_background(self):
+        try:
+            self.sync()
+        finally:
+            with self._lock:
+                self._syncing = False
+
+    def sync(self, force=False):
+        # Blocking: reloads the deny list if the store's version changed (or
+        # always, with force).
+        # Returns False when the store could not be read; the previous deny
+        # list stays in force and lookups carry on without it (fail open).
+        if self.store is None:
+            return True
+        try:
+            version = self.store.version()
+            if version == self._store_version and not force:
+                return True
+            tokens, subjects = self.store.load(self.max_token_age or 86400)
+        except Exception as e:
+            self._store_error("Token revocation sync failed", e)
+            return False
+        with self._lock:
+            for digest, expires_at in tokens.items():
+                self._revoked_tokens[digest] = max(expires_at, self._revoked_tokens.get(digest, 0))
+            for subject, revoked_at in subjects.items():
+                self._revoked_subjects[subject] = max(revoked_at, self._revoked_subjects.get(subject, 0))
+            self._prune()
+            self._store_version = version
+            self.syncs += 1
+        return True
+
+    def revoke_token(self, token, expires_at=None):
+        # Blocking when a store is configured; returns whether the store has it
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.pop(digest, None)
+            if expires_at is None:
+                expires_at = entry[1] if entry else time.time() + (self.max_token_age or 86400)
+            self._revoked_tokens[digest] = expires_at
+            self._prune()
+        return self._store_write(self.store and self.store.revoke_token, digest, expires_at)
+
+    def revoke_subject(self, subject):
+        # Rejects every token for this subject issued up to now. Blocking
+        # when a store is configured; returns whether the store has it.
+        revoked_at = int(time.time())
+        with self._lock:
+            self._revoked_subjects[str(subject)] = revoked_at
+            self._prune()
+        return self._store_write(self.store and self.store.revoke_subject,
+                                 str(subject), revoked_at, self.max_token_age or 86400)
+
+    def _store_write(self, method, *args):
+        # False if the revocation only reached this worker
+        if method is None:
+            return True
+        try:
+            method(*args)
+            return True
+        except Exception as e:
+            self._store_error("Storing token revocation failed", e)
+            return False
+
+    def _store_error(self, message, error):
+        # Counted every time, printed at most once per TOKEN_STORE_ERROR_LOG_INTERVAL
+        now = time.monotonic()
+        with self._lock:
+            self.store_errors += 1
+            if self._error_logged_at is not None and now - self._error_logged_at < TOKEN_STORE_ERROR_LOG_INTERVAL:
+                self._errors_suppressed += 1
+                return
+            suppressed, self._errors_suppressed = self._errors_suppressed, 0
+            self._error_logged_at = now
+        print(f"{message}: {error}" + (f" ({suppressed} similar errors suppressed)" if suppressed else ""))
+
+    def _prune(self):
+        now = time.time()
+        self._revoked_tokens = {
+            digest: expires_at for digest, expires_at in self._revoked_tokens.items() if expires_at > now
+        }
+        if self.max_token_age:
+            self._revoked_subjects = {
+                subject: revoked_at for subject, revoked_at in self._revoked_subjects.items()
+                if revoked_at + self.max_token_age > now
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "rejected_revoked": self.rejected,
+                "revoked_tokens": len(self._revoked_tokens),
+                "revoked_subjects": len(self._revoked_subjects),
+                "store": type(self.store).__name__ if self.store is not None else None,
+                "store_version": self._store_version,
+                "syncs": self.syncs,
+                "store_errors": self.store_errors,
+                "check_interval": self.check_interval,
+            }
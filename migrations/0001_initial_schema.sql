@@ -1,3 +1,8 @@
+-- Baseline: the original schema.sql, without its trailing MySQL-style ALTER
+-- TABLE statements (the foreign keys they added are declared on the tables).
+-- Databases created from that file are marked as being at this version with
+--   python -m config.migrations baseline 1
+
 -- Create users table for PostgreSQL
 CREATE TABLE users (
   user_id SERIAL PRIMARY KEY,
@@ -120,11 +125,3 @@ INSERT INTO jobs (alumni_id, company_name, position, location, start_date, end_d
 CREATE INDEX idx_jobs_company_name ON jobs (company_name);
 CREATE INDEX idx_jobs_position ON jobs (position);
 CREATE INDEX idx_jobs_is_current ON jobs (is_current);
-
-ALTER TABLE `admin` ADD FOREIGN KEY (`user_id`) REFERENCES `users` (`user_id`) ON DELETE CASCADE;
-
-ALTER TABLE `alumni` ADD FOREIGN KEY (`user_id`) REFERENCES `users` (`user_id`) ON DELETE CASCADE;
-
-ALTER TABLE `education` ADD FOREIGN KEY (`alumni_id`) REFERENCES `alumni` (`alumni_id`) ON DELETE CASCADE;
-
-ALTER TABLE `jobs` ADD FOREIGN KEY (`alumni_id`) REFERENCES `alumni` (`alumni_id`) ON DELETE CASCADE;
\ No newline at end of file
@@ -0,0 +1,102 @@
+-- migrate: no-transaction
+-- Objects added after the original schema.sql: the keyset pagination index,
+-- the profile image index, trigram indexes for the ILIKE '%...%' filters and
+-- the alumni_search documents with their refresh functions and triggers.
+-- Indexes on existing tables are built CONCURRENTLY, so this file runs
+-- outside a transaction. Every statement is idempotent, so a database that
+-- already has some of these objects, or a run that was interrupted, can
+-- simply run it again (drop any INVALID index an interrupted build leaves).
+
+/* (full_name, alumni_id) serves ORDER BY and keyset pagination in
+   get_all_alumni and filter_alumni; it replaces idx_alumni_full_name */
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alumni_full_name_id ON alumni (full_name, alumni_id);
+DROP INDEX CONCURRENTLY IF EXISTS idx_alumni_full_name;
+
+/* Reference counts and garbage collection of profile image blobs */
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alumni_profile_image ON alumni (profile_image);
+
+-- Full-text and trigram search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+/* Trigram indexes let the ILIKE '%...%' filters in filter_alumni use an index */
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alumni_full_name_trgm ON alumni USING GIN (full_name gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alumni_current_location_trgm ON alumni USING GIN (current_location gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_jobs_company_name_trgm ON jobs USING GIN (company_name gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_jobs_position_trgm ON jobs USING GIN (position gin_trgm_ops);
+
+/* One search document per alumni, maintained by the triggers below */
+CREATE TABLE IF NOT EXISTS alumni_search (
+  alumni_id INTEGER PRIMARY KEY REFERENCES alumni(alumni_id) ON DELETE CASCADE,
+  document TSVECTOR NOT NULL,
+  search_text TEXT NOT NULL,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_alumni_search_document ON alumni_search USING GIN (document);
+CREATE INDEX IF NOT EXISTS idx_alumni_search_text_trgm ON alumni_search USING GIN (search_text gin_trgm_ops);
+
+/* Weights: A name, B companies and positions, C departments and location, D bio.
+   Set-wise so bulk loads can refresh many documents in one statement. */
+CREATE OR REPLACE FUNCTION refresh_alumni_search_many(p_alumni_ids INTEGER[]) RETURNS void AS $$
+  INSERT INTO alumni_search (alumni_id, document, search_text)
+  SELECT a.alumni_id,
+         setweight(to_tsvector('simple', coalesce(a.full_name, '')), 'A')
+      || setweight(to_tsvector('simple', coalesce(j.companies, '') || ' ' || coalesce(j.positions, '')), 'B')
+      || setweight(to_tsvector('simple', coalesce(e.departments, '') || ' ' || coalesce(a.current_location, '')), 'C')
+      || setweight(to_tsvector('simple', coalesce(a.bio, '')), 'D'),
+         lower(concat_ws(' ', a.full_name, a.current_location, j.companies, j.positions, e.departments))
+  FROM alumni a
+  LEFT JOIN (
+    SELECT alumni_id, string_agg(company_name, ' ') AS companies, string_agg(position, ' ') AS positions
+    FROM jobs WHERE alumni_id = ANY(p_alumni_ids) GROUP BY alumni_id
+  ) j ON j.alumni_id = a.alumni_id
+  LEFT JOIN (
+    SELECT alumni_id, string_agg(department, ' ') AS departments
+    FROM education WHERE alumni_id = ANY(p_alumni_ids) GROUP BY alumni_id
+  ) e ON e.alumni_id = a.alumni_id
+  WHERE a.alumni_id = ANY(p_alumni_ids)
+  ON CONFLICT (alumni_id) DO UPDATE
+    SET document = EXCLUDED.document,
+        search_text = EXCLUDED.search_text,
+        updated_at = CURRENT_TIMESTAMP;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION refresh_alumni_search(p_alumni_id INTEGER) RETURNS void AS $$
+BEGIN
+  PERFORM refresh_alumni_search_many(ARRAY[p_alumni_id]);
+END;
+$$ LANGUAGE plpgsql;
+
+/* Bulk loads set alumni_search.deferred for their transaction and call
+   refresh_alumni_search_many once instead (see services/imports.py) */
+CREATE OR REPLACE FUNCTION alumni_search_trigger() RETURNS trigger AS $$
+BEGIN
+  IF current_setting('alumni_search.deferred', true) = 'on' THEN
+    RETURN NULL;
+  END IF;
+  IF TG_OP = 'DELETE' THEN
+    IF TG_TABLE_NAME <> 'alumni' THEN
+      PERFORM refresh_alumni_search(OLD.alumni_id);
+    END IF;
+    RETURN OLD;
+  END IF;
+  PERFORM refresh_alumni_search(NEW.alumni_id);
+  IF TG_OP = 'UPDATE' AND TG_TABLE_NAME <> 'alumni' AND OLD.alumni_id <> NEW.alumni_id THEN
+    PERFORM refresh_alumni_search(OLD.alumni_id);
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_alumni_search_alumni
+  AFTER INSERT OR UPDATE OF full_name, bio, current_location ON alumni
+  FOR EACH ROW EXECUTE FUNCTION alumni_search_trigger();
+CREATE OR REPLACE TRIGGER trg_alumni_search_education
+  AFTER INSERT OR DELETE OR UPDATE OF department, alumni_id ON education
+  FOR EACH ROW EXECUTE FUNCTION alumni_search_trigger();
+CREATE OR REPLACE TRIGGER trg_alumni_search_jobs
+  AFTER INSERT OR DELETE OR UPDATE OF company_name, position, alumni_id ON jobs
+  FOR EACH ROW EXECUTE FUNCTION alumni_search_trigger();
+
+/* Backfill documents for existing rows; the triggers above keep them
+   current from here on */
+SELECT refresh_alumni_search_many(ARRAY(SELECT alumni_id FROM alumni));
@@ -0,0 +1,31 @@
+-- migrate: no-transaction
+-- Indexes for the queries the services actually run (benchmarks/explain_queries.py
+-- checks them against a seeded dataset). Built CONCURRENTLY so writes continue
+-- during the build, which means this file runs outside a transaction. If a build
+-- is interrupted, drop the INVALID index it leaves behind before running again.
+
+/* Child rows by alumni: the profile document, batch reads (ORDER BY alumni_id,
+   education_id / job_id), the EXISTS semi-joins of filter_alumni, per-profile
+   facet and search refreshes, and ON DELETE CASCADE from alumni */
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_education_alumni_id ON education (alumni_id, education_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_jobs_alumni_id ON jobs (alumni_id, job_id);
+
+/* filter_alumni: department and end_year (graduation year) are the common
+   education filters, alone and together. The pair index also serves
+   department on its own, so it replaces idx_education_department. */
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_education_department_end_year ON education (department, end_year);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_education_end_year ON education (end_year);
+DROP INDEX CONCURRENTLY IF EXISTS idx_education_department;
+
+/* Indexes no query can use, which only slow down writes: users.email and
+   users.username duplicate their UNIQUE constraints, nothing filters on
+   jobs.is_current, and company_name, position and current_location are only
+   matched with ILIKE '%...%', which the trigram indexes serve */
+DROP INDEX CONCURRENTLY IF EXISTS idx_users_email;
+DROP INDEX CONCURRENTLY IF EXISTS idx_users_username;
+DROP INDEX CONCURRENTLY IF EXISTS idx_jobs_is_current;
+DROP INDEX CONCURRENTLY IF EXISTS idx_jobs_company_name;
+DROP INDEX CONCURRENTLY IF EXISTS idx_jobs_position;
+DROP INDEX CONCURRENTLY IF EXISTS idx_alumni_current_location;
+
+ANALYZE education, jobs;
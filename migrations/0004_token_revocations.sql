@@ -0,0 +1,17 @@
+-- Token revocations shared by every API worker (config/tokens.py). Logged-out
+-- tokens are kept until they expire; a revoked_subjects row rejects every token
+-- of that user issued at or before revoked_at. Every revocation bumps
+-- token_revocation_version, which workers poll to know when to reload.
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+  digest BYTEA PRIMARY KEY,
+  expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens (expires_at);
+
+-- No foreign key: the row has to outlive a deleted account
+CREATE TABLE IF NOT EXISTS revoked_subjects (
+  user_id INTEGER PRIMARY KEY,
+  revoked_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE SEQUENCE IF NOT EXISTS token_revocation_version;
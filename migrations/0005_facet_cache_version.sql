@@ -0,0 +1,4 @@
+-- Shared version of the filter facets (services/facets.py). Every write made
+-- through the services bumps it; API workers poll it to know when another
+-- worker changed the data their facet cache was built from.
+CREATE SEQUENCE IF NOT EXISTS facet_cache_version;
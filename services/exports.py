@@ -0,0 +1,132 @@
+from config.main import get_db_connection
+from services.main import AsyncService, build_alumni_filter
+import csv
+import io
+import os
+import threading
+import uuid
+from psycopg2.extensions import cursor as TupleCursor
+
+# Export configuration
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))  # rows per FETCH
+# Each running export holds a pooled connection until its last row is sent
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+EXPORT_FORMATS = ("csv", "ndjson")
+
+EXPORT_COLUMNS = [
+    "alumni_id", "user_id", "username", "email", "full_name", "date_of_birth", "gender",
+    "bio", "contact_number", "address", "graduation_year", "current_location",
+    "profile_image", "social_media_links", "availability_for_mentorship",
+    "created_at", "updated_at",
+]
+
+# Same rows and order as filter_alumni; NDJSON lines are built by Postgres
+CSV_EXPORT_QUERY = """
+    SELECT a.alumni_id, a.user_id, u.username, u.email, a.full_name, a.date_of_birth, a.gender,
+           a.bio, a.contact_number, a.address, a.graduation_year, a.current_location,
+           a.profile_image, a.social_media_links::text, a.availability_for_mentorship,
+           a.created_at, a.updated_at
+    FROM alumni a
+    JOIN users u ON a.user_id = u.user_id
+    WHERE {where}
+    ORDER BY a.full_name, a.alumni_id
+"""
+NDJSON_EXPORT_QUERY = """
+    SELECT (to_jsonb(a) || jsonb_build_object('email', u.email, 'username', u.username))::text
+    FROM alumni a
+    JOIN users u ON a.user_id = u.user_id
+    WHERE {where}
+    ORDER BY a.full_name, a.alumni_id
+"""
+
+_export_slots = threading.BoundedSemaphore(EXPORT_MAX_CONCURRENT)
+
+
+class _ExportStream:
+    # Blocking iterator of encoded chunks; StreamingResponse pulls it on
+    # worker threads. Holds the connection and an export slot until it is
+    # exhausted, closed or garbage collected (e.g. after a client disconnect).
+    def __init__(self, conn, cursor, rows, fmt):
+        self._conn = conn
+        self._cursor = cursor
+        self._rows = rows
+        self._fmt = fmt
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._header = fmt == "csv"
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed:
+            raise StopIteration
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        if self._header:
+            self._header = False
+            self._writer.writerow(EXPORT_COLUMNS)
+            return self._buffer.getvalue().encode()
+        if self._rows is None:
+            try:
+                self._rows = self._cursor.fetchmany(EXPORT_BATCH_SIZE)
+            except Exception:
+                self.close()
+                raise
+        if not self._rows:
+            self.close()
+            raise StopIteration
+        rows, self._rows = self._rows, None
+        if self._fmt == "csv":
+            self._writer.writerows(rows)
+        else:
+            for (line,) in rows:
+                self._buffer.write(line)
+                self._buffer.write("\n")
+        return self._buffer.getvalue().encode()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._conn.close()
+            _export_slots.release()
+
+    def __del__(self):
+        self.close()
+
+
+# Export Services
+class ExportService:
+    @staticmethod
+    def export_alumni(filters, fmt="csv"):
+        # Streams filter_alumni's result set through a server-side cursor, a
+        # batch at a time, so memory stays flat at any result size. The
+        # first batch is fetched here so query errors surface before the
+        # response starts; the rest is pulled as the client reads.
+        if fmt not in EXPORT_FORMATS:
+            return {"error": f"Unsupported format; use one of: {', '.join(EXPORT_FORMATS)}"}
+        if not _export_slots.acquire(blocking=False):
+            return {"error": "Too many exports in progress", "status_code": 429}
+
+        conn = get_db_connection()
+        if not conn:
+            _export_slots.release()
+            return {"error": "Database connection failed"}
+
+        try:
+            where, params = build_alumni_filter(filters)
+            query = CSV_EXPORT_QUERY if fmt == "csv" else NDJSON_EXPORT_QUERY
+            cursor = conn.cursor(name=f"alumni_export_{uuid.uuid4().hex}", cursor_factory=TupleCursor)
+            cursor.itersize = EXPORT_BATCH_SIZE
+            cursor.execute(query.format(where=where), params)
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+        except Exception as e:
+            conn.close()
+            _export_slots.release()
+            return {"error": str(e)}
+
+        return {"stream": _ExportStream(conn, cursor, rows, fmt)}
+
+
+AsyncExportService = AsyncService(ExportService)
@@ -0,0 +1,363 @@
+from collections import Counter
+from psycopg2.extensions import cursor as TupleCursor
+from config.cache import RedisBackend, profile_cache
+from config.main import get_db_connection
+import json
+import os
+import sys
+import threading
+import time
+
+# Full rebuild interval. Writes made through the services update the cache in
+# place; the rebuild picks up changes made directly in SQL.
+FACET_CACHE_TTL = float(os.getenv("FACET_CACHE_TTL", "300"))  # seconds
+# How often a worker checks the shared facet version for writes made by other
+# workers, which trigger a background rebuild
+FACET_SYNC_INTERVAL = float(os.getenv("FACET_SYNC_INTERVAL", "10"))  # seconds
+FACET_ERROR_LOG_INTERVAL = 60  # seconds between repeated version store errors
+
+# facet name -> (table, column)
+FACET_SOURCES = {
+    "departments": ("education", "department"),
+    "graduation_years": ("education", "end_year"),
+    "start_years": ("education", "start_year"),
+    "degrees": ("education", "degree"),
+    "companies": ("jobs", "company_name"),
+    "positions": ("jobs", "position"),
+    "locations": ("alumni", "current_location"),
+}
+YEAR_FACETS = ("graduation_years", "start_years")
+
+def _facet_query(per_alumni=False):
+    # One row per distinct (alumni, facet, value)
+    where = " AND alumni_id = %(alumni_id)s" if per_alumni else ""
+    return " UNION ".join(
+        f"SELECT alumni_id, '{facet}' AS facet, {column}::text AS value "
+        f"FROM {table} WHERE {column} IS NOT NULL{where}"
+        for facet, (table, column) in FACET_SOURCES.items()
+    )
+
+FACET_QUERY = _facet_query()
+ALUMNI_FACET_QUERY = _facet_query(per_alumni=True)
+
+def _pair(row):
+    facet = row["facet"]
+    value = int(row["value"]) if facet in YEAR_FACETS else sys.intern(row["value"])
+    return facet, value
+
+
+# Shared version of the facet data, bumped by every write made through the
+# services. Workers compare it with the version their cache was built from.
+class RedisFacetVersion:
+    def __init__(self, client, key="alumni:facets:version"):
+        self.client = client
+        self.key = key
+
+    def bump(self, cursor=None):
+        return int(self.client.incr(self.key))
+
+    def read(self):
+        value = self.client.get(self.key)
+        return int(value) if value is not None else 0
+
+
+# Postgres variant: the facet_cache_version sequence
+# (migrations/0005_facet_cache_version.sql). nextval is not transactional, so
+# the writer's connection can bump it after its commit.
+class DatabaseFacetVersion:
+    def __init__(self, connect):
+        self.connect = connect
+
+    def _fetch(self, query, cursor=None):
+        if cursor is not None:
+            tuple_cursor = cursor.connection.cursor(cursor_factory=TupleCursor)
+            tuple_cursor.execute(query)
+            return tuple_cursor.fetchone()[0]
+        conn = self.connect()
+        if not conn:
+            raise RuntimeError("Database connection failed")
+        try:
+            return self._fetch(query, conn.cursor())
+        finally:
+            conn.close()
+
+    def bump(self, cursor=None):
+        return self._fetch("SELECT nextval('facet_cache_version')", cursor)
+
+    def read(self):
+        return self._fetch("SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM facet_cache_version")
+
+
+# In-memory filter facets with per-value alumni counts. Each alumni's
+# (facet, value) pairs are remembered so a write to one profile only adjusts
+# the counts that profile contributed to. Writes also bump the shared
+# version; a worker that sees another worker's bump (checked at most every
+# sync_interval) rebuilds in the background. Once loaded, reads never wait on
+# a rebuild: the previous data is served until the new one is in place.
+class FacetCache:
+    def __init__(self, ttl=FACET_CACHE_TTL, version_store=None, sync_interval=FACET_SYNC_INTERVAL):
+        self.ttl = ttl
+        self.version_store = version_store
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.RLock()
+        self._contributions = {}
+        self._counts = {facet: Counter() for facet in FACET_SOURCES}
+        self._expires_at = 0.0
+        self._loaded = False
+        self._rebuilding = False
+        self._dirty_during_rebuild = set()
+        self._categories = None
+        self._categories_json = None
+        self._version = None
+        self._polled_at = None
+        self._refreshing = False
+        self._error_logged_at = None
+        self.rebuilds = 0
+        self.version_errors = 0
+
+    def _apply(self, alumni_id, pairs):
+        old = self._contributions.pop(alumni_id, frozenset())
+        for facet, value in old - pairs:
+            counter = self._counts[facet]
+            counter[value] -= 1
+            if counter[value] <= 0:
+                del counter[value]
+        for facet, value in pairs - old:
+            self._counts[facet][value] += 1
+        if pairs:
+            self._contributions[alumni_id] = pairs
+        self._categories = None
+        self._categories_json = None
+
+    def _fetch_alumni(self, cursor, alumni_id):
+        cursor.execute(ALUMNI_FACET_QUERY, {"alumni_id": alumni_id})
+        return frozenset(_pair(row) for row in cursor.fetchall())
+
+    def rebuild(self, cursor, version=None):
+        # version is the shared version read before the scan, so writes
+        # that land during it trigger another rebuild
+        with self._rebuild_lock:
+            with self._lock:
+                self._rebuilding = True
+                self._dirty_during_rebuild = set()
+            try:
+                cursor.execute(FACET_QUERY)
+                grouped = {}
+                for row in cursor.fetchall():
+                    grouped.setdefault(row["alumni_id"], set()).add(_pair(row))
+
+                counts = {facet: Counter() for facet in FACET_SOURCES}
+                contributions = {}
+                for alumni_id, pairs in grouped.items():
+                    pairs = frozenset(pairs)
+                    contributions[alumni_id] = pairs
+                    for facet, value in pairs:
+                        counts[facet][value] += 1
+
+                with self._lock:
+                    self._counts = counts
+                    self._contributions = contributions
+                    self._categories = None
+                    self._categories_json = None
+                    self._loaded = True
+                    self._expires_at = time.monotonic() + self.ttl
+                    if version is not None:
+                        self._version = version
+                    self.rebuilds += 1
+                    dirty = self._dirty_during_rebuild
+                    self._rebuilding = False
+
+                # Profiles written while the full scan ran may be missing from
+                # its snapshot; re-read them
+                for alumni_id in dirty:
+                    pairs = self._fetch_alumni(cursor, alumni_id)
+                    with self._lock:
+                        self._apply(alumni_id, pairs)
+            finally:
+                with self._lock:
+                    self._rebuilding = False
+
+    def refresh_alumni(self, cursor, alumni_id):
+        # Called by the services after committing a write for this alumni
+        with self._lock:
+            if self._rebuilding:
+                self._dirty_during_rebuild.add(alumni_id)
+            loaded = self._loaded
+        if loaded:
+            try:
+                pairs = self._fetch_alumni(cursor, alumni_id)
+            except Exception as e:
+                print(f"Facet cache refresh failed: {e}")
+                self.invalidate()
+                return
+            with self._lock:
+                self._apply(alumni_id, pairs)
+        self._bump(cursor)
+
+    def remove_alumni(self, cursor, alumni_id):
+        # cursor may be None; the version store then uses its own connection
+        with self._lock:
+            if self._loaded:
+                self._apply(alumni_id, frozenset())
+        self._bump(cursor)
+
+    def invalidate(self):
+        # Local data is rebuilt on the next read, other workers' after their
+        # next version check
+        with self._lock:
+            self._expires_at = 0.0
+        self._bump()
+
+    def _bump(self, cursor=None):
+        if self.version_store is None:
+            return
+        with self._lock:
+            previous = self._version
+        try:
+            version = self.version_store.bump(cursor)
+        except Exception as e:
+            self._version_error(e)
+            return
+        with self._lock:
+            # Nobody else wrote since this worker's data was current, so it
+            # already reflects the new version
+            if previous is not None and version == previous + 1 and self._version == previous:
+                self._version = version
+
+    def _version_error(self, error):
+        now = time.monotonic()
+        with self._lock:
+            self.version_errors += 1
+            if self._error_logged_at is not None and now - self._error_logged_at < FACET_ERROR_LOG_INTERVAL:
+                return
+            self._error_logged_at = now
+        print(f"Facet version store failed: {error}")
+
+    def _is_fresh(self):
+        return self._loaded and time.monotonic() < self._expires_at
+
+    def _refresh_if_due(self):
+        # Starts a background rebuild when the TTL ran out, or a version
+        # check when one is due; at most one runs at a time
+        now = time.monotonic()
+        with self._lock:
+            if not self._loaded or self._refreshing:
+                return
+            expired = now >= self._expires_at
+            check = self.version_store is not None and (
+                self._polled_at is None or now - self._polled_at >= self.sync_interval
+            )
+            if not expired and not check:
+                return
+            self._refreshing = True
+            if check:
+                self._polled_at = now
+        threading.Thread(
+            target=self._refresh, args=(expired,), name="facet-cache-refresh", daemon=True
+        ).start()
+
+    def _refresh(self, expired):
+        try:
+            version = self._read_version()
+            with self._lock:
+                changed = version is not None and version != self._version
+            if expired or changed:
+                conn = get_db_connection()
+                if not conn:
+                    return
+                try:
+                    self.rebuild(conn.cursor(), version)
+                except Exception as e:
+                    print(f"Facet cache rebuild failed: {e}")
+                finally:
+                    conn.close()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _read_version(self):
+        if self.version_store is None:
+            return None
+        try:
+            return self.version_store.read()
+        except Exception as e:
+            self._version_error(e)
+            return None
+
+    def _build_categories(self):
+        categories = {}
+        for facet, counter in self._counts.items():
+            reverse = facet in YEAR_FACETS
+            categories[facet] = sorted(counter, reverse=reverse)
+        categories["counts"] = {
+            facet: {str(value): count for value, count in counter.items()}
+            for facet, counter in self._counts.items()
+        }
+        return categories
+
+    def cached_json(self):
+        # Serialized categories, or None until the first build
+        self._refresh_if_due()
+        with self._lock:
+            if not self._loaded:
+                return None
+            if self._categories_json is None:
+                if self._categories is None:
+                    self._categories = self._build_categories()
+                self._categories_json = json.dumps(self._categories, separators=(",", ":"))
+            return self._categories_json
+
+    def get_categories(self):
+        self._refresh_if_due()
+        with self._lock:
+            loaded = self._loaded
+        if not loaded:
+            # First build; concurrent callers wait for it instead of
+            # scanning again
+            with self._rebuild_lock:
+                with self._lock:
+                    loaded = self._loaded
+                if not loaded:
+                    version = self._read_version()
+                    conn = get_db_connection()
+                    if not conn:
+                        return {"error": "Database connection failed"}
+                    try:
+                        self.rebuild(conn.cursor(), version)
+                    except Exception as e:
+                        return {"error": str(e)}
+                    finally:
+                        conn.close()
+        with self._lock:
+            if self._categories is None:
+                self._categories = self._build_categories()
+            return self._categories
+
+    def get_categories_json(self):
+        result = self.get_categories()
+        if "error" in result:
+            return result
+        return {"categories_json": self.cached_json() or json.dumps(result, separators=(",", ":"))}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "fresh": self._is_fresh(),
+                "version": self._version,
+                "rebuilds": self.rebuilds,
+                "version_errors": self.version_errors,
+                "sync_interval": self.sync_interval,
+            }
+
+
+# Writes reach the other workers through Redis when that is the cache
+# backend, otherwise through the database
+def _facet_version_store():
+    if isinstance(profile_cache.backend, RedisBackend):
+        return RedisFacetVersion(profile_cache.backend.client)
+    return DatabaseFacetVersion(get_db_connection)
+
+
+facet_cache = FacetCache(version_store=_facet_version_store())
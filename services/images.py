@@ -0,0 +1,459 @@
+import asyncio
+import functools
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, Response, StreamingResponse
+from services.storage import blob_key, blob_store, delete_unreferenced_blob, parse_blob_key, read_file_range
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # derivatives are skipped and originals served instead
+    Image = None
+
+# Upload configuration. New uploads go to the content-addressed blob store
+# (services/storage.py); PROFILE_IMAGE_DIR only holds legacy uploads.
+PROFILE_IMAGE_DIR = os.getenv("PROFILE_IMAGE_DIR", os.path.join("uploads", "profile_images"))
+PROFILE_IMAGE_MAX_BYTES = int(os.getenv("PROFILE_IMAGE_MAX_BYTES", str(5 * 1024 * 1024)))
+PROFILE_IMAGE_TYPES = [t.strip() for t in os.getenv("PROFILE_IMAGE_TYPES", "jpeg,png,gif,webp").split(",") if t.strip()]
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# image type -> file extension
+IMAGE_EXTENSIONS = {"jpeg": ".jpg", "png": ".png", "gif": ".gif", "webp": ".webp"}
+
+# Derivative configuration: size name -> longest edge in pixels
+IMAGE_SIZES = {"thumb": 64, "small": 256, "medium": 800}
+IMAGE_DERIVATIVE_FORMAT = os.getenv("IMAGE_DERIVATIVE_FORMAT", "webp")  # webp or jpeg
+IMAGE_DERIVATIVE_QUALITY = int(os.getenv("IMAGE_DERIVATIVE_QUALITY", "80"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+# HTTP caching configuration
+IMAGE_CACHE_MAX_AGE = int(os.getenv("IMAGE_CACHE_MAX_AGE", "300"))  # seconds
+IMAGE_INDEX_MAX_ENTRIES = int(os.getenv("IMAGE_INDEX_MAX_ENTRIES", "50000"))
+# Bounds how long a worker keeps serving an image replaced via another worker
+IMAGE_INDEX_TTL = float(os.getenv("IMAGE_INDEX_TTL", "60"))  # seconds
+
+
+class UploadError(Exception):
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def detect_image_type(head):
+    # Identify the image by its magic bytes rather than the client's
+    # filename or content type
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _finish(handle):
+    handle.flush()
+    os.fsync(handle.fileno())
+    handle.close()
+
+
+def _discard(handle, path):
+    try:
+        handle.close()
+    except OSError:
+        pass
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+async def save_profile_image(upload, store=blob_store, max_bytes=PROFILE_IMAGE_MAX_BYTES):
+    # Streams the upload to a temp file in fixed-size chunks, with disk writes
+    # on worker threads, hashing as it goes, then hands it to the blob store
+    # under its content hash. Returns the blob key; identical uploads share
+    # one blob.
+    staging = await run_in_threadpool(_staging_dir, store)
+    fd, temp_path = await run_in_threadpool(tempfile.mkstemp, ".part", "upload-", staging)
+    handle = os.fdopen(fd, "wb")
+
+    try:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        image_type = detect_image_type(chunk)
+        if image_type is None or image_type not in PROFILE_IMAGE_TYPES:
+            raise UploadError(415, f"Unsupported image type; allowed: {', '.join(PROFILE_IMAGE_TYPES)}")
+
+        size = 0
+        digest = hashlib.sha256()
+        while chunk:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadError(413, f"Image exceeds the {max_bytes} byte limit")
+            digest.update(chunk)
+            await run_in_threadpool(handle.write, chunk)
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+
+        await run_in_threadpool(_finish, handle)
+        key = blob_key(digest.hexdigest(), IMAGE_EXTENSIONS[image_type])
+        await run_in_threadpool(store.put_file, temp_path, key, f"image/{image_type}")
+        return key
+
+    except BaseException:
+        await run_in_threadpool(_discard, handle, temp_path)
+        raise
+
+
+def _staging_dir(store):
+    return store.staging_dir() or tempfile.gettempdir()
+
+
+def remove_profile_image(path, directory=PROFILE_IMAGE_DIR):
+    # Legacy uploads only: files inside the upload directory are deleted
+    if not path:
+        return
+    root = os.path.realpath(directory)
+    target = os.path.realpath(path)
+    if os.path.dirname(target) != root:
+        return
+    try:
+        os.unlink(target)
+    except FileNotFoundError:
+        pass
+    for size in IMAGE_SIZES:
+        try:
+            os.unlink(derivative_path(target, size))
+        except FileNotFoundError:
+            pass
+
+
+def release_profile_image(reference, references, store=blob_store):
+    # Called once an alumni row stops pointing at reference; references is
+    # how many rows still do. Shared blobs are kept, and blobs too recent to
+    # delete safely are left for the garbage collector.
+    if not reference or references:
+        return False
+    if parse_blob_key(reference):
+        derived = [derivative_key(reference, size) for size in IMAGE_SIZES]
+        return delete_unreferenced_blob(store, reference, derived)
+    remove_profile_image(reference)
+    return True
+
+
+# ------------------------------ DERIVATIVES ------------------------------
+# Resized, re-encoded copies of each profile image are stored as blobs keyed
+# by the original's hash and the size name (legacy uploads keep theirs under
+# derived/ next to the file). They are rendered in a process pool (Pillow
+# work is CPU bound) right after upload, and lazily on first request if missing.
+_image_executor = None
+_pending_renders = {}
+
+def _get_image_executor():
+    global _image_executor
+    if _image_executor is None:
+        _image_executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _image_executor
+
+def _derivative_extension():
+    return ".webp" if IMAGE_DERIVATIVE_FORMAT == "webp" else ".jpg"
+
+def derivative_key(original_key, size):
+    return blob_key(parse_blob_key(original_key)[0], _derivative_extension(), size)
+
+def derivative_path(original_path, size):
+    directory, filename = os.path.split(original_path)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, "derived", f"{stem}_{size}{_derivative_extension()}")
+
+def _render_derivative(source, destination, max_edge, image_format, quality):
+    # Runs in a worker process
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image_format == "jpeg":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            has_alpha = "A" in image.getbands() or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        fd, temp_path = tempfile.mkstemp(".part", "render-", os.path.dirname(destination))
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                image.save(handle, format=image_format.upper(), quality=quality, optimize=True)
+            os.replace(temp_path, destination)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+    return destination
+
+def _remove_files(*paths):
+    for path in paths:
+        try:
+            os.unlink(path)
+        except (FileNotFoundError, TypeError):
+            pass
+
+async def _render(reference, target, size, store):
+    loop = asyncio.get_running_loop()
+    render = functools.partial(
+        _render_derivative, max_edge=IMAGE_SIZES[size],
+        image_format=IMAGE_DERIVATIVE_FORMAT, quality=IMAGE_DERIVATIVE_QUALITY
+    )
+    if not parse_blob_key(reference):
+        return await loop.run_in_executor(_get_image_executor(), render, reference, target)
+
+    # Blob originals are rendered from a local copy (downloaded for remote
+    # stores) into a staging file that is then stored as the derivative blob
+    staging = await run_in_threadpool(_staging_dir, store)
+    source = store.local_path(reference)
+    downloaded = None
+    output = os.path.join(staging, f"render-{uuid.uuid4().hex}{_derivative_extension()}")
+    try:
+        if source is None:
+            downloaded = os.path.join(staging, f"source-{uuid.uuid4().hex}")
+            await run_in_threadpool(store.download, reference, downloaded)
+            source = downloaded
+        await loop.run_in_executor(_get_image_executor(), render, source, output)
+        await run_in_threadpool(store.put_file, output, target, mimetypes.guess_type(target)[0])
+    finally:
+        await run_in_threadpool(_remove_files, downloaded, output)
+    return target
+
+async def ensure_derivative(reference, size, store=blob_store):
+    # Returns the derivative's blob key (or path, for legacy uploads),
+    # rendering it if needed, or None when it cannot be produced (no Pillow,
+    # missing or unreadable image)
+    if Image is None or size not in IMAGE_SIZES:
+        return None
+    if parse_blob_key(reference):
+        target = derivative_key(reference, size)
+        if await run_in_threadpool(store.stat, target) is not None:
+            return target
+    else:
+        target = derivative_path(reference, size)
+        if await run_in_threadpool(os.path.isfile, target):
+            return target
+        if not await run_in_threadpool(os.path.isfile, reference):
+            return None
+
+    # Concurrent requests for the same missing derivative share one render
+    future = _pending_renders.get(target)
+    if future is None:
+        future = asyncio.ensure_future(_render(reference, target, size, store))
+        _pending_renders[target] = future
+        future.add_done_callback(lambda _: _pending_renders.pop(target, None))
+    try:
+        return await asyncio.shield(future)
+    except Exception as e:
+        print(f"Rendering {size} derivative of {reference} failed: {e}")
+        return None
+
+async def generate_derivatives(reference):
+    # Background task run after an upload
+    await asyncio.gather(*(ensure_derivative(reference, size) for size in IMAGE_SIZES))
+
+def shutdown_image_workers():
+    global _image_executor
+    if _image_executor is not None:
+        _image_executor.shutdown(wait=False, cancel_futures=True)
+        _image_executor = None
+
+
+# ------------------------------ HTTP CACHING ------------------------------
+# alumni_id/size -> (reference, path, etag, mtime, length, stat). Lets repeat
+# image requests skip the database and the filesystem: a hit does no I/O, so
+# it is safe on the event loop. Entries are trusted until IMAGE_INDEX_TTL,
+# which bounds how long an image replaced through another worker is served.
+# Blob ETags come from the content hash in the key (plus format and quality
+# for derivatives), so only legacy files are hashed.
+class ImageIndex:
+    def __init__(self, max_entries=IMAGE_INDEX_MAX_ENTRIES, ttl=IMAGE_INDEX_TTL, store=blob_store):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, alumni_id, size):
+        key = (alumni_id, size)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry["expires_at"] > time.monotonic():
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                self.hits += 1
+            return dict(entry)
+        if entry is not None:
+            with self._lock:
+                self._entries.pop(key, None)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def load(self, alumni_id, size, reference, remember=True):
+        # Blocking. Returns None if the image does not exist.
+        parsed = parse_blob_key(reference)
+        if parsed:
+            path = self.store.local_path(reference)
+            if path:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    return None
+                length, mtime = stat.st_size, stat.st_mtime
+            else:
+                stat = None
+                blob_stat = self.store.stat(reference)
+                if blob_stat is None:
+                    return None
+                length, mtime = blob_stat
+            digest, variant, extension = parsed
+            if variant:
+                # A derivative's bytes depend on the output format and quality
+                # as well as the original, so a config change must change the tag
+                etag = f'"{digest[:32]}-{variant}{extension}-q{IMAGE_DERIVATIVE_QUALITY}"'
+            else:
+                etag = f'"{digest[:32]}"'
+        else:
+            path = reference
+            try:
+                stat = os.stat(path)
+                digest = hashlib.sha256()
+                with open(path, "rb") as handle:
+                    for chunk in iter(lambda: handle.read(UPLOAD_CHUNK_SIZE), b""):
+                        digest.update(chunk)
+            except OSError:
+                return None
+            etag = f'"{digest.hexdigest()[:32]}"'
+            length, mtime = stat.st_size, stat.st_mtime
+        entry = {
+            "reference": reference,
+            "blob": parsed is not None,
+            "path": path,
+            "etag": etag,
+            "mtime": mtime,
+            "length": length,
+            "stat": stat,
+            "expires_at": time.monotonic() + self.ttl,
+        }
+        if remember:
+            with self._lock:
+                self._entries[(alumni_id, size)] = entry
+                self._entries.move_to_end((alumni_id, size))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return dict(entry)
+
+    def invalidate(self, alumni_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == alumni_id]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+image_index = ImageIndex()
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def _etag_matches(header, etag):
+    # Weak comparison, as required for If-None-Match
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
+
+def _not_modified_since(header, mtime):
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return since is not None and int(mtime) <= since.timestamp()
+
+def _parse_range(header, length):
+    # Single byte range only; returns (start, end) inclusive, "unsatisfiable",
+    # or None to ignore the header and send the whole file
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            return "unsatisfiable"
+        return max(0, length - suffix), length - 1
+    start = int(first)
+    end = min(int(last), length - 1) if last else length - 1
+    if start >= length or end < start:
+        return "unsatisfiable"
+    return start, end
+
+def _read_range(entry, start, end):
+    if entry["blob"]:
+        return image_index.store.read_range(entry["reference"], start, end)
+    return read_file_range(entry["path"], start, end)
+
+def image_response(headers, entry):
+    # Builds a 200, 206, 304 or 416 response for an ImageIndex entry
+    common = {
+        "ETag": entry["etag"],
+        "Last-Modified": formatdate(entry["mtime"], usegmt=True),
+        "Cache-Control": f"private, max-age={IMAGE_CACHE_MAX_AGE}",
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, entry["etag"]):
+            return Response(status_code=304, headers=common)
+    elif headers.get("if-modified-since") and _not_modified_since(headers["if-modified-since"], entry["mtime"]):
+        return Response(status_code=304, headers=common)
+
+    length = entry["length"]
+    media_type = mimetypes.guess_type(entry["reference"])[0] or "application/octet-stream"
+    range_header = headers.get("range")
+    if_range = headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == entry["etag"]):
+        byte_range = _parse_range(range_header, length)
+        if byte_range == "unsatisfiable":
+            return Response(status_code=416, headers={**common, "Content-Range": f"bytes */{length}"})
+        if byte_range is not None:
+            start, end = byte_range
+            return StreamingResponse(
+                _read_range(entry, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers={
+                    **common,
+                    "Content-Range": f"bytes {start}-{end}/{length}",
+                    "Content-Length": str(end - start + 1),
+                },
+            )
+
+    if entry["path"]:
+        return FileResponse(entry["path"], headers=common, media_type=media_type, stat_result=entry["stat"])
+    return StreamingResponse(
+        _read_range(entry, 0, length - 1),
+        media_type=media_type,
+        headers={**common, "Content-Length": str(length)},
+    )
@@ -0,0 +1,476 @@
+from config.main import get_db_connection, hash_passwords
+from config.cache import profile_cache
+from services.facets import facet_cache
+from services.main import AsyncService
+import csv
+import datetime
+import io
+import itertools
+import json
+import os
+import re
+
+# Bulk import configuration
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))  # rows per transaction
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))  # rows listed in the report
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Same pattern as the CHECK constraint on users.email
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+GENDERS = ("Male", "Female", "Other")
+
+
+# Field converters. Each takes a non-empty raw value and returns the column
+# value or raises ValueError; they mirror the table constraints in migrations/
+# so a validated batch cannot fail them.
+def _text(max_length=None):
+    def convert(value):
+        value = str(value).strip()
+        if max_length and len(value) > max_length:
+            raise ValueError(f"must be at most {max_length} characters")
+        return value
+    return convert
+
+def _email(value):
+    value = _text(100)(value)
+    if not EMAIL_PATTERN.match(value):
+        raise ValueError("is not a valid email address")
+    return value
+
+def _gender(value):
+    if value not in GENDERS:
+        raise ValueError(f"must be one of {', '.join(GENDERS)}")
+    return value
+
+def _year(max_ahead):
+    def convert(value):
+        year = int(value)
+        if not 1900 <= year <= datetime.date.today().year + max_ahead:
+            raise ValueError("is out of range")
+        return year
+    return convert
+
+def _date(value):
+    return datetime.date.fromisoformat(str(value).strip())
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "t", "yes", "y", "1"):
+        return True
+    if text in ("false", "f", "no", "n", "0"):
+        return False
+    raise ValueError("must be true or false")
+
+def _cgpa(value):
+    cgpa = round(float(value), 2)
+    if not 0 <= cgpa <= 4.0:
+        raise ValueError("must be between 0 and 4")
+    return cgpa
+
+def _json_object(value):
+    if isinstance(value, str):
+        value = json.loads(value)
+    if not isinstance(value, dict):
+        raise ValueError("must be a JSON object")
+    return json.dumps(value)
+
+
+# field -> (converter, required); order is the staging table column order
+USER_FIELDS = {
+    "username": (_text(50), True),
+    "email": (_email, True),
+    "password": (str, False),
+    "full_name": (_text(100), False),
+    "date_of_birth": (_date, False),
+    "gender": (_gender, False),
+    "bio": (_text(), False),
+    "contact_number": (_text(20), False),
+    "address": (_text(), False),
+    "graduation_year": (_year(5), False),
+    "current_location": (_text(100), False),
+    "social_media_links": (_json_object, False),
+    "availability_for_mentorship": (_bool, False),
+}
+EDUCATION_FIELDS = {
+    "degree": (_text(100), True),
+    "department": (_text(100), True),
+    "institution": (_text(100), False),
+    "start_year": (_year(5), True),
+    "end_year": (_year(8), True),
+    "achievements": (_text(), False),
+    "cgpa": (_cgpa, False),
+}
+JOB_FIELDS = {
+    "company_name": (_text(100), True),
+    "position": (_text(100), True),
+    "location": (_text(100), False),
+    "start_date": (_date, True),
+    "end_date": (_date, False),
+    "is_current": (_bool, False),
+    "description": (_text(), False),
+}
+
+STAGING_TABLES = """
+    CREATE TEMP TABLE import_users (
+      row_number INTEGER PRIMARY KEY, username TEXT, email TEXT, password TEXT,
+      full_name TEXT, date_of_birth DATE, gender TEXT, bio TEXT, contact_number TEXT,
+      address TEXT, graduation_year INTEGER, current_location TEXT,
+      social_media_links JSONB, availability_for_mentorship BOOLEAN,
+      user_id INTEGER, alumni_id INTEGER
+    ) ON COMMIT DROP;
+    CREATE TEMP TABLE import_education (
+      row_number INTEGER, username TEXT, degree TEXT, department TEXT, institution TEXT,
+      start_year INTEGER, end_year INTEGER, achievements TEXT, cgpa NUMERIC(3,2)
+    ) ON COMMIT DROP;
+    CREATE TEMP TABLE import_jobs (
+      row_number INTEGER, username TEXT, company_name TEXT, position TEXT, location TEXT,
+      start_date DATE, end_date DATE, is_current BOOLEAN, description TEXT
+    ) ON COMMIT DROP;
+"""
+
+# Rows whose user already exists in a way the import must not touch
+CONFLICTS_QUERY = """
+    SELECT s.row_number, 'email is already registered to another user' AS error
+    FROM import_users s JOIN users u ON u.email = s.email AND u.username <> s.username
+    UNION ALL
+    SELECT s.row_number, 'username belongs to an admin account'
+    FROM import_users s JOIN users u ON u.username = s.username AND NOT u.is_alumni
+"""
+
+# Set-wise upserts, keyed on username. Blank fields keep the current values
+# of existing profiles; education and jobs rows are added unless an identical
+# entry (same degree/department/start year, or company/position/start date)
+# already exists.
+UPSERT_USERS = """
+    INSERT INTO users (username, password, email, is_alumni)
+    SELECT username, COALESCE(password, '!'), email, true FROM import_users
+    ON CONFLICT (username) DO UPDATE
+      SET email = EXCLUDED.email,
+          password = CASE WHEN EXCLUDED.password = '!' THEN users.password ELSE EXCLUDED.password END,
+          updated_at = CURRENT_TIMESTAMP
+"""
+UPDATE_ALUMNI = """
+    UPDATE alumni a SET
+      full_name = COALESCE(s.full_name, a.full_name),
+      date_of_birth = COALESCE(s.date_of_birth, a.date_of_birth),
+      gender = COALESCE(s.gender, a.gender),
+      bio = COALESCE(s.bio, a.bio),
+      contact_number = COALESCE(s.contact_number, a.contact_number),
+      address = COALESCE(s.address, a.address),
+      graduation_year = COALESCE(s.graduation_year, a.graduation_year),
+      current_location = COALESCE(s.current_location, a.current_location),
+      social_media_links = COALESCE(s.social_media_links, a.social_media_links),
+      availability_for_mentorship = COALESCE(s.availability_for_mentorship, a.availability_for_mentorship),
+      updated_at = CURRENT_TIMESTAMP
+    FROM import_users s
+    WHERE a.user_id = s.user_id
+    RETURNING a.alumni_id
+"""
+INSERT_ALUMNI = """
+    INSERT INTO alumni (user_id, full_name, date_of_birth, gender, bio, contact_number, address,
+                        graduation_year, current_location, social_media_links, availability_for_mentorship)
+    SELECT s.user_id, COALESCE(s.full_name, s.username), s.date_of_birth, s.gender, s.bio,
+           s.contact_number, s.address, s.graduation_year, s.current_location,
+           s.social_media_links, COALESCE(s.availability_for_mentorship, false)
+    FROM import_users s
+    WHERE NOT EXISTS (SELECT 1 FROM alumni a WHERE a.user_id = s.user_id)
+"""
+INSERT_EDUCATION = """
+    INSERT INTO education (alumni_id, degree, department, institution, start_year, end_year, achievements, cgpa)
+    SELECT s.alumni_id, e.degree, e.department, COALESCE(e.institution, 'Our College'),
+           e.start_year, e.end_year, e.achievements, e.cgpa
+    FROM import_education e
+    JOIN import_users s ON s.username = e.username
+    WHERE NOT EXISTS (
+      SELECT 1 FROM education x
+      WHERE x.alumni_id = s.alumni_id AND x.degree = e.degree
+        AND x.department = e.department AND x.start_year = e.start_year
+    )
+"""
+INSERT_JOBS = """
+    INSERT INTO jobs (alumni_id, company_name, position, location, start_date, end_date, is_current, description)
+    SELECT s.alumni_id, j.company_name, j.position, j.location, j.start_date, j.end_date,
+           COALESCE(j.is_current, false), j.description
+    FROM import_jobs j
+    JOIN import_users s ON s.username = j.username
+    WHERE NOT EXISTS (
+      SELECT 1 FROM jobs x
+      WHERE x.alumni_id = s.alumni_id AND x.company_name = j.company_name
+        AND x.position = j.position AND x.start_date = j.start_date
+    )
+"""
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+def _read_records(stream, fmt):
+    # Yields (row_number, record or ValueError) from a binary stream. CSV rows
+    # carry at most one education and one job entry, as education.<field> and
+    # job.<field> columns; NDJSON records may hold "education" and "jobs" lists.
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        if not reader.fieldnames or "username" not in reader.fieldnames:
+            raise ImportFormatError("CSV header must include a username column")
+        for row_number, row in enumerate(reader, start=1):
+            record = {"education": [{}], "jobs": [{}]}
+            for column, value in row.items():
+                if column is None or value is None or value.strip() == "":
+                    continue
+                prefix, _, field = column.partition(".")
+                if field and prefix == "education":
+                    record["education"][0][field] = value
+                elif field and prefix in ("job", "jobs"):
+                    record["jobs"][0][field] = value
+                else:
+                    record[column] = value
+            record["education"] = [entry for entry in record["education"] if entry]
+            record["jobs"] = [entry for entry in record["jobs"] if entry]
+            yield row_number, record
+    else:
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, ValueError(f"invalid JSON: {e}")
+                continue
+            if not isinstance(record, dict):
+                yield row_number, ValueError("each line must be a JSON object")
+                continue
+            yield row_number, record
+
+
+def _convert(data, fields, label, errors):
+    if not isinstance(data, dict):
+        errors.append(f"{label} must be an object")
+        return None
+    values = {}
+    for field, (convert, required) in fields.items():
+        raw = data.get(field)
+        if raw is None or (isinstance(raw, str) and raw.strip() == ""):
+            if required:
+                errors.append(f"{label}{field} is required")
+            values[field] = None
+            continue
+        try:
+            values[field] = convert(raw)
+        except (TypeError, ValueError) as e:
+            errors.append(f"{label}{field} {e}")
+    return values
+
+
+def _validate(record, seen_usernames, seen_emails):
+    # Returns (user, education, jobs, errors) for one input record
+    errors = []
+    user = _convert(record, USER_FIELDS, "", errors)
+
+    education = []
+    for index, entry in enumerate(record.get("education") or []):
+        values = _convert(entry, EDUCATION_FIELDS, f"education[{index}].", errors)
+        if values and values["start_year"] and values["end_year"] and values["end_year"] < values["start_year"]:
+            errors.append(f"education[{index}].end_year is before start_year")
+        education.append(values)
+
+    jobs = []
+    for index, entry in enumerate(record.get("jobs") or []):
+        values = _convert(entry, JOB_FIELDS, f"jobs[{index}].", errors)
+        if values and values["start_date"] and values["end_date"] and values["end_date"] < values["start_date"]:
+            errors.append(f"jobs[{index}].end_date is before start_date")
+        jobs.append(values)
+
+    if not errors:
+        if user["username"] in seen_usernames:
+            errors.append("duplicate username in file")
+        elif user["email"].lower() in seen_emails:
+            errors.append("duplicate email in file")
+        else:
+            seen_usernames.add(user["username"])
+            seen_emails.add(user["email"].lower())
+    return user, education, jobs, errors
+
+
+def _copy_value(value):
+    # COPY text format
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _copy_rows(cursor, table, columns, rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+class _Report:
+    def __init__(self):
+        self.total = 0
+        self.created = 0
+        self.updated = 0
+        self.education = 0
+        self.jobs = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row_number, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "status": "success",
+            "total": self.total,
+            "imported": self.created + self.updated,
+            "created": self.created,
+            "updated": self.updated,
+            "education_added": self.education,
+            "jobs_added": self.jobs,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _load_batch(cursor, batch):
+    # One transaction: COPY the valid rows into staging tables, drop rows that
+    # conflict with existing users, then upsert set-wise. Returns the counts,
+    # the ids of updated profiles and the rejected rows.
+    cursor.execute(STAGING_TABLES)
+    # Search documents are refreshed once per batch below, not per row
+    cursor.execute("SELECT set_config('alumni_search.deferred', 'on', true)")
+
+    _copy_rows(cursor, "import_users", ["row_number", *USER_FIELDS], (
+        (row_number, *user.values()) for row_number, user, _, _ in batch
+    ))
+    _copy_rows(cursor, "import_education", ["row_number", "username", *EDUCATION_FIELDS], (
+        (row_number, user["username"], *entry.values())
+        for row_number, user, education, _ in batch for entry in education
+    ))
+    _copy_rows(cursor, "import_jobs", ["row_number", "username", *JOB_FIELDS], (
+        (row_number, user["username"], *entry.values())
+        for row_number, user, _, jobs in batch for entry in jobs
+    ))
+    cursor.execute("ANALYZE import_users; ANALYZE import_education; ANALYZE import_jobs")
+
+    cursor.execute(CONFLICTS_QUERY)
+    conflicts = {}
+    for row in cursor.fetchall():
+        conflicts.setdefault(row["row_number"], []).append(row["error"])
+    if conflicts:
+        cursor.execute("DELETE FROM import_users WHERE row_number = ANY(%s)", (list(conflicts),))
+
+    cursor.execute(UPSERT_USERS)
+    cursor.execute("UPDATE import_users s SET user_id = u.user_id FROM users u WHERE u.username = s.username")
+    cursor.execute(UPDATE_ALUMNI)
+    updated_ids = [row["alumni_id"] for row in cursor.fetchall()]
+    cursor.execute(INSERT_ALUMNI)
+    created = cursor.rowcount
+    cursor.execute("UPDATE import_users s SET alumni_id = a.alumni_id FROM alumni a WHERE a.user_id = s.user_id")
+    cursor.execute(INSERT_EDUCATION)
+    education = cursor.rowcount
+    cursor.execute(INSERT_JOBS)
+    jobs = cursor.rowcount
+    cursor.execute("SELECT refresh_alumni_search_many(ARRAY(SELECT alumni_id FROM import_users))")
+
+    return {
+        "created": created,
+        "updated_ids": updated_ids,
+        "education": education,
+        "jobs": jobs,
+        "conflicts": conflicts,
+    }
+
+
+# Import Services
+class ImportService:
+    @staticmethod
+    def import_alumni(stream, fmt="csv"):
+        # Imports alumni with their education and job history from a CSV or
+        # NDJSON stream, IMPORT_BATCH_SIZE rows per transaction. Invalid rows
+        # are skipped and listed in the report; a failed batch is reported
+        # against each of its rows and does not undo earlier batches.
+        if fmt not in IMPORT_FORMATS:
+            return {"error": f"Unsupported format; use one of: {', '.join(IMPORT_FORMATS)}"}
+
+        conn = get_db_connection()
+        if not conn:
+            return {"error": "Database connection failed"}
+
+        report = _Report()
+        seen_usernames = set()
+        seen_emails = set()
+        try:
+            cursor = conn.cursor()
+            records = _read_records(stream, fmt)
+            while True:
+                chunk = list(itertools.islice(records, IMPORT_BATCH_SIZE))
+                if not chunk:
+                    break
+                report.total += len(chunk)
+
+                batch = []
+                for row_number, record in chunk:
+                    if isinstance(record, ValueError):
+                        report.fail(row_number, [str(record)])
+                        continue
+                    user, education, jobs, errors = _validate(record, seen_usernames, seen_emails)
+                    if errors:
+                        report.fail(row_number, errors)
+                    else:
+                        batch.append((row_number, user, education, jobs))
+                if not batch:
+                    continue
+
+                # Passwords are optional: without one the account cannot log
+                # in until it is set, which keeps large imports off the KDF
+                passwords = [(i, user["password"]) for i, (_, user, _, _) in enumerate(batch) if user["password"]]
+                if passwords:
+                    for (i, _), hashed in zip(passwords, hash_passwords([p for _, p in passwords])):
+                        batch[i][1]["password"] = hashed
+
+                try:
+                    result = _load_batch(cursor, batch)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    for row_number, _, _, _ in batch:
+                        report.fail(row_number, [f"batch failed: {e}"])
+                    continue
+
+                report.created += result["created"]
+                report.updated += len(result["updated_ids"])
+                report.education += result["education"]
+                report.jobs += result["jobs"]
+                for row_number, errors in sorted(result["conflicts"].items()):
+                    report.fail(row_number, errors)
+                for alumni_id in result["updated_ids"]:
+                    profile_cache.invalidate(alumni_id)
+
+            return report.as_dict()
+
+        except (ImportFormatError, csv.Error, UnicodeDecodeError) as e:
+            conn.rollback()
+            return {"error": f"Could not read import after {report.total} rows: {e}"}
+        except Exception as e:
+            conn.rollback()
+            return {"error": str(e)}
+        finally:
+            conn.close()
+            if report.created or report.updated:
+                facet_cache.invalidate()
+
+
+AsyncImportService = AsyncService(ImportService)
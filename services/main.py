@@ -1,5 +1,372 @@
-from config.main import get_db_connection, hash_password, verify_password, create_jwt_token
+from config.main import get_db_connection, hash_password, check_password, create_jwt_token, token_cache, DB_POOL_MAX_SIZE
+from config.cache import profile_cache
+from config.metrics import run_operation
+from services.facets import facet_cache
+from services.images import image_index
+import base64
+import contextvars
+import functools
 import json
+import os
+import threading
+import time
+import anyio
+from psycopg2.extensions import cursor as TupleCursor
+
+# Complete alumni profile as a JSON document: alumni columns plus the user's
+# email/username and nested education and jobs arrays
+PROFILE_JSON_QUERY = """
+    SELECT (
+        to_jsonb(a)
+        || jsonb_build_object(
+            'email', u.email,
+            'username', u.username,
+            'education', COALESCE(
+                (SELECT jsonb_agg(to_jsonb(e) ORDER BY e.education_id) FROM education e WHERE e.alumni_id = a.alumni_id),
+                '[]'::jsonb
+            ),
+            'jobs', COALESCE(
+                (SELECT jsonb_agg(to_jsonb(j) ORDER BY j.job_id) FROM jobs j WHERE j.alumni_id = a.alumni_id),
+                '[]'::jsonb
+            )
+        )
+    )::text AS profile
+    FROM alumni a
+    JOIN users u ON a.user_id = u.user_id
+    WHERE a.alumni_id = %s
+"""
+
+# Alumni list pagination helpers
+ALUMNI_TOTAL_MODES = ("exact", "cached", "estimate", "none")
+ALUMNI_COUNT_CACHE_TTL = float(os.getenv("ALUMNI_COUNT_CACHE_TTL", "60"))  # seconds
+_alumni_count_cache = {"value": None, "expires_at": 0.0}
+_alumni_count_lock = threading.Lock()
+
+def _count_alumni(cursor, mode):
+    if mode == "none":
+        return None
+    
+    if mode == "estimate":
+        # Planner statistics; kept current by autovacuum/ANALYZE, no table scan
+        cursor.execute("SELECT reltuples::bigint AS total FROM pg_class WHERE oid = 'alumni'::regclass")
+        row = cursor.fetchone()
+        return max(row["total"], 0) if row else None
+    
+    if mode == "cached":
+        with _alumni_count_lock:
+            if _alumni_count_cache["value"] is not None and time.monotonic() < _alumni_count_cache["expires_at"]:
+                return _alumni_count_cache["value"]
+    
+    cursor.execute("SELECT COUNT(*) as total FROM alumni")
+    total = cursor.fetchone()["total"]
+    with _alumni_count_lock:
+        _alumni_count_cache["value"] = total
+        _alumni_count_cache["expires_at"] = time.monotonic() + ALUMNI_COUNT_CACHE_TTL
+    return total
+
+# Opaque cursor over the (full_name, alumni_id) sort key
+def encode_alumni_cursor(row):
+    raw = json.dumps([row["full_name"], row["alumni_id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_alumni_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        full_name, alumni_id = json.loads(raw)
+        if not isinstance(full_name, str) or not isinstance(alumni_id, int):
+            return None
+        return full_name, alumni_id
+    except (ValueError, TypeError):
+        return None
+
+# Alumni filter predicates: filter key -> (SQL clause, parameter transform).
+# Alumni columns are matched directly; education and job predicates are
+# grouped into one EXISTS each, so a single education (or job) row has to
+# satisfy all of them and no join fan-out reaches the outer query.
+def _contains(value):
+    return f"%{value}%"
+
+ALUMNI_FILTERS = {
+    "full_name": ("a.full_name ILIKE %s", _contains),
+    "location": ("a.current_location ILIKE %s", _contains),
+    "availability_for_mentorship": ("a.availability_for_mentorship = %s", None),
+}
+EDUCATION_FILTERS = {
+    "department": ("e.department = %s", None),
+    "end_year": ("e.end_year = %s", None),
+    "start_year": ("e.start_year = %s", None),
+    "cgpa": ("e.cgpa >= %s", None),
+    "degree": ("e.degree = %s", None),
+}
+JOB_FILTERS = {
+    "company_name": ("j.company_name ILIKE %s", _contains),
+    "position": ("j.position ILIKE %s", _contains),
+}
+# Filters dropped when empty. An empty company_name or position still
+# applies (ILIKE '%%' matches any job), as in the original query.
+SKIP_EMPTY_FILTERS = {"full_name", "location"}
+
+def _filter_clauses(spec, filters, params):
+    clauses = []
+    for key, (clause, transform) in spec.items():
+        if key not in filters:
+            continue
+        value = filters[key]
+        if key in SKIP_EMPTY_FILTERS and not value:
+            continue
+        clauses.append(clause)
+        params.append(transform(value) if transform else value)
+    return clauses
+
+# Builds the WHERE clause (over alias a = alumni) and its parameters
+def build_alumni_filter(filters):
+    params = []
+    clauses = _filter_clauses(ALUMNI_FILTERS, filters, params)
+    
+    education = _filter_clauses(EDUCATION_FILTERS, filters, params)
+    if education:
+        clauses.append(
+            "EXISTS (SELECT 1 FROM education e WHERE e.alumni_id = a.alumni_id AND "
+            + " AND ".join(education) + ")"
+        )
+    
+    jobs = _filter_clauses(JOB_FILTERS, filters, params)
+    if jobs:
+        clauses.append(
+            "EXISTS (SELECT 1 FROM jobs j WHERE j.alumni_id = a.alumni_id AND "
+            + " AND ".join(jobs) + ")"
+        )
+    
+    return (" AND ".join(clauses) if clauses else "TRUE"), params
+
+# Profile edits. Only these columns can be written through
+# update_alumni_profile; the statements are generated from the lists once, so
+# their text does not depend on which keys a client sends and client keys
+# never reach the SQL. Values are cast by jsonb_populate_record(set) to the
+# column types.
+ALUMNI_PROFILE_COLUMNS = [
+    "full_name", "date_of_birth", "gender", "bio", "contact_number", "address",
+    "graduation_year", "current_location", "social_media_links", "availability_for_mentorship",
+]
+PROFILE_CHILD_TABLES = {
+    "education": {
+        "key": "education_id",
+        "columns": ["degree", "department", "institution", "start_year", "end_year", "achievements", "cgpa"],
+        # Column defaults applied when a created entry leaves them out
+        "defaults": {"institution": "'Our College'"},
+    },
+    "jobs": {
+        "key": "job_id",
+        "columns": ["company_name", "position", "location", "start_date", "end_date", "is_current", "description"],
+        "defaults": {"is_current": "false"},
+    },
+}
+
+def _assignments(columns, indent=8):
+    # Columns absent from an entry keep their current value
+    return (",\n" + " " * indent).join(
+        f"{column} = CASE WHEN r.doc ? '{column}' THEN (r.rec).{column} ELSE t.{column} END"
+        for column in columns
+    )
+
+UPDATE_ALUMNI_PROFILE_QUERY = f"""
+    UPDATE alumni t SET
+        {_assignments(ALUMNI_PROFILE_COLUMNS)},
+        updated_at = CURRENT_TIMESTAMP
+    FROM (
+        SELECT doc, jsonb_populate_record(NULL::alumni, doc) AS rec
+        FROM (SELECT %(basic)s::jsonb AS doc) d
+    ) r
+    WHERE t.alumni_id = %(alumni_id)s
+"""
+
+# Deletes, updates and inserts for one child table in a single statement
+def _child_write_query(table, key, columns, defaults):
+    values = ", ".join(
+        f"COALESCE(r.{column}, {defaults[column]})" if column in defaults else f"r.{column}"
+        for column in columns
+    )
+    return f"""
+        WITH deleted AS (
+            DELETE FROM {table}
+            WHERE alumni_id = %(alumni_id)s AND {key} = ANY(%(delete)s::integer[])
+            RETURNING {key}
+        ), updated AS (
+            UPDATE {table} t SET
+                {_assignments(columns, 16)},
+                updated_at = CURRENT_TIMESTAMP
+            FROM (
+                SELECT doc, jsonb_populate_record(NULL::{table}, doc) AS rec
+                FROM jsonb_array_elements(%(update)s::jsonb) AS doc
+            ) r
+            WHERE t.{key} = (r.rec).{key} AND t.alumni_id = %(alumni_id)s
+            RETURNING t.{key}
+        ), inserted AS (
+            INSERT INTO {table} (alumni_id, {", ".join(columns)})
+            SELECT %(alumni_id)s, {values}
+            FROM jsonb_populate_recordset(NULL::{table}, %(insert)s::jsonb) r
+            RETURNING {key}
+        )
+        SELECT COALESCE((SELECT array_agg({key}) FROM deleted), '{{}}') AS deleted,
+               COALESCE((SELECT array_agg({key}) FROM updated), '{{}}') AS updated,
+               COALESCE((SELECT array_agg({key} ORDER BY {key}) FROM inserted), '{{}}') AS inserted
+    """
+
+for _table, _spec in PROFILE_CHILD_TABLES.items():
+    _spec["query"] = _child_write_query(_table, _spec["key"], _spec["columns"], _spec["defaults"])
+
+# Fields GET /api/alumni/profile returns that the update payload cannot set;
+# they are dropped so a profile read can be sent back as is
+PROFILE_READ_ONLY_FIELDS = ("alumni_id", "user_id", "created_at", "updated_at")
+
+def _writable(entry):
+    if not isinstance(entry, dict):
+        return entry
+    return {key: value for key, value in entry.items() if key not in PROFILE_READ_ONLY_FIELDS}
+
+def _check_keys(entry, allowed, label):
+    if not isinstance(entry, dict):
+        raise ValueError(f"{label} entries must be objects")
+    unknown = sorted(set(entry) - set(allowed))
+    if unknown:
+        raise ValueError(f"Unknown {label} field(s): {', '.join(unknown)}")
+
+def _profile_writes(profile_data):
+    # Validates an update_alumni_profile payload and groups it by table and
+    # action. Raises ValueError for anything outside the whitelists.
+    if not isinstance(profile_data, dict):
+        raise ValueError("Profile data must be an object")
+    unknown = sorted(set(profile_data) - {"basic", "delete", *PROFILE_CHILD_TABLES})
+    if unknown:
+        raise ValueError(f"Unknown section(s): {', '.join(unknown)}")
+    
+    basic = profile_data.get("basic")
+    if basic is not None:
+        basic = _writable(basic)
+        _check_keys(basic, ALUMNI_PROFILE_COLUMNS, "basic")
+        basic = basic or None
+    writes = {"basic": basic}
+    
+    deletes = profile_data.get("delete") or {}
+    _check_keys(deletes, PROFILE_CHILD_TABLES, "delete")
+    for table, spec in PROFILE_CHILD_TABLES.items():
+        key = spec["key"]
+        entries = profile_data.get(table) or []
+        if not isinstance(entries, list):
+            raise ValueError(f"{table} must be a list")
+        update, insert = [], []
+        for entry in entries:
+            entry = _writable(entry)
+            _check_keys(entry, [key, *spec["columns"]], table)
+            if entry.get(key) is not None:
+                update.append(entry)
+            else:
+                insert.append({column: value for column, value in entry.items() if column != key})
+        
+        delete = deletes.get(table) or []
+        if not isinstance(delete, list) or not all(isinstance(item, int) for item in delete):
+            raise ValueError(f"delete.{table} must be a list of ids")
+        
+        update_ids = [entry[key] for entry in update]
+        if not all(isinstance(item, int) for item in update_ids):
+            raise ValueError(f"{key} must be an integer")
+        if len(set(update_ids)) != len(update_ids) or set(update_ids) & set(delete):
+            raise ValueError(f"Each {table} entry can only be changed once per request")
+        writes[table] = {"delete": delete, "update": update, "insert": insert}
+    return writes
+
+# Alumni fields a caller may select in list and batch reads, mapped to their
+# SQL (alias a = alumni, u = users); education and jobs are fetched separately.
+ALUMNI_BATCH_MAX_IDS = int(os.getenv("ALUMNI_BATCH_MAX_IDS", "500"))
+ALUMNI_FIELDS = {
+    "alumni_id": "a.alumni_id",
+    "user_id": "a.user_id",
+    "username": "u.username",
+    "email": "u.email",
+    "full_name": "a.full_name",
+    "date_of_birth": "a.date_of_birth",
+    "gender": "a.gender",
+    "bio": "a.bio",
+    "contact_number": "a.contact_number",
+    "address": "a.address",
+    "graduation_year": "a.graduation_year",
+    "current_location": "a.current_location",
+    "profile_image": "a.profile_image",
+    "social_media_links": "a.social_media_links",
+    "availability_for_mentorship": "a.availability_for_mentorship",
+    "created_at": "a.created_at",
+    "updated_at": "a.updated_at",
+}
+ALUMNI_BATCH_CHILDREN = {
+    "education": "SELECT * FROM education WHERE alumni_id = ANY(%s) ORDER BY alumni_id, education_id",
+    "jobs": "SELECT * FROM jobs WHERE alumni_id = ANY(%s) ORDER BY alumni_id, job_id",
+}
+
+# List responses: "objects" is a list of dicts under "data"; "rows" is one
+# shared "columns" header plus "rows" of plain arrays
+ALUMNI_ROW_FORMATS = ("objects", "rows")
+
+def _alumni_list_columns(fields):
+    # Requested fields in order, alumni_id first; all of ALUMNI_FIELDS if none
+    if not fields:
+        return list(ALUMNI_FIELDS)
+    unknown = [field for field in fields if field not in ALUMNI_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return ["alumni_id", *(field for field in dict.fromkeys(fields) if field != "alumni_id")]
+
+def _alumni_list_select(columns, internal=()):
+    # SELECT list for columns, followed by any internal-only columns (e.g.
+    # the keyset) that were not requested
+    extra = [column for column in internal if column not in columns]
+    return ", ".join(f"{ALUMNI_FIELDS[column]} AS {column}" for column in [*columns, *extra])
+
+def _alumni_list_rows(columns, rows, row_format):
+    # rows are tuples from a plain cursor, in _alumni_list_select order
+    width = len(columns)
+    if row_format == "rows":
+        return {"columns": columns, "rows": [row if len(row) == width else row[:width] for row in rows]}
+    return {"data": [dict(zip(columns, row)) for row in rows]}
+
+def _keyset_position(columns, row):
+    # (full_name, alumni_id) of a tuple row selected with the keyset columns
+    names = [*columns, *(column for column in ("full_name", "alumni_id") if column not in columns)]
+    return {"full_name": row[names.index("full_name")], "alumni_id": row[names.index("alumni_id")]}
+
+def filter_alumni_query(columns, filters, limit, offset):
+    # One page of filter_alumni as (query, params)
+    where, params = build_alumni_filter(filters)
+    query = """
+        SELECT """ + _alumni_list_select(columns) + """
+        FROM alumni a
+        JOIN users u ON a.user_id = u.user_id
+        WHERE """ + where + """
+        ORDER BY a.full_name, a.alumni_id
+        LIMIT %s OFFSET %s
+    """
+    return query, [*params, limit, offset]
+
+# Keep derived in-memory state in step with committed writes
+# Cache upkeep after a committed write. The write has already succeeded, so
+# a failure here is logged instead of raised: the services would otherwise
+# roll back nothing and report the write as failed, inviting a duplicate retry.
+def _alumni_changed(cursor, alumni_id):
+    _after_commit(profile_cache.invalidate, alumni_id)
+    _after_commit(facet_cache.refresh_alumni, cursor, alumni_id)
+
+def _alumni_deleted(cursor, alumni_id):
+    _after_commit(profile_cache.invalidate, alumni_id)
+    _after_commit(facet_cache.remove_alumni, cursor, alumni_id)
+    _after_commit(image_index.invalidate, alumni_id)
+
+def _after_commit(step, *args):
+    try:
+        step(*args)
+    except Exception as e:
+        print(f"Cache update for alumni {args[-1]} failed ({step.__qualname__}): {e}")
+        if getattr(step, "__self__", None) is facet_cache:
+            # Counts may now be off; rebuild on the next read
+            facet_cache.invalidate()
 
 # Authentication Services
 class AuthService:
@@ -58,6 +425,8 @@ class AuthService:
                 )
             
             conn.commit()
+            if user_data.get("is_alumni", True):
+                _alumni_changed(cursor, alumni_id)
             return {"user_id": user_id, "status": "success"}
         
         except Exception as e:
@@ -86,9 +455,22 @@ class AuthService:
                 return {"error": "Invalid credentials"}
             
             # Verify password
-            if not verify_password(password, user["password"]):
+            valid, needs_rehash = check_password(password, user["password"])
+            if not valid:
                 return {"error": "Invalid credentials"}
             
+            # Upgrade legacy or outdated hashes now that we have the plain password
+            if needs_rehash:
+                try:
+                    cursor.execute(
+                        "UPDATE users SET password = %s, updated_at = CURRENT_TIMESTAMP WHERE user_id = %s",
+                        (hash_password(password), user["user_id"])
+                    )
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    print(f"Password rehash failed for user {user['user_id']}: {e}")
+            
             # Create access token
             token_data = {
                 "sub": str(user["user_id"]),
@@ -126,6 +508,18 @@ class AuthService:
 class AlumniService:
     @staticmethod
     def get_alumni_profile(alumni_id):
+        result = AlumniService.get_alumni_profile_json(alumni_id)
+        if "error" in result:
+            return result
+        return json.loads(result["profile_json"])
+
+    @staticmethod
+    def get_alumni_profile_json(alumni_id):
+        cached = profile_cache.get(alumni_id)
+        if cached is not None:
+            return {"profile_json": cached}
+        
+        loaded_at = time.monotonic()
         conn = get_db_connection()
         if not conn:
             return {"error": "Database connection failed"}
@@ -133,32 +527,16 @@ class AlumniService:
         try:
             cursor = conn.cursor()
             
-            # Get basic alumni profile
-            cursor.execute("""
-                SELECT a.*, u.email, u.username 
-                FROM alumni a
-                JOIN users u ON a.user_id = u.user_id
-                WHERE a.alumni_id = %s
-            """, (alumni_id,))
+            # Build the complete profile (basic info, education, jobs) as one
+            # JSON document on the server so it can be sent as-is
+            cursor.execute(PROFILE_JSON_QUERY, (alumni_id,))
             
-            profile = cursor.fetchone()
-            if not profile:
+            row = cursor.fetchone()
+            if not row:
                 return {"error": "Profile not found"}
             
-            # Get education records
-            cursor.execute("SELECT * FROM education WHERE alumni_id = %s", (alumni_id,))
-            education = cursor.fetchall()
-            
-            # Get job records
-            cursor.execute("SELECT * FROM jobs WHERE alumni_id = %s", (alumni_id,))
-            jobs = cursor.fetchall()
-            
-            # Combine all data
-            complete_profile = dict(profile)
-            complete_profile["education"] = [dict(edu) for edu in education]
-            complete_profile["jobs"] = [dict(job) for job in jobs]
-            
-            return complete_profile
+            profile_cache.set(alumni_id, row["profile"], loaded_at)
+            return {"profile_json": row["profile"]}
             
         except Exception as e:
             return {"error": str(e)}
@@ -196,6 +574,69 @@ class AlumniService:
             conn.close()
 
 
+    @staticmethod
+    def update_profile_image(alumni_id, image_path):
+        conn = get_db_connection()
+        if not conn:
+            return {"error": "Database connection failed"}
+        
+        try:
+            cursor = conn.cursor()
+            
+            # Lock the row so concurrent uploads agree on which file they replace
+            cursor.execute(
+                "SELECT profile_image FROM alumni WHERE alumni_id = %s FOR UPDATE",
+                (alumni_id,)
+            )
+            current = cursor.fetchone()
+            if not current:
+                return {"error": "Alumni not found"}
+            
+            cursor.execute(
+                "UPDATE alumni SET profile_image = %s WHERE alumni_id = %s",
+                (image_path, alumni_id)
+            )
+            
+            # Identical images share one blob, so the previous one may still
+            # be referenced by other profiles
+            previous_references = 0
+            if current["profile_image"]:
+                cursor.execute(
+                    "SELECT COUNT(*) AS refcount FROM alumni WHERE profile_image = %s",
+                    (current["profile_image"],)
+                )
+                previous_references = cursor.fetchone()["refcount"]
+            
+            conn.commit()
+            _after_commit(profile_cache.invalidate, alumni_id)
+            return {
+                "status": "success",
+                "previous_image": current["profile_image"],
+                "previous_references": previous_references
+            }
+            
+        except Exception as e:
+            conn.rollback()
+            return {"error": str(e)}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def list_image_references():
+        # Every stored image still referenced by a profile, for blob garbage collection
+        conn = get_db_connection()
+        if not conn:
+            return {"error": "Database connection failed"}
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT DISTINCT profile_image FROM alumni WHERE profile_image IS NOT NULL")
+            return {"references": [row["profile_image"] for row in cursor.fetchall()]}
+        except Exception as e:
+            return {"error": str(e)}
+        finally:
+            conn.close()
+
     @staticmethod
     def create_profile_entry(alumni_id, entry_data):
         conn = get_db_connection()
@@ -226,6 +667,7 @@ class AlumniService:
                 ))
                 result = cursor.fetchone()
                 conn.commit()
+                _alumni_changed(cursor, alumni_id)
                 return {"education_id": result["education_id"], "status": "success"}
                 
             elif entry_type == "job":
@@ -246,6 +688,7 @@ class AlumniService:
                 ))
                 result = cursor.fetchone()
                 conn.commit()
+                _alumni_changed(cursor, alumni_id)
                 return {"job_id": result["job_id"], "status": "success"}
             else:
                 return {"error": "Invalid entry type"}
@@ -258,74 +701,59 @@ class AlumniService:
     
     @staticmethod
     def update_alumni_profile(alumni_id, profile_data):
+        # Applies a whole profile edit atomically in at most one statement
+        # per table: "basic" alumni fields, then education and jobs entries
+        # (with an id: update, without: create) and ids under "delete".
+        try:
+            writes = _profile_writes(profile_data)
+        except ValueError as e:
+            return {"error": str(e)}
+        
         conn = get_db_connection()
         if not conn:
             return {"error": "Database connection failed"}
         
         try:
             cursor = conn.cursor()
-            
-            # Update basic alumni information if provided
-            if "basic" in profile_data:
-                basic = profile_data["basic"]
-                fields = []
-                values = []
-                
-                # Dynamically build the update query based on provided fields
-                for key, value in basic.items():
-                    if key != "alumni_id" and key != "user_id":
-                        fields.append(f"{key} = %s")
-                        values.append(value)
+            created = {}
+            
+            if writes["basic"] is not None:
+                cursor.execute(UPDATE_ALUMNI_PROFILE_QUERY, {
+                    "alumni_id": alumni_id,
+                    "basic": json.dumps(writes["basic"])
+                })
+                if cursor.rowcount == 0:
+                    conn.rollback()
+                    return {"error": "Alumni not found"}
+            
+            for table, spec in PROFILE_CHILD_TABLES.items():
+                work = writes[table]
+                if not any(work.values()):
+                    continue
+                cursor.execute(spec["query"], {
+                    "alumni_id": alumni_id,
+                    "delete": work["delete"],
+                    "update": json.dumps(work["update"], default=str),
+                    "insert": json.dumps(work["insert"], default=str)
+                })
+                result = cursor.fetchone()
                 
-                if fields:
-                    values.append(alumni_id)
-                    cursor.execute(
-                        f"UPDATE alumni SET {', '.join(fields)}, updated_at = CURRENT_TIMESTAMP WHERE alumni_id = %s",
-                        values
-                    )
-            
-            # Update education records if provided
-            if "education" in profile_data:
-                for edu in profile_data["education"]:
-                    if "education_id" in edu:
-                        # Update existing record
-                        fields = []
-                        values = []
-                        
-                        for key, value in edu.items():
-                            if key != "education_id":
-                                fields.append(f"{key} = %s")
-                                values.append(value)
-                        
-                        if fields:
-                            values.append(edu["education_id"])
-                            cursor.execute(
-                                f"UPDATE education SET {', '.join(fields)}, updated_at = CURRENT_TIMESTAMP WHERE education_id = %s",
-                                values
-                            )
-            
-            # Update job records if provided
-            if "jobs" in profile_data:
-                for job in profile_data["jobs"]:
-                    if "job_id" in job:
-                        # Update existing record
-                        fields = []
-                        values = []
-                        
-                        for key, value in job.items():
-                            if key != "job_id":
-                                fields.append(f"{key} = %s")
-                                values.append(value)
-                        
-                        if fields:
-                            values.append(job["job_id"])
-                            cursor.execute(
-                                f"UPDATE jobs SET {', '.join(fields)}, updated_at = CURRENT_TIMESTAMP WHERE job_id = %s",
-                                values
-                            )
+                # Updates and deletes only match rows owned by this alumni
+                requested = {
+                    "deleted": work["delete"],
+                    "updated": [row[spec["key"]] for row in work["update"]]
+                }
+                for column, ids in requested.items():
+                    missing = sorted(set(ids) - set(result[column]))
+                    if missing:
+                        conn.rollback()
+                        return {"error": f"{table} entries not found: {', '.join(map(str, missing))}"}
+                if work["insert"]:
+                    created[table] = result["inserted"]
             
             conn.commit()
-            return {"status": "success"}
+            _alumni_changed(cursor, alumni_id)
+            return {"status": "success", "created": created}
             
         except Exception as e:
             conn.rollback()
@@ -359,6 +787,7 @@ class AlumniService:
                 return {"error": "Item not found or unauthorized"}
             
             conn.commit()
+            _alumni_changed(cursor, alumni_id)
             return {"status": "success"}
             
         except Exception as e:
@@ -371,35 +800,85 @@ class AlumniService:
 # Admin Services
 class AdminService:
     @staticmethod
-    def get_all_alumni(page=1, per_page=10):
+    def get_all_alumni(page=1, per_page=10, cursor=None, pagination="offset", total=None,
+                       fields=None, row_format="objects"):
+        if row_format not in ALUMNI_ROW_FORMATS:
+            return {"error": f"Invalid row format: {row_format}"}
+        try:
+            columns = _alumni_list_columns(fields)
+        except ValueError as e:
+            return {"error": str(e)}
+        
         conn = get_db_connection()
         if not conn:
             return {"error": "Database connection failed"}
         
         try:
-            cursor = conn.cursor()
+            db_cursor = conn.cursor()
+            
+            # Get total count (exact, cached, planner estimate or skipped).
+            # Cursor pages skip it unless asked: the point of keyset paging is
+            # not to scan the table on every page.
+            keyset = cursor is not None or pagination == "cursor"
+            if total is None:
+                total = "none" if keyset else "exact"
+            if total not in ALUMNI_TOTAL_MODES:
+                return {"error": f"Invalid total mode: {total}"}
+            total_count = _count_alumni(db_cursor, total)
+            
+            # Only the requested columns are selected, as plain tuples; the
+            # keyset columns are added for next_cursor when not requested
+            row_cursor = conn.cursor(cursor_factory=TupleCursor)
+            query = """
+                SELECT """ + _alumni_list_select(columns, ("full_name", "alumni_id")) + """
+                FROM alumni a
+                JOIN users u ON a.user_id = u.user_id
+            """
             
-            # Get total count
-            cursor.execute("SELECT COUNT(*) as total FROM alumni")
-            total = cursor.fetchone()["total"]
+            if keyset:
+                # Keyset pagination: continue after the last (full_name, alumni_id)
+                # seen, served by idx_alumni_full_name_id
+                params = []
+                if cursor:
+                    position = decode_alumni_cursor(cursor)
+                    if position is None:
+                        return {"error": "Invalid cursor"}
+                    query += " WHERE (a.full_name, a.alumni_id) > (%s, %s)"
+                    params.extend(position)
+                query += " ORDER BY a.full_name, a.alumni_id LIMIT %s"
+                params.append(per_page + 1)
+                row_cursor.execute(query, params)
+                alumni_list = row_cursor.fetchall()
+                
+                has_more = len(alumni_list) > per_page
+                alumni_list = alumni_list[:per_page]
+                last = alumni_list[-1] if alumni_list else None
+                
+                return {
+                    "total": total_count,
+                    "per_page": per_page,
+                    "next_cursor": encode_alumni_cursor(_keyset_position(columns, last)) if has_more else None,
+                    **_alumni_list_rows(columns, alumni_list, row_format)
+                }
             
             # Get paginated alumni list
             offset = (page - 1) * per_page
-            cursor.execute("""
-                SELECT a.*, u.email, u.username 
-                FROM alumni a
-                JOIN users u ON a.user_id = u.user_id
-                ORDER BY a.full_name
+            row_cursor.execute(query + """
+                ORDER BY a.full_name, a.alumni_id
                 LIMIT %s OFFSET %s
-            """, (per_page, offset))
+            """, (per_page + 1, offset))
             
-            alumni_list = cursor.fetchall()
+            alumni_list = row_cursor.fetchall()
+            has_more = len(alumni_list) > per_page
+            alumni_list = alumni_list[:per_page]
+            last = alumni_list[-1] if alumni_list else None
             
             return {
-                "total": total,
+                "total": total_count,
                 "page": page,
                 "per_page": per_page,
-                "data": [dict(alumni) for alumni in alumni_list]
+                "next_cursor": encode_alumni_cursor(_keyset_position(columns, last)) if has_more else None,
+                **_alumni_list_rows(columns, alumni_list, row_format)
             }
             
         except Exception as e:
@@ -441,6 +920,7 @@ class AdminService:
             
             job_id = cursor.fetchone()["job_id"]
             conn.commit()
+            _alumni_changed(cursor, alumni_id)
             return {"job_id": job_id, "status": "success"}
             
         except Exception as e:
@@ -474,6 +954,7 @@ class AdminService:
             )
             
             conn.commit()
+            _alumni_changed(cursor, alumni_id)
             return {"status": "success", "message": "Job deleted successfully"}
             
         except Exception as e:
@@ -515,6 +996,7 @@ class AdminService:
             
             education_id = cursor.fetchone()["education_id"]
             conn.commit()
+            _alumni_changed(cursor, alumni_id)
             return {"education_id": education_id, "status": "success"}
             
         except Exception as e:
@@ -548,6 +1030,7 @@ class AdminService:
             )
             
             conn.commit()
+            _alumni_changed(cursor, alumni_id)
             return {"status": "success", "message": "Education record deleted successfully"}
             
         except Exception as e:
@@ -560,14 +1043,29 @@ class AdminService:
     def get_alumni_by_id(alumni_id):
         # Reuse the alumni service method
         return AlumniService.get_alumni_profile(alumni_id)
-    
+
     @staticmethod
-    def update_alumni_by_admin(alumni_id, profile_data):
-        # Similar to alumni update but with admin privileges
-        return AlumniService.update_alumni_profile(alumni_id, profile_data)
+    def get_alumni_by_id_json(alumni_id):
+        return AlumniService.get_alumni_profile_json(alumni_id)
     
     @staticmethod
-    def filter_alumni(filters):
+    def get_alumni_batch(alumni_ids, fields=None):
+        # Profiles for many alumni in at most three queries: one for the
+        # alumni rows and one ANY(...) lookup per child table, grouped here.
+        # fields limits the response to those keys (alumni_id is always
+        # included); education and jobs are only queried when asked for.
+        alumni_ids = list(dict.fromkeys(alumni_ids))
+        if not alumni_ids:
+            return {"error": "At least one alumni id is required"}
+        if len(alumni_ids) > ALUMNI_BATCH_MAX_IDS:
+            return {"error": f"At most {ALUMNI_BATCH_MAX_IDS} alumni ids per request"}
+        
+        fields = list(dict.fromkeys(fields or [*ALUMNI_FIELDS, *ALUMNI_BATCH_CHILDREN]))
+        unknown = [field for field in fields if field not in ALUMNI_FIELDS and field not in ALUMNI_BATCH_CHILDREN]
+        if unknown:
+            return {"error": f"Unknown field(s): {', '.join(unknown)}"}
+        columns = ["alumni_id", *(field for field in fields if field in ALUMNI_FIELDS and field != "alumni_id")]
+        
         conn = get_db_connection()
         if not conn:
             return {"error": "Database connection failed"}
@@ -575,132 +1073,82 @@ class AdminService:
         try:
             cursor = conn.cursor()
             
-            query = """
-                SELECT DISTINCT a.*, u.email, u.username 
+            cursor.execute(
+                "SELECT " + ", ".join(f"{ALUMNI_FIELDS[c]} AS {c}" for c in columns) + """
                 FROM alumni a
                 JOIN users u ON a.user_id = u.user_id
-            """
-            
-            # Join with education and jobs tables if needed
-            education_filters = ["department", "end_year", "start_year", "cgpa", "degree"]
-            job_filters = ["company_name", "position"]
-            
-            has_education_filter = any(f in filters for f in education_filters)
-            has_job_filter = any(f in filters for f in job_filters)
-            
-            if has_education_filter:
-                query += " LEFT JOIN education e ON e.alumni_id = a.alumni_id"
-            
-            if has_job_filter:
-                query += " LEFT JOIN jobs j ON j.alumni_id = a.alumni_id"
-            
-            query += " WHERE 1=1"
-            params = []
-            
-            # Add alumni table filters
-            if "full_name" in filters and filters["full_name"]:
-                query += " AND a.full_name ILIKE %s"
-                params.append(f"%{filters['full_name']}%")
-            
-            if "location" in filters and filters["location"]:
-                query += " AND a.current_location ILIKE %s"
-                params.append(f"%{filters['location']}%")
-            
-            if "availability_for_mentorship" in filters:
-                query += " AND a.availability_for_mentorship = %s"
-                params.append(filters["availability_for_mentorship"])
-            
-            # Add education table filters
-            if "department" in filters:
-                query += " AND e.department = %s"
-                params.append(filters["department"])
-            
-            if "end_year" in filters:
-                query += " AND e.end_year = %s"
-                params.append(filters["end_year"])
-            
-            if "start_year" in filters:
-                query += " AND e.start_year = %s"
-                params.append(filters["start_year"])
-            
-            if "cgpa" in filters:
-                query += " AND e.cgpa >= %s"
-                params.append(filters["cgpa"])
-            
-            if "degree" in filters:
-                query += " AND e.degree = %s"
-                params.append(filters["degree"])
-            
-            # Add job table filters
-            if "company_name" in filters:
-                query += " AND j.company_name ILIKE %s"
-                params.append(f"%{filters['company_name']}%")
-            
-            if "position" in filters:
-                query += " AND j.position ILIKE %s"
-                params.append(f"%{filters['position']}%")
-            
-            cursor.execute(query, params)
-            alumni_list = cursor.fetchall()
+                WHERE a.alumni_id = ANY(%s)
+                """,
+                (alumni_ids,)
+            )
+            profiles = {row["alumni_id"]: dict(row) for row in cursor.fetchall()}
+            
+            for child, query in ALUMNI_BATCH_CHILDREN.items():
+                if child not in fields:
+                    continue
+                for profile in profiles.values():
+                    profile[child] = []
+                if profiles:
+                    cursor.execute(query, (list(profiles),))
+                    for row in cursor.fetchall():
+                        profiles[row["alumni_id"]][child].append(dict(row))
             
-            return {"data": [dict(alumni) for alumni in alumni_list]}
+            return {
+                "data": [profiles[alumni_id] for alumni_id in alumni_ids if alumni_id in profiles],
+                "missing": [alumni_id for alumni_id in alumni_ids if alumni_id not in profiles]
+            }
             
         except Exception as e:
             return {"error": str(e)}
         finally:
             conn.close()
-
+    
     @staticmethod
-    def get_filter_categories():
+    def update_alumni_by_admin(alumni_id, profile_data):
+        # Similar to alumni update but with admin privileges
+        return AlumniService.update_alumni_profile(alumni_id, profile_data)
+    
+    @staticmethod
+    def filter_alumni(filters, page=1, per_page=50, fields=None, row_format="objects"):
+        if row_format not in ALUMNI_ROW_FORMATS:
+            return {"error": f"Invalid row format: {row_format}"}
+        try:
+            columns = _alumni_list_columns(fields)
+        except ValueError as e:
+            return {"error": str(e)}
+        
         conn = get_db_connection()
         if not conn:
             return {"error": "Database connection failed"}
         
         try:
-            cursor = conn.cursor()
-            categories = {}
-            
-            # Get all departments
-            cursor.execute("SELECT DISTINCT department FROM education WHERE department IS NOT NULL")
-            departments = [row["department"] for row in cursor.fetchall()]
-            categories["departments"] = departments
+            cursor = conn.cursor(cursor_factory=TupleCursor)
             
-            # Get all graduation years
-            cursor.execute("SELECT DISTINCT end_year FROM education WHERE end_year IS NOT NULL ORDER BY end_year DESC")
-            grad_years = [row["end_year"] for row in cursor.fetchall()]
-            categories["graduation_years"] = grad_years
-            
-            # Get all start years
-            cursor.execute("SELECT DISTINCT start_year FROM education WHERE start_year IS NOT NULL ORDER BY start_year DESC")
-            start_years = [row["start_year"] for row in cursor.fetchall()]
-            categories["start_years"] = start_years
-            
-            # Get all degrees
-            cursor.execute("SELECT DISTINCT degree FROM education WHERE degree IS NOT NULL")
-            degrees = [row["degree"] for row in cursor.fetchall()]
-            categories["degrees"] = degrees
-            
-            # Get all companies
-            cursor.execute("SELECT DISTINCT company_name FROM jobs WHERE company_name IS NOT NULL")
-            companies = [row["company_name"] for row in cursor.fetchall()]
-            categories["companies"] = companies
-            
-            # Get all positions
-            cursor.execute("SELECT DISTINCT position FROM jobs WHERE position IS NOT NULL")
-            positions = [row["position"] for row in cursor.fetchall()]
-            categories["positions"] = positions
-            
-            # Get all locations from alumni
-            cursor.execute("SELECT DISTINCT current_location FROM alumni WHERE current_location IS NOT NULL")
-            locations = [row["current_location"] for row in cursor.fetchall()]
-            categories["locations"] = locations
+            query, params = filter_alumni_query(columns, filters, per_page + 1, (page - 1) * per_page)
+            cursor.execute(query, params)
+            alumni_list = cursor.fetchall()
             
-            return categories
+            has_more = len(alumni_list) > per_page
+            return {
+                "page": page,
+                "per_page": per_page,
+                "has_more": has_more,
+                **_alumni_list_rows(columns, alumni_list[:per_page], row_format)
+            }
             
         except Exception as e:
             return {"error": str(e)}
         finally:
             conn.close()
+
+    @staticmethod
+    def get_filter_categories():
+        # Served from the in-memory facet cache; includes per-value alumni counts
+        return facet_cache.get_categories()
+
+    @staticmethod
+    def get_filter_categories_json():
+        return facet_cache.get_categories_json()
     
     @staticmethod
     def delete_alumni(alumni_id):
@@ -718,11 +1166,30 @@ class AdminService:
                 return {"error": "Alumni not found"}
                 
             user_id = result["user_id"]
+        except Exception as e:
+            return {"error": str(e)}
+        finally:
+            conn.close()
+
+        # Revoke the account's tokens first: if the revocation store is
+        # unavailable nothing has been deleted yet and the request can simply
+        # be retried. The connection is released before, as the database
+        # store takes its own from the pool.
+        if not token_cache.revoke_subject(user_id):
+            return {"error": "Could not revoke the account's tokens; try again", "status_code": 503}
+
+        conn = get_db_connection()
+        if not conn:
+            return {"error": "Database connection failed"}
+
+        try:
+            cursor = conn.cursor()
             
             # Delete the user (cascade will delete alumni record too)
             cursor.execute("DELETE FROM users WHERE user_id = %s", (user_id,))
             
             conn.commit()
+            _alumni_deleted(cursor, alumni_id)
             return {"status": "success"}
             
         except Exception as e:
@@ -731,3 +1198,40 @@ class AdminService:
         finally:
             conn.close()
 
+
+# Async Services
+# The services above are blocking psycopg2 code. The async variants run each
+# call on a worker thread so routes can await them without stalling the event
+# loop. The number of concurrent calls is capped at the pool size, so excess
+# requests queue on the event loop instead of on the pool's wait queue.
+_service_limiter = None
+
+def _get_service_limiter():
+    global _service_limiter
+    if _service_limiter is None:
+        _service_limiter = anyio.CapacityLimiter(DB_POOL_MAX_SIZE)
+    return _service_limiter
+
+class AsyncService:
+    def __init__(self, service):
+        self._service = service
+
+    def __getattr__(self, name):
+        method = getattr(self._service, name)
+
+        async def call(*args, **kwargs):
+            # Copy the caller's context so context variables set by the
+            # request are visible inside the worker thread
+            ctx = contextvars.copy_context()
+            return await anyio.to_thread.run_sync(
+                functools.partial(ctx.run, run_operation, name, method, *args, **kwargs),
+                limiter=_get_service_limiter()
+            )
+
+        call.__name__ = name
+        return call
+
+
+AsyncAuthService = AsyncService(AuthService)
+AsyncAlumniService = AsyncService(AlumniService)
+AsyncAdminService = AsyncService(AdminService)
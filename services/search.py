@@ -0,0 +1,91 @@
+from config.main import get_db_connection
+from services.main import AsyncService
+import os
+
+# Minimum word similarity for typo-tolerant (trigram) matches
+SEARCH_SIMILARITY_THRESHOLD = float(os.getenv("SEARCH_SIMILARITY_THRESHOLD", "0.4"))
+
+# Ranked search over alumni_search (see migrations/0002_search_and_keyset.sql).
+# A row matches when the full-text query matches its document or when the
+# search term is trigram-similar to a word in its names, locations, companies,
+# positions or departments; the latter catches typos and partial words.
+SEARCH_QUERY = """
+    SELECT a.alumni_id, a.full_name, a.current_location, a.graduation_year,
+           a.profile_image, a.availability_for_mentorship,
+           ts_rank_cd(s.document, q.query) + word_similarity(%(term)s, s.search_text) AS rank,
+           COUNT(*) OVER () AS total
+    FROM alumni_search s
+    JOIN alumni a ON a.alumni_id = s.alumni_id
+    CROSS JOIN websearch_to_tsquery('simple', %(term)s) AS q(query)
+    WHERE s.document @@ q.query OR %(term)s <%% s.search_text
+    ORDER BY rank DESC, a.alumni_id
+    LIMIT %(limit)s OFFSET %(offset)s
+"""
+
+# Match count on its own, for pages past the last result where the window
+# count above has no row to ride on
+SEARCH_COUNT_QUERY = """
+    SELECT COUNT(*) AS total
+    FROM alumni_search s
+    CROSS JOIN websearch_to_tsquery('simple', %(term)s) AS q(query)
+    WHERE s.document @@ q.query OR %(term)s <%% s.search_text
+"""
+
+# Search Services
+class SearchService:
+    @staticmethod
+    def search_alumni(term, page=1, per_page=20):
+        term = (term or "").strip().lower()
+        if not term:
+            return {"error": "Search term is required"}
+
+        conn = get_db_connection()
+        if not conn:
+            return {"error": "Database connection failed"}
+
+        try:
+            cursor = conn.cursor()
+
+            # Scoped to this transaction; the pooled connection is rolled back
+            # before it is reused
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                (str(SEARCH_SIMILARITY_THRESHOLD),)
+            )
+
+            cursor.execute(SEARCH_QUERY, {
+                "term": term,
+                "limit": per_page,
+                "offset": (page - 1) * per_page
+            })
+            rows = cursor.fetchall()
+
+            if rows:
+                total = rows[0]["total"]
+            elif page > 1:
+                cursor.execute(SEARCH_COUNT_QUERY, {"term": term})
+                total = cursor.fetchone()["total"]
+            else:
+                total = 0
+            results = []
+            for row in rows:
+                result = dict(row)
+                del result["total"]
+                result["rank"] = round(float(result["rank"]), 4)
+                results.append(result)
+
+            return {
+                "query": term,
+                "total": total,
+                "page": page,
+                "per_page": per_page,
+                "data": results
+            }
+
+        except Exception as e:
+            return {"error": str(e)}
+        finally:
+            conn.close()
+
+
+AsyncSearchService = AsyncService(SearchService)
@@ -0,0 +1,236 @@
+import argparse
+import os
+import re
+import time
+
+try:
+    import boto3
+except ImportError:  # optional; only needed for IMAGE_STORAGE_BACKEND=s3
+    boto3 = None
+
+# Storage configuration
+IMAGE_STORAGE_BACKEND = os.getenv("IMAGE_STORAGE_BACKEND", "local")  # local or s3
+IMAGE_STORAGE_ROOT = os.getenv("IMAGE_STORAGE_ROOT", os.path.join("uploads", "blobs"))
+IMAGE_STORAGE_BUCKET = os.getenv("IMAGE_STORAGE_BUCKET", "alumni-images")
+IMAGE_STORAGE_PREFIX = os.getenv("IMAGE_STORAGE_PREFIX", "profile-images/")
+IMAGE_STORAGE_ENDPOINT_URL = os.getenv("IMAGE_STORAGE_ENDPOINT_URL")  # e.g. a local MinIO
+# Unreferenced blobs younger than this are kept: an upload of the same
+# content may have stored the blob but not yet committed its reference
+IMAGE_BLOB_GRACE = float(os.getenv("IMAGE_BLOB_GRACE", "3600"))  # seconds
+READ_CHUNK_SIZE = 64 * 1024
+
+# Blob keys are "<sha256 of content><ext>" for originals and
+# "<sha256 of original>_<size><ext>" for derivatives
+BLOB_KEY_PATTERN = re.compile(r"^([0-9a-f]{64})(?:_([a-z]+))?(\.[a-z0-9]+)$")
+
+
+def blob_key(digest, extension, variant=None):
+    return f"{digest}_{variant}{extension}" if variant else f"{digest}{extension}"
+
+
+def parse_blob_key(value):
+    # (digest, variant, extension) for blob keys, None for anything else
+    # (e.g. legacy uploads/profile_images/<uuid> paths)
+    match = BLOB_KEY_PATTERN.match(value or "")
+    return match.groups() if match else None
+
+
+def read_file_range(path, start=0, end=None):
+    # Yields bytes start..end (inclusive; end=None reads to EOF) in chunks
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            chunk = handle.read(READ_CHUNK_SIZE if remaining is None else min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+# Content-addressed blobs on the local filesystem, fanned out over two levels
+# of directories named after the first hex digits (ab/cd/abcd...), so no single
+# directory grows past a few thousand entries.
+class LocalBlobStore:
+    name = "local"
+
+    def __init__(self, root=IMAGE_STORAGE_ROOT):
+        self.root = root
+
+    def local_path(self, key):
+        return os.path.join(self.root, key[0:2], key[2:4], key)
+
+    def staging_dir(self):
+        # Temp files are created on the same filesystem so put_file can rename
+        path = os.path.join(self.root, "tmp")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def put_file(self, source_path, key, content_type=None):
+        # Moves source_path into place. If the blob already exists the
+        # identical content is replaced, which also refreshes its mtime for
+        # the garbage-collection grace period.
+        destination = self.local_path(key)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        os.replace(source_path, destination)
+
+    def stat(self, key):
+        try:
+            stat = os.stat(self.local_path(key))
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def read_range(self, key, start=0, end=None):
+        return read_file_range(self.local_path(key), start, end)
+
+    def download(self, key, destination):
+        with open(destination, "wb") as handle:
+            for chunk in self.read_range(key):
+                handle.write(chunk)
+
+    def delete(self, key):
+        try:
+            os.unlink(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_blobs(self):
+        # Yields (key, mtime) for every stored blob
+        for directory, _, filenames in os.walk(self.root):
+            if os.path.relpath(directory, self.root).split(os.sep)[0] == "tmp":
+                continue
+            for filename in filenames:
+                if parse_blob_key(filename):
+                    try:
+                        yield filename, os.stat(os.path.join(directory, filename)).st_mtime
+                    except OSError:
+                        pass
+
+
+# Blobs in an S3-compatible object store. Accepts any client exposing the
+# boto3 S3 methods used below, so a local stand-in (MinIO, moto or a stub)
+# can be used for testing.
+class ObjectBlobStore:
+    name = "s3"
+
+    def __init__(self, client, bucket=IMAGE_STORAGE_BUCKET, prefix=IMAGE_STORAGE_PREFIX):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _object_key(self, key):
+        # Same fan-out as the local layout keeps listings by prefix cheap
+        return f"{self.prefix}{key[0:2]}/{key[2:4]}/{key}"
+
+    def local_path(self, key):
+        return None
+
+    def staging_dir(self):
+        return None
+
+    def put_file(self, source_path, key, content_type=None):
+        extra = {"ContentType": content_type} if content_type else {}
+        with open(source_path, "rb") as handle:
+            self.client.put_object(Bucket=self.bucket, Key=self._object_key(key), Body=handle, **extra)
+        os.unlink(source_path)
+
+    def stat(self, key):
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except Exception:
+            return None
+        return head["ContentLength"], head["LastModified"].timestamp()
+
+    def read_range(self, key, start=0, end=None):
+        extra = {}
+        if start or end is not None:
+            extra["Range"] = f"bytes={start}-{'' if end is None else end}"
+        body = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key), **extra)["Body"]
+        try:
+            for chunk in iter(lambda: body.read(READ_CHUNK_SIZE), b""):
+                yield chunk
+        finally:
+            body.close()
+
+    def download(self, key, destination):
+        with open(destination, "wb") as handle:
+            for chunk in self.read_range(key):
+                handle.write(chunk)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def iter_blobs(self):
+        kwargs = {"Bucket": self.bucket, "Prefix": self.prefix}
+        while True:
+            page = self.client.list_objects_v2(**kwargs)
+            for item in page.get("Contents", []):
+                key = item["Key"].rsplit("/", 1)[-1]
+                if parse_blob_key(key):
+                    yield key, item["LastModified"].timestamp()
+            if not page.get("IsTruncated"):
+                return
+            kwargs["ContinuationToken"] = page["NextContinuationToken"]
+
+
+def create_blob_store(name=IMAGE_STORAGE_BACKEND):
+    if name == "local":
+        return LocalBlobStore()
+    if name == "s3":
+        if boto3 is None:
+            raise RuntimeError("IMAGE_STORAGE_BACKEND=s3 requires the boto3 package")
+        return ObjectBlobStore(boto3.client("s3", endpoint_url=IMAGE_STORAGE_ENDPOINT_URL))
+    raise ValueError(f"Unknown image storage backend: {name}")
+
+
+blob_store = create_blob_store()
+
+
+def delete_unreferenced_blob(store, key, related_keys=(), grace=IMAGE_BLOB_GRACE):
+    # Deletes a blob (and related_keys, e.g. its derivatives) that no alumni
+    # row references any more, unless it was (re)written within the grace
+    # period. Returns whether anything was deleted.
+    stat = store.stat(key)
+    if stat is not None and time.time() - stat[1] < grace:
+        return False
+    for target in (key, *related_keys):
+        store.delete(target)
+    return True
+
+
+def collect_garbage(store, referenced_keys, grace=IMAGE_BLOB_GRACE, dry_run=False):
+    # Deletes every blob whose digest is not referenced by an alumni row,
+    # sparing blobs written within the grace period
+    referenced = {parse_blob_key(key)[0] for key in referenced_keys if parse_blob_key(key)}
+    cutoff = time.time() - grace
+    report = {"scanned": 0, "deleted": 0, "kept_referenced": 0, "kept_recent": 0}
+    for key, mtime in store.iter_blobs():
+        report["scanned"] += 1
+        digest = parse_blob_key(key)[0]
+        if digest in referenced:
+            report["kept_referenced"] += 1
+        elif mtime > cutoff:
+            report["kept_recent"] += 1
+        else:
+            report["deleted"] += 1
+            if not dry_run:
+                store.delete(key)
+    return report
+
+
+if __name__ == "__main__":
+    import json
+    from services.main import AlumniService
+
+    parser = argparse.ArgumentParser(description="Profile image blob storage maintenance")
+    parser.add_argument("command", choices=["gc"])
+    parser.add_argument("--grace", type=float, default=IMAGE_BLOB_GRACE)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    result = AlumniService.list_image_references()
+    if "error" in result:
+        raise SystemExit(result["error"])
+    print(json.dumps(collect_garbage(blob_store, result["references"], args.grace, args.dry_run), indent=2))